@@ -1,22 +1,87 @@
 import asyncio
+import json
 import logging
+import queue
+import threading
 from datetime import datetime
-from functools import partial
-from typing import Dict, Any
+from functools import wraps
+from typing import Any, Dict, Optional
 
-import ros_api
 from environs import Env
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from flask import render_template
 
-from config import DEVICES_IP_MAP
+from config import (
+    DEVICES_IP_MAP,
+    EVENTS_ENABLED,
+    HISTORY_DB_PATH,
+    HISTORY_MAINTENANCE_INTERVAL,
+    HISTORY_RETENTION_DAYS,
+    HISTORY_ROLLUP_RETENTION_DAYS,
+    MONITOR_INTERVAL,
+    PROVISION_CONCURRENCY,
+    PROVISION_DEADLINE,
+    REQUEST_DEADLINE,
+    ROS_FLEET_CONCURRENCY,
+    ROS_SUBSCRIPTIONS,
+    SHARD_TTL,
+    SNAPSHOT_DIR,
+    WARM_START_FILE,
+)
+from protocols import routeros
+from protocols.breaker import CircuitOpenError
+from protocols.deadline import DeadlineExceeded, deadline
+from protocols.provisioning import (
+    ProvisioningEngine,
+    desired_state,
+)
 from protocols.snmp import AsyncSwitchSNMP
-from monitor.devices import start_monitoring, status
+from monitor.availability import fleet_sla
+from monitor.devices import (
+    device_info,
+    fleet_state,
+    provisioning_state,
+    snmp_client,
+    start_event_listener,
+    start_monitoring,
+)
+from monitor.ros_fleet import (
+    collect_fleet,
+    fleet_totals,
+    ros_devices,
+    router_credentials,
+)
+from monitor.history import HistoryStore
+from monitor.sharding import ShardedSnapshotReader
+from monitor.snapshot import FleetSnapshot, SnapshotStore
+from monitor.topn import METRICS, TOP_PUBLISHED
 
 app = Flask(__name__)
 CORS(app)
-start_monitoring()
+
+# Історію записує той процес, що опитує пристрої
+history_store = (
+    HistoryStore(
+        HISTORY_DB_PATH,
+        writer=not SNAPSHOT_DIR,
+        retention_days=HISTORY_RETENTION_DAYS,
+        rollup_retention_days=HISTORY_ROLLUP_RETENTION_DAYS,
+        maintenance_interval=HISTORY_MAINTENANCE_INTERVAL,
+    )
+    if HISTORY_DB_PATH
+    else None
+)
+
+# Якщо задано SNAPSHOT_DIR, опитуванням займаються окремі collector.py,
+# а веб-процес лише читає та об'єднує їхні знімки
+if SNAPSHOT_DIR:
+    snapshot_store = ShardedSnapshotReader(SNAPSHOT_DIR, SHARD_TTL)
+else:
+    snapshot_store = SnapshotStore()
+    start_monitoring(snapshot_store, history_store, WARM_START_FILE)
+    if EVENTS_ENABLED:
+        start_event_listener()
 
 # Прочитайте змінні середовища
 env = Env()
@@ -29,32 +94,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Посторінкова видача інтерфейсів: розмір сторінки за замовчуванням і межа
+INTERFACES_PAGE_SIZE = 100
+INTERFACES_PAGE_MAX = 1000
+
 
 @app.context_processor
 def inject_now():
     return {"now": datetime.now()}
 
 
-async def get_list_devices_data() -> Dict[str, Any]:
-    """Отримати дані про всі пристрої"""
-
-    # Отримання даних
-    devices = list(status.values())
+def current_snapshot() -> FleetSnapshot:
+    """Повертає останній опублікований (незмінний) знімок стану флоту"""
+    return snapshot_store.read()
 
-    # Оновлення timestamp
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    for device in devices:
-        device["timestamp"] = current_time
 
-    online_count = sum(1 for device in devices if device["alive"])
-    offline_count = len(devices) - online_count
+async def get_list_devices_data() -> Dict[str, Any]:
+    """Отримати дані про всі пристрої"""
+    snapshot = current_snapshot()
 
     return {
-        "devices": devices,
-        "online_count": online_count,
-        "offline_count": offline_count,
-        "total_count": len(devices),
-        "timestamp": current_time,
+        "devices": snapshot.devices,
+        "online_count": snapshot.online_count,
+        "degraded_count": snapshot.degraded_count,
+        "offline_count": snapshot.offline_count,
+        "unreachable_count": snapshot.unreachable_count,
+        "total_count": snapshot.total_count,
+        "timestamp": snapshot.timestamp,
     }
 
 
@@ -62,42 +128,100 @@ async def get_device_data(device_ip: str) -> Dict[str, Any]:
     """Функція для отримання даних про пристрій"""
 
     # Знаходимо пристрій за IP
-    device = next(
-        (d for d in list(status.values()) if d["ip"] == device_ip), None
-    )
+    device = current_snapshot().by_ip.get(device_ip)
 
     if not device:
         return {}
 
-    # Ініціалізація комутатора з отриманою IP-адресою
-    switch = AsyncSwitchSNMP(device_ip)
-    if not switch:
-        return {}
-
-    # Отримання статистики комутатора
-    stats, system_info = await asyncio.gather(
-        switch.get_interfaces_stats(), switch.get_system_info()
-    )
-
-    if device["alive"]:
-        return {
-            "device_ip": device_ip,
-            "device_name": device["name"],
-            "device_status": device["alive"],
-            "interfaces": stats,
-            "system_info": system_info,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
-    else:
+    # Недоступний пристрій не опитуємо: це лише таймаути та повторні спроби
+    if not device["alive"]:
         return {
             "device_ip": device_ip,
             "device_name": device["name"],
             "device_status": False,
             "interfaces": None,
             "system_info": None,
+            "metrics": None,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
 
+    # Ініціалізація комутатора з параметрами SNMP з інвентаря
+    switch = snmp_client(
+        next(
+            (d for d in DEVICES_IP_MAP if d["ip"] == device_ip),
+            {"ip": device_ip},
+        )
+    )
+    if not switch:
+        return {}
+
+    # Свіжі лічильники від монітора (POLL_INTERFACES) не опитуємо повторно
+    device_ifaces = fleet_state.get(device_ip)
+    fresh = (
+        device_ifaces is not None
+        and datetime.now().timestamp() - device_ifaces.polled_at
+        <= 2 * MONITOR_INTERVAL
+    )
+    stats, system_info, metrics = {}, None, {}
+    with deadline(REQUEST_DEADLINE) as budget:
+        try:
+            if fresh:
+                stats = device_ifaces.to_dict()
+                system_info = await switch.get_system_info()
+            else:
+                # Отримання статистики комутатора
+                stats, system_info = await asyncio.gather(
+                    switch.get_interfaces_stats(), switch.get_system_info()
+                )
+            # Додаткові метрики профілю пристрою (PoE, температура, оптика)
+            metrics = (
+                await switch.collect_profile(system_info)
+                if system_info
+                else {}
+            )
+        except CircuitOpenError as e:
+            # Пінг є, але SNMP не відповідає — віддаємо що є без очікування
+            logger.warning(str(e))
+            stats, system_info, metrics = {}, None, {}
+        except DeadlineExceeded as e:
+            # Не вклались у бюджет: віддаємо отримане, решту — з кешу монітора
+            logger.warning("Дедлайн запиту до %s: %s", device_ip, e)
+            budget.exhausted = True
+
+    # Не вклались у бюджет або SNMP недоступний — останні відомі лічильники
+    stale = not stats and device_ifaces is not None
+    if stale:
+        stats = device_ifaces.to_dict()
+    if system_info:
+        device_info[device_ip] = system_info
+    else:
+        system_info = device_info.get(device_ip)
+
+    return {
+        "device_ip": device_ip,
+        "device_name": device["name"],
+        "device_status": device["alive"],
+        "interfaces": stats or None,
+        "system_info": system_info,
+        "metrics": metrics or None,
+        "snmp_state": switch.breaker.state,
+        "partial": budget.exhausted,
+        "stale": stale,
+        "polled_at": device_ifaces.polled_at if stale else None,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def with_deadline(view):
+    """Обмежує весь обробник бюджетом REQUEST_DEADLINE"""
+
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        with deadline(REQUEST_DEADLINE):
+            return await view(*args, **kwargs)
+
+    return wrapper
+
 
 @app.route("/")
 async def index():
@@ -115,7 +239,9 @@ async def index():
             "network_monitor/index.html",
             devices=data["devices"],
             online_count=data["online_count"],
+            degraded_count=data["degraded_count"],
             offline_count=data["offline_count"],
+            unreachable_count=data["unreachable_count"],
             total_count=data["total_count"],
             timestamp=data["timestamp"],
         )
@@ -146,48 +272,39 @@ async def device_detail(device_ip: str):
     )
 
 
+async def provisioning_view() -> Dict[str, Any]:
+    """
+    Стан provisioning: зі знімка або з локального кешу, якщо він свіжіший
+    (зміна чи звірка через цей воркер). Роутер читається лише тоді, коли
+    стану немає ні там, ні там.
+    """
+    published = current_snapshot().sections.get("provisioning")
+    if not published and not provisioning_state.loaded:
+        await provisioning_state.refresh()
+    if provisioning_state.loaded and (
+        not published
+        or provisioning_state.updated_at > published["updated_at"]
+    ):
+        return provisioning_state.view()
+    return published
+
+
 @app.route("/ros-control")
+@with_deadline
 async def ros_control_page():
     """Сторінка управління RouterOS Provisioning"""
     try:
-        router = ros_api.Api(*env.list("ROOT_ROUTER"))
-        # Перевіряємо поточний стан для обох інтерфейсів
-        current_provision = router.talk("/interface/wifi/provisioning/print")
-        curent_config = router.talk("/interface/wifi/configuration/print")
-
-        # Визначаємо чи увімкнено provisioning для кожного інтерфейсу
-        interface_0_enabled = False
-        interface_1_enabled = False
-        interface_0_config = ""
-        interface_1_config = ""
-
-        if current_provision:
-            for item in curent_config:
-                if item.get("name") in [
-                    "cfg-2ghz-N_student",
-                    "cfg-5ghz-AC_student",
-                ]:
-                    ssid = item.get("ssid")
-                    break
-            for item in current_provision:
-                if item.get("master-configuration") == "cfg-2ghz-N_staff":
-                    interface_0_config = item.get("slave-configurations", "")
-                    interface_0_enabled = bool(interface_0_config)
-                elif item.get("master-configuration") == "cfg-5ghz-AC_staff":
-                    interface_1_config = item.get("slave-configurations", "")
-                    interface_1_enabled = bool(interface_1_config)
-
-        # Загальний статус - обидва інтерфейси повинні бути увімкнені
-        is_enabled = interface_0_enabled and interface_1_enabled
+        state = await provisioning_view()
+        interfaces = state["interfaces"]
 
         return render_template(
             "network_monitor/ros_control.html",
-            is_enabled=is_enabled,
-            ssid=ssid,
-            interface_0_enabled=interface_0_enabled,
-            interface_1_enabled=interface_1_enabled,
-            interface_0_config=interface_0_config,
-            interface_1_config=interface_1_config,
+            is_enabled=state["is_enabled"],
+            ssid=state["ssid"],
+            interface_0_enabled=interfaces["interface_0"]["enabled"],
+            interface_1_enabled=interfaces["interface_1"]["enabled"],
+            interface_0_config=interfaces["interface_0"]["config"],
+            interface_1_config=interfaces["interface_1"]["config"],
             timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         )
 
@@ -212,8 +329,8 @@ async def ros_control_page():
 async def api_devices():
     """API endpoint для отримання списку пристроїв (для AJAX)"""
     try:
-        data = await get_list_devices_data()
-        return jsonify(data)
+        # JSON серіалізовано один раз при публікації знімка
+        return Response(current_snapshot().json, mimetype="application/json")
     except Exception as e:
         logger.error("Помилка при отриманні даних: %s", str(e))
         return (
@@ -222,7 +339,9 @@ async def api_devices():
                     "error": str(e),
                     "devices": [],
                     "online_count": 0,
+                    "degraded_count": 0,
                     "offline_count": 0,
+                    "unreachable_count": 0,
                     "total_count": 0,
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 }
@@ -246,6 +365,82 @@ async def api_device_detail(device_ip: str):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/device/<device_ip>/interfaces")
+async def api_device_interfaces(device_ip: str):
+    """
+    Інтерфейси пристрою посторінково (?offset=0&limit=100).
+
+    Для шасі з тисячами портів: віддається лише зріз компактного стану.
+    Свіжі лічильники монітора використовуються як є; інакше пристрій
+    опитується один раз, і наступні сторінки беруться з того ж стану.
+    """
+    device = current_snapshot().by_ip.get(device_ip)
+    if not device:
+        return (
+            jsonify({"error": f"Пристрій з IP {device_ip} не знайдено"}),
+            404,
+        )
+    offset = max(request.args.get("offset", default=0, type=int), 0)
+    limit = min(
+        max(
+            request.args.get("limit", default=INTERFACES_PAGE_SIZE, type=int),
+            1,
+        ),
+        INTERFACES_PAGE_MAX,
+    )
+
+    device_ifaces = fleet_state.get(device_ip)
+    fresh = (
+        device_ifaces is not None
+        and datetime.now().timestamp() - device_ifaces.polled_at
+        <= 2 * MONITOR_INTERVAL
+    )
+    if not fresh and device["alive"]:
+        switch = snmp_client(
+            next(
+                (d for d in DEVICES_IP_MAP if d["ip"] == device_ip),
+                {"ip": device_ip},
+            )
+        )
+        try:
+            with deadline(REQUEST_DEADLINE):
+                indexes, columns = await switch.get_interfaces_columns()
+            if indexes:
+                device_ifaces = fleet_state.update(
+                    device_ip,
+                    indexes,
+                    columns,
+                    int(datetime.now().timestamp()),
+                )
+                fresh = True
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            logger.warning("Інтерфейси %s: %s", device_ip, e)
+
+    if device_ifaces is None:
+        return jsonify(
+            {
+                "device_ip": device_ip,
+                "total": 0,
+                "offset": offset,
+                "limit": limit,
+                "interfaces": [],
+                "stale": False,
+                "polled_at": None,
+            }
+        )
+    return jsonify(
+        {
+            "device_ip": device_ip,
+            "total": len(device_ifaces),
+            "offset": offset,
+            "limit": limit,
+            "interfaces": device_ifaces.page(offset, limit),
+            "stale": not fresh,
+            "polled_at": device_ifaces.polled_at,
+        }
+    )
+
+
 @app.route("/api/devices/all", methods=["GET"])
 async def get_devices_stats():
     """
@@ -260,7 +455,7 @@ async def get_devices_stats():
         device_ip = DEVICES_IP_MAP[0]["ip"]
         if not device_ip:
             return (
-                jsonify({"error": f"Пристрій не знайдено."}),
+                jsonify({"error": "Пристрій не знайдено."}),
                 404,
             )
 
@@ -268,7 +463,7 @@ async def get_devices_stats():
         switch = AsyncSwitchSNMP(device_ip)
 
         multi_results = await switch.get_multiple_switches_stats(
-            DEVICES_IP_MAP
+            DEVICES_IP_MAP, client=snmp_client
         )
 
         # Повернення даних у форматі JSON
@@ -281,114 +476,126 @@ async def get_devices_stats():
         return jsonify({"error": f"Внутрішня помилка сервера: {str(e)}"}), 500
 
 
-@app.route("/api/ros/provisioning/enable", methods=["POST"])
-async def enable_provisioning():
-    """API для вмикання WiFi Provisioning"""
-    try:
-        router = ros_api.Api(*env.list("ROOT_ROUTER"))
-        # Вмикаємо provisioning для обох інтерфейсів
-        result1 = router.talk(
-            "/interface/wifi/provisioning/set\n=numbers=0\n=slave-configurations=cfg-2ghz-N_student"
-        )
-        result2 = router.talk(
-            "/interface/wifi/provisioning/set\n=numbers=1\n=slave-configurations=cfg-5ghz-AC_student"
-        )
+def _provisioning_message(enable: bool, summary: Dict[str, Any]) -> str:
+    action = "увімкнено" if enable else "вимкнено"
+    if (
+        not summary["changed_rules"]
+        and not summary["provisioned"]
+        and not summary["failed"]
+    ):
+        return f"WiFi Provisioning вже {action}, змін не потрібно"
+    message = (
+        f"WiFi Provisioning {action}: CAP оновлено {summary['provisioned']}, "
+        f"без змін {summary['unchanged_caps']}"
+    )
+    if summary["failed"]:
+        message += f", з помилками {len(summary['failed'])}"
+    return message
 
-        # Список всіх Remote Cap інтерфейсів
-        remote_cap_interfaces = router.talk(
-            "/interface/wifi/capsman/remote-cap/print"
-        )
 
-        # Виконуємо provision-all для Remote Cap
-        for interface in remote_cap_interfaces:
-            if id_iface := interface.get(".id"):
-                router.talk(
-                    f"/interface/wifi/capsman/remote-cap/provision\n=.id={id_iface}"
-                )
+def _provisioning_result(
+    enable: bool, summary: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        **summary,
+        "message": _provisioning_message(enable, summary),
+        "status": (
+            ("enabled" if enable else "disabled")
+            if summary["success"]
+            else "partial"
+        ),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
 
-        logger.info(
-            "WiFi Provisioning увімкнено для обох інтерфейсів та виконано provision-all"
-        )
 
-        return jsonify(
-            {
-                "success": True,
-                "message": "WiFi Provisioning успішно увімкнено для обох інтерфейсів",
-                "status": "enabled",
-                "details": {
-                    "interface_0": "cfg-2ghz-N_student",
-                    "interface_1": "cfg-5ghz-AC_student",
-                    "provision_all": "executed",
-                },
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            }
-        )
+def _stream_provisioning(enable: bool) -> Response:
+    """
+    Виконує provisioning у фоновому потоці та передає прогрес як NDJSON:
+    подія plan, по одній події rule/cap на кожен крок і підсумкова done.
+    """
+    engine = ProvisioningEngine(
+        env.list("ROOT_ROUTER"), PROVISION_CONCURRENCY, provisioning_state
+    )
+    events: queue.Queue = queue.Queue()
 
-    except Exception as e:
-        logger.error("Помилка при вмиканні provisioning: %s", str(e))
-        return (
-            jsonify(
+    async def apply():
+        with deadline(PROVISION_DEADLINE):
+            return await engine.apply(desired_state(enable), events.put)
+
+    def run():
+        try:
+            summary = asyncio.run(apply())
+            events.put(
+                {"event": "done", **_provisioning_result(enable, summary)}
+            )
+        except Exception as e:
+            logger.error("Помилка provisioning: %s", str(e))
+            events.put(
                 {
+                    "event": "done",
                     "success": False,
-                    "message": f"Помилка при вмиканні: {str(e)}",
                     "status": "error",
+                    "message": f"Помилка provisioning: {str(e)}",
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 }
-            ),
-            500,
-        )
+            )
+        finally:
+            events.put(None)
 
+    threading.Thread(target=run, name="provisioning", daemon=True).start()
 
-@app.route("/api/ros/provisioning/disable", methods=["POST"])
-async def disable_provisioning():
-    """API для вимикання WiFi Provisioning"""
-    try:
-        router = ros_api.Api(*env.list("ROOT_ROUTER"))
-        # Вимикаємо provisioning для обох інтерфейсів
-        result1 = router.talk(
-            "/interface/wifi/provisioning/set\n=numbers=0\n=slave-configurations="
-        )
-        result2 = router.talk(
-            "/interface/wifi/provisioning/set\n=numbers=1\n=slave-configurations="
-        )
+    def generate():
+        while (event := events.get()) is not None:
+            yield json.dumps(event, ensure_ascii=False) + "\n"
 
-        # Список всіх Remote Cap інтерфейсів
-        remote_cap_interfaces = router.talk(
-            "/interface/wifi/capsman/remote-cap/print"
-        )
+    return Response(generate(), mimetype="application/x-ndjson")
 
-        # Виконуємо provision-all для Remote Cap
-        for interface in remote_cap_interfaces:
-            if id_iface := interface.get(".id"):
-                router.talk(
-                    f"/interface/wifi/capsman/remote-cap/provision\n=.id={id_iface}"
-                )
 
-        logger.info(
-            "WiFi Provisioning вимкнено для обох інтерфейсів та виконано provision-all"
-        )
+async def _apply_provisioning(enable: bool):
+    """
+    Спільна логіка вмикання/вимикання: читає стан роутера один раз,
+    змінює лише відмінні правила й виконує provision лише потрібних CAP.
 
-        return jsonify(
-            {
-                "success": True,
-                "message": "WiFi Provisioning успішно вимкнено для обох інтерфейсів",
-                "status": "disabled",
-                "details": {
-                    "interface_0": "disabled",
-                    "interface_1": "disabled",
-                    "provision_all": "executed",
-                },
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            }
-        )
+    З ?stream=1 відповідає потоком NDJSON з прогресом кожного CAP.
+    """
+    if request.args.get("stream"):
+        return _stream_provisioning(enable)
 
+    action = "вмикання" if enable else "вимикання"
+    try:
+        engine = ProvisioningEngine(
+            env.list("ROOT_ROUTER"), PROVISION_CONCURRENCY, provisioning_state
+        )
+        with deadline(REQUEST_DEADLINE) as budget:
+            summary = await engine.apply(desired_state(enable))
+        result = _provisioning_result(enable, summary)
+        if budget.exhausted:
+            return jsonify(result), 504
+        return jsonify(result)
+
+    except (DeadlineExceeded, TimeoutError) as e:
+        logger.error("Час %s provisioning вичерпано: %s", action, str(e))
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "message": (
+                        "Роутер не відповів вчасно, "
+                        "зміни могли бути застосовані частково"
+                    ),
+                    "status": "partial",
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                }
+            ),
+            504,
+        )
     except Exception as e:
-        logger.error("Помилка при вимиканні provisioning: %s", str(e))
+        logger.error("Помилка при %s provisioning: %s", action, str(e))
         return (
             jsonify(
                 {
                     "success": False,
-                    "message": f"Помилка при вимиканні: {str(e)}",
+                    "message": f"Помилка при {action}: {str(e)}",
                     "status": "error",
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 }
@@ -397,48 +604,51 @@ async def disable_provisioning():
         )
 
 
+@app.route("/api/ros/provisioning/enable", methods=["POST"])
+async def enable_provisioning():
+    """API для вмикання WiFi Provisioning"""
+    return await _apply_provisioning(True)
+
+
+@app.route("/api/ros/provisioning/disable", methods=["POST"])
+async def disable_provisioning():
+    """API для вимикання WiFi Provisioning"""
+    return await _apply_provisioning(False)
+
+
 @app.route("/api/ros/provisioning/status", methods=["GET"])
+@with_deadline
 async def get_provisioning_status():
-    """API для отримання поточного стану provisioning"""
-    try:
-        router = ros_api.Api(*env.list("ROOT_ROUTER"))
-        # Отримуємо поточну конфігурацію
-        current_config = router.talk("/interface/wifi/provisioning/print")
-
-        interface_0_enabled = False
-        interface_1_enabled = False
-        interface_0_config = ""
-        interface_1_config = ""
-        config_details = []
-
-        if current_config:
-            for item in current_config:
-                config_details.append(item)
-                if item.get("master-configuration") == "cfg-2ghz-N_staff":
-                    interface_0_config = item.get("slave-configurations", "")
-                    interface_0_enabled = bool(interface_0_config)
-                elif item.get("master-configuration") == "cfg-5ghz-AC_staff":
-                    interface_1_config = item.get("slave-configurations", "")
-                    interface_1_enabled = bool(interface_1_config)
-
-        # Загальний статус
-        is_enabled = interface_0_enabled and interface_1_enabled
+    """
+    API для отримання поточного стану provisioning.
 
+    Відповідає з кешу; ?refresh=1 примусово звіряє кеш з роутером.
+    """
+    try:
+        if request.args.get("refresh"):
+            await provisioning_state.refresh()
+        state = await provisioning_view()
+
+        interfaces = {
+            name: {
+                "enabled": interface["enabled"],
+                "config": interface["config"] or "disabled",
+            }
+            for name, interface in state["interfaces"].items()
+        }
         return jsonify(
             {
                 "success": True,
-                "is_enabled": is_enabled,
-                "interfaces": {
-                    "interface_0": {
-                        "enabled": interface_0_enabled,
-                        "config": interface_0_config or "disabled",
-                    },
-                    "interface_1": {
-                        "enabled": interface_1_enabled,
-                        "config": interface_1_config or "disabled",
-                    },
-                },
-                "config_details": config_details,
+                "is_enabled": state["is_enabled"],
+                "interfaces": interfaces,
+                "config_details": state["config_details"],
+                "updated_at": (
+                    datetime.fromtimestamp(state["updated_at"]).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    )
+                    if state["updated_at"]
+                    else None
+                ),
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             }
         )
@@ -458,104 +668,191 @@ async def get_provisioning_status():
 
 
 # Функція для збору API даних з MikroTik
-async def get_mikrotik_data(device_ip: str) -> Dict[str, Any]:
+# Проекція та фільтри виконуються на роутері: передаються лише потрібні
+# дашборду колонки та рядки (наприклад, лише активні оренди DHCP)
+MIKROTIK_QUERIES = (
+    (
+        "system_resource",
+        routeros.Query("/system/resource").select(
+            "uptime", "version", "cpu-load", "total-memory", "free-memory"
+        ),
+    ),
+    ("routerboard", routeros.Query("/system/routerboard").select("model")),
+    (
+        "health",
+        routeros.Query("/system/health")
+        .select("name", "value")
+        .where(name="temperature"),
+    ),
+    (
+        "interfaces",
+        routeros.Query("/interface").select(
+            "name",
+            "type",
+            "comment",
+            "mac-address",
+            "running",
+            "disabled",
+            "rx-byte",
+            "tx-byte",
+        ),
+    ),
+    (
+        "dhcp_leases",
+        routeros.Query("/ip/dhcp-server/lease")
+        .select(
+            "address",
+            "mac-address",
+            "host-name",
+            "status",
+            "expires-after",
+            "comment",
+        )
+        .where(status="bound"),
+    ),
+    (
+        "caps",
+        routeros.Query("/caps-man/remote-cap").select(
+            "identity", "base-mac", "board", "state", "version"
+        ),
+    ),
+    (
+        "caps2",
+        routeros.Query("/interface/wifi/capsman/remote-cap").select(
+            "identity", "base-mac", "board-name", "state", "version", "uptime"
+        ),
+    ),
+)
+
+
+def format_mikrotik_data(results: Dict[str, list]) -> Dict[str, Any]:
+    """Формує відповідь дашборду з відповідей print (опитування або підписки)"""
+    system_resource = results.get("system_resource")
+    routerboard = results.get("routerboard")
+    health = results.get("health")
+
+    return {
+        "status": True,
+        "partial": False,
+        "missing": [key for key, _ in MIKROTIK_QUERIES if key not in results],
+        "system": {
+            "uptime": (
+                system_resource[0].get("uptime") if system_resource else None
+            ),
+            "version": (
+                system_resource[0].get("version") if system_resource else None
+            ),
+            "cpu_load": (
+                system_resource[0].get("cpu-load") if system_resource else None
+            ),
+            "total_memory": (
+                system_resource[0].get("total-memory")
+                if system_resource
+                else 0
+            ),
+            "free_memory": (
+                system_resource[0].get("free-memory") if system_resource else 0
+            ),
+            "model": routerboard[0].get("model") if routerboard else None,
+            "temperature": (
+                next(
+                    (
+                        item.get("value")
+                        for item in health
+                        if item.get("name") == "temperature"
+                    ),
+                    None,
+                )
+                if health
+                else None
+            ),
+        },
+        "interfaces": results.get("interfaces", []),
+        "dhcp_leases": results.get("dhcp_leases", []),
+        "caps": results.get("caps", []),
+        "caps2": results.get("caps2", []),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+async def get_mikrotik_data(
+    device_ip: str, user: Optional[str] = None, password: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    Збирає комплексну інформацію з роутера MikroTik,
-    виконуючи запити послідовно для стабільності.
+    Збирає комплексну інформацію з роутера MikroTik.
+
+    Якщо увімкнено ROS_SUBSCRIPTIONS, дані беруться зі знімка: модель
+    наповнюють потокові підписки процесу моніторингу (один сеанс на роутер).
+    Поки модель синхронізується, роутер опитується послідовними print.
+
+    Якщо бюджет запиту (REQUEST_DEADLINE) вичерпано, повертає вже зібрані
+    розділи з ознакою partial замість очікування решти.
+
+    Облікові дані, якщо їх не передано, беруться з інвентаря (поле
+    "routeros"), інакше — з ROOT_ROUTER.
     """
+    api = None
     try:
-        env = Env()
-        env.read_env()
-        _, user, password = env.list("ROOT_ROUTER", [])
-
-        loop = asyncio.get_running_loop()
-        api = await loop.run_in_executor(
-            None, partial(ros_api.Api, device_ip, user=user, password=password)
-        )
+        if user is None:
+            device = next(
+                (d for d in DEVICES_IP_MAP if d["ip"] == device_ip),
+                {"ip": device_ip},
+            )
+            credentials = router_credentials(device) or router_credentials(
+                {**device, "routeros": True}
+            )
+            if credentials is None:
+                raise ValueError(
+                    f"Облікові дані RouterOS для {device_ip} не задано"
+                )
+            user, password = credentials
 
-        # --- Виконуємо запити послідовно, а не паралельно ---
-        system_resource = await loop.run_in_executor(
-            None, api.talk, "/system/resource/print"
-        )
-        routerboard = await loop.run_in_executor(
-            None, api.talk, "/system/routerboard/print"
-        )
-        health = await loop.run_in_executor(
-            None, api.talk, "/system/health/print"
-        )
-        interfaces = await loop.run_in_executor(
-            None, api.talk, "/interface/print"
-        )
-        dhcp_leases = await loop.run_in_executor(
-            None, api.talk, "/ip/dhcp-server/lease/print"
-        )
-        caps = await loop.run_in_executor(
-            None, api.talk, "/caps-man/remote-cap/print"
-        )
-        caps2 = await loop.run_in_executor(
-            None, api.talk, "/interface/wifi/capsman/remote-cap/print"
-        )
-        # ---------------------------------------------------------
-
-        # Форматуємо дані (ця частина залишається без змін)
-        data = {
-            "status": True,
-            "system": {
-                "uptime": (
-                    system_resource[0].get("uptime")
-                    if system_resource
-                    else None
-                ),
-                "version": (
-                    system_resource[0].get("version")
-                    if system_resource
-                    else None
-                ),
-                "cpu_load": (
-                    system_resource[0].get("cpu-load")
-                    if system_resource
-                    else None
-                ),
-                "total_memory": (
-                    system_resource[0].get("total-memory")
-                    if system_resource
-                    else 0
-                ),
-                "free_memory": (
-                    system_resource[0].get("free-memory")
-                    if system_resource
-                    else 0
-                ),
-                "model": routerboard[0].get("model") if routerboard else None,
-                "temperature": (
-                    next(
-                        (
-                            item.get("value")
-                            for item in health
-                            if item.get("name") == "temperature"
-                        ),
-                        None,
+        if ROS_SUBSCRIPTIONS:
+            # Моделі підписок тримає процес моніторингу і публікує у знімку
+            live = (
+                current_snapshot().sections.get("routeros", {}).get(device_ip)
+            )
+            if live is not None:
+                data = format_mikrotik_data(live["results"])
+                data["live"] = True
+                # Після розриву віддаються останні дані до пересинхронізації
+                data["stale"] = not live["connected"]
+                data["updated_at"] = (
+                    datetime.fromtimestamp(live["updated_at"]).strftime(
+                        "%Y-%m-%d %H:%M:%S"
                     )
-                    if health
+                    if live["updated_at"]
                     else None
-                ),
-            },
-            "interfaces": interfaces,
-            "dhcp_leases": (
-                [
-                    lease
-                    for lease in dhcp_leases
-                    if lease.get("status") == "bound"
-                ]
-                if dhcp_leases
-                else []
-            ),
-            "caps": caps,
-            "caps2": caps2,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
+                )
+                return data
+
+        with deadline(REQUEST_DEADLINE):
+            api = await routeros.connect_async(device_ip, user, password)
+
+            # --- Виконуємо запити послідовно, а не паралельно ---
+            results = {}
+            partial = False
+            for key, command in MIKROTIK_QUERIES:
+                try:
+                    results[key] = await routeros.talk_async(api, command)
+                except (DeadlineExceeded, TimeoutError) as e:
+                    # Після таймауту з'єднання непридатне — решту пропускаємо
+                    logger.warning(
+                        "MikroTik %s: запит %s перервано (%s), дані неповні",
+                        device_ip,
+                        command.path,
+                        e,
+                    )
+                    partial = True
+                    break
+            # ---------------------------------------------------------
+
+        data = format_mikrotik_data(results)
+        data["partial"] = partial
         return data
 
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        return {"status": False, "error": str(e)}
     except Exception as e:
         # Цей блок також ловитиме помилки, якщо якийсь із запитів не вдасться
         # Наприклад, якщо /caps-man/ не існує на пристрої
@@ -564,6 +861,9 @@ async def get_mikrotik_data(device_ip: str) -> Dict[str, Any]:
             exc_info=True,
         )
         return {"status": False, "error": str(e)}
+    finally:
+        if api is not None:
+            api.close()
 
 
 # Нова сторінка для дашборду MikroTik
@@ -608,6 +908,225 @@ async def api_mikrotik_data(device_ip: str):
     return jsonify(data)
 
 
+@app.route("/api/ros/fleet")
+@with_deadline
+async def api_ros_fleet():
+    """
+    Зведення по всіх роутерах RouterOS інвентаря: CPU, пам'ять,
+    температура, інтерфейси та CAP. Роутери опитуються паралельно.
+    """
+    routers = await collect_fleet(
+        ros_devices(DEVICES_IP_MAP), get_mikrotik_data, ROS_FLEET_CONCURRENCY
+    )
+    return jsonify(
+        {
+            "routers": routers,
+            "totals": fleet_totals(routers),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    )
+
+
+@app.route("/api/sla")
+async def api_sla():
+    """Доступність (SLA) флоту та кожного пристрою за 24h/7d/30d"""
+    try:
+        devices = current_snapshot().devices
+        return jsonify(
+            {
+                "fleet": fleet_sla(devices),
+                "devices": [
+                    {
+                        "ip": device["ip"],
+                        "name": device["name"],
+                        "alive": device["alive"],
+                        "availability": device.get("availability"),
+                    }
+                    for device in devices
+                ],
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+    except Exception as e:
+        logger.error("Помилка обчислення SLA: %s", str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/analytics")
+async def api_analytics():
+    """Швидкості, завантаження та аномалії помилок портів флоту за останній цикл"""
+    snapshot = current_snapshot()
+    analytics = snapshot.sections.get("analytics")
+    if analytics is None:
+        return (
+            jsonify(
+                {
+                    "error": "Аналітика недоступна (не увімкнено POLL_INTERFACES)"
+                }
+            ),
+            404,
+        )
+
+    device_ip = request.args.get("ip")
+    flagged = analytics.get("flagged", [])
+    if device_ip:
+        flagged = [row for row in flagged if row["ip"] == device_ip]
+
+    return jsonify(
+        {
+            **analytics,
+            "flagged": flagged,
+            "devices": {
+                device["ip"]: device.get("traffic")
+                for device in snapshot.devices
+                if not device_ip or device["ip"] == device_ip
+            },
+            "timestamp": snapshot.timestamp,
+        }
+    )
+
+
+@app.route("/api/top")
+async def api_top():
+    """Найнавантаженіші порти флоту за метрикою (?metric=in_bps&n=20)"""
+    snapshot = current_snapshot()
+    top = snapshot.sections.get("top")
+    if top is None:
+        return (
+            jsonify(
+                {"error": "Рейтинг недоступний (не увімкнено POLL_INTERFACES)"}
+            ),
+            404,
+        )
+
+    metric = request.args.get("metric", "in_bps")
+    if metric not in METRICS:
+        return (
+            jsonify(
+                {
+                    "error": f"Невідома метрика {metric}",
+                    "metrics": list(METRICS),
+                }
+            ),
+            400,
+        )
+    n = min(max(request.args.get("n", default=20, type=int), 1), TOP_PUBLISHED)
+
+    # Рейтинг уже відсортований колектором — лише зріз і назви пристроїв
+    ports = [
+        {
+            **row,
+            "device": snapshot.by_ip.get(row["ip"], {}).get("name", row["ip"]),
+        }
+        for row in top.get(metric, [])[:n]
+    ]
+    return jsonify(
+        {"metric": metric, "ports": ports, "timestamp": snapshot.timestamp}
+    )
+
+
+def _history_range() -> tuple:
+    """Часовий діапазон запиту історії (epoch, секунди), за замовчуванням 24 год"""
+    now = int(datetime.now().timestamp())
+    end = request.args.get("end", default=now + 1, type=int)
+    start = request.args.get("start", default=end - 86400, type=int)
+    return start, end
+
+
+def _with_timestamps(rows: list, time_field: str = "ts") -> list:
+    """Додає до рядків історії людиночитаний час"""
+    for row in rows:
+        row["timestamp"] = datetime.fromtimestamp(row[time_field]).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+    return rows
+
+
+def _history_unavailable():
+    return (
+        jsonify({"error": "Історію вимкнено (не задано HISTORY_DB_PATH)"}),
+        404,
+    )
+
+
+@app.route("/api/history/<device_ip>/pings")
+async def api_history_pings(device_ip: str):
+    """Історія результатів пінгу пристрою за період"""
+    if history_store is None:
+        return _history_unavailable()
+    try:
+        start, end = _history_range()
+        limit = request.args.get("limit", default=5000, type=int)
+        rows = history_store.ping_history(device_ip, start, end, limit)
+        return jsonify(
+            {"device_ip": device_ip, "pings": _with_timestamps(rows)}
+        )
+    except Exception as e:
+        logger.error("Помилка читання історії: %s", str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/history/<device_ip>/transitions")
+async def api_history_transitions(device_ip: str):
+    """Зміни стану ONLINE/OFFLINE пристрою за період"""
+    if history_store is None:
+        return _history_unavailable()
+    try:
+        start, end = _history_range()
+        rows = history_store.transitions(device_ip, start, end)
+        return jsonify(
+            {"device_ip": device_ip, "transitions": _with_timestamps(rows)}
+        )
+    except Exception as e:
+        logger.error("Помилка читання історії: %s", str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/history/<device_ip>/interfaces")
+async def api_history_interfaces(device_ip: str):
+    """Лічильники інтерфейсів пристрою за період (опційно — один ifIndex)"""
+    if history_store is None:
+        return _history_unavailable()
+    try:
+        start, end = _history_range()
+        if_index = request.args.get("if_index", type=int)
+        limit = request.args.get("limit", default=5000, type=int)
+        rows = history_store.interface_history(
+            device_ip, start, end, if_index, limit
+        )
+        return jsonify(
+            {"device_ip": device_ip, "interfaces": _with_timestamps(rows)}
+        )
+    except Exception as e:
+        logger.error("Помилка читання історії: %s", str(e))
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/history/<device_ip>/rollups")
+async def api_history_rollups(device_ip: str):
+    """Годинні агрегати доступності та трафіку пристрою"""
+    if history_store is None:
+        return _history_unavailable()
+    try:
+        start, end = _history_range()
+        pings = history_store.ping_rollups(device_ip, start, end)
+        for row in pings:
+            row["availability"] = round(
+                100.0 * row["up_samples"] / row["samples"], 2
+            )
+        interfaces = history_store.interface_rollups(device_ip, start, end)
+        return jsonify(
+            {
+                "device_ip": device_ip,
+                "pings": _with_timestamps(pings, "period_ts"),
+                "interfaces": _with_timestamps(interfaces, "period_ts"),
+            }
+        )
+    except Exception as e:
+        logger.error("Помилка читання історії: %s", str(e))
+        return jsonify({"error": str(e)}), 500
+
+
 @app.errorhandler(404)
 def not_found(error):
     return (
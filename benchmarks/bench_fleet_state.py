@@ -0,0 +1,125 @@
+"""
+Порівняння пам'яті: словники InterfaceStats проти компактного FleetState.
+
+Імітує флот із --devices комутаторів по --ports портів і вимірює
+через tracemalloc, скільки пам'яті займає стан одного циклу опитування.
+
+Запуск:
+    python -m benchmarks.bench_fleet_state --devices 5000 --ports 48
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from monitor.fleet_state import FleetState
+from protocols.snmp import AsyncSwitchSNMP, InterfaceStats
+
+
+def make_columns(ports: int, rnd: random.Random):
+    """Сирі колонки SNMP одного комутатора, як їх повертає snmpbulkwalk"""
+    indexes = list(range(1, ports + 1))
+    columns = {
+        "name": {i: f"GigabitEthernet0/{i}" for i in indexes},
+        "alias": {i: ("uplink" if i == ports else "") for i in indexes},
+        "speed": {i: "1000000000" for i in indexes},
+        "oper_status": {i: str(rnd.choice((1, 2))) for i in indexes},
+        "admin_status": {i: "1" for i in indexes},
+    }
+    for name in (
+        "in_octets",
+        "out_octets",
+        "in_pkts",
+        "out_pkts",
+        "in_errors",
+        "out_errors",
+    ):
+        columns[name] = {i: str(rnd.getrandbits(32)) for i in indexes}
+    return indexes, columns
+
+
+def build_dataclasses(fleet):
+    """Поточне представлення: {ip: {index: InterfaceStats}} + рядки статусу"""
+    interfaces, status = {}, {}
+    for ip, (indexes, columns) in fleet.items():
+        interfaces[ip] = {
+            index: InterfaceStats(
+                index=index,
+                **{
+                    name: (
+                        data.get(index, "")
+                        if name in ("name", "alias")
+                        else AsyncSwitchSNMP._safe_int(data.get(index))
+                    )
+                    for name, data in columns.items()
+                },
+            )
+            for index in indexes
+        }
+        status[ip] = {
+            "ip": ip,
+            "alive": True,
+            "status": "🟢 " + "ONLINE",  # новий рядок на кожен пристрій
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+    return interfaces, status
+
+
+def build_fleet_state(fleet):
+    """Компактне представлення: FleetState + epoch-час і спільні рядки"""
+    state, status = FleetState(), {}
+    now = int(time.time())
+    for ip, (indexes, columns) in fleet.items():
+        state.update(ip, indexes, columns, now)
+        status[ip] = {
+            "ip": ip,
+            "alive": True,
+            "status": "🟢 ONLINE",
+            "checked_at": now,
+        }
+    return state, status
+
+
+def measure(builder, fleet):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = builder(fleet)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--ports", type=int, default=48)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    fleet = {
+        f"10.{i // 65536}.{i // 256 % 256}.{i % 256}": make_columns(
+            args.ports, rnd
+        )
+        for i in range(args.devices)
+    }
+
+    print(f"Флот: {args.devices} пристроїв × {args.ports} портів")
+    results = {
+        "InterfaceStats (dataclass)": measure(build_dataclasses, fleet),
+        "FleetState (struct-of-arrays)": measure(build_fleet_state, fleet),
+    }
+    baseline = results["InterfaceStats (dataclass)"][0]
+    for name, (memory, elapsed) in results.items():
+        print(
+            f"{name:32s} {memory / 1024 / 1024:9.1f} MB"
+            f"  ({memory / baseline:5.1%})  {elapsed:6.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Вартість оновлення рейтингу TopTalkers за цикл на масштабі флоту.
+
+Метрики циклу генеруються випадково (кожен порт змінюється щоциклу —
+найгірший випадок для інкрементного індексу). Завершується з кодом 1,
+якщо медіанне оновлення перевищує --budget-ms на кожну метрику рейтингу.
+
+Запуск:
+    python -m benchmarks.bench_topn --devices 5000 --ports 48 --budget-ms 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from monitor.analytics import CycleMetrics
+from monitor.topn import TopTalkers
+
+
+def make_cycle(
+    devices: int, ports: int, rng: np.random.Generator
+) -> CycleMetrics:
+    """Метрики одного циклу: швидкості до 1 Гбіт/с, помилки на 1% портів"""
+    size = devices * ports
+    in_bps = rng.uniform(0, 1e9, size)
+    out_bps = rng.uniform(0, 1e9, size)
+    errors = np.where(rng.random(size) < 0.01, rng.uniform(0, 50, size), 0.0)
+    error_rate = errors / 1e5
+    return CycleMetrics(
+        ips=tuple(
+            f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"
+            for i in range(devices)
+        ),
+        device_ids=np.repeat(np.arange(devices), ports),
+        if_indexes=np.tile(np.arange(1, ports + 1, dtype=np.uint32), devices),
+        in_bps=in_bps,
+        out_bps=out_bps,
+        utilization=np.fmax(in_bps, out_bps) / 1e7,
+        error_rate=error_rate,
+        error_z=(error_rate - error_rate.mean()) / error_rate.std(),
+        saturated=np.fmax(in_bps, out_bps) >= 9e8,
+        in_errors_ps=errors,
+        out_errors_ps=np.zeros(size),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--ports", type=int, default=48)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument(
+        "--budget-ms", type=float, default=5.0, help="на метрику"
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    cycles = [
+        make_cycle(args.devices, args.ports, rng) for _ in range(args.cycles)
+    ]
+    top = TopTalkers()
+    timings = []
+    for cycle in cycles:
+        started = time.perf_counter()
+        top.update(cycle)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # Лідер рейтингу — справжній максимум циклу
+    (ip, if_index), value = top.top("in_bps", 1)[0]
+    assert value == cycles[-1].in_bps.max()
+
+    median = statistics.median(timings)
+    budget = args.budget_ms * len(top.metrics)
+    ports = args.devices * args.ports
+    print(
+        f"Флот: {args.devices} пристроїв × {args.ports} портів ({ports} портів)"
+    )
+    print(
+        f"TopTalkers.update ({len(top.metrics)} метрик): медіана {median:.1f} ms,"
+        f" макс. {max(timings):.1f} ms, бюджет {budget:.1f} ms"
+    )
+    if median > budget:
+        print(f"Перевищено бюджет {budget:.1f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Окремий процес-колектор: опитує пристрої та публікує знімки стану
+у спільну пам'ять. Веб-воркери (app.py з SNAPSHOT_DIR) лише читають знімки,
+тому кількість воркерів не впливає на навантаження на пристрої.
+
+Кілька колекторів з різними --node-id в одному каталозі ділять інвентар
+консистентним хешуванням за IP і автоматично перерозподіляють пристрої,
+коли колектор з'являється або зникає.
+
+Фонові сеанси RouterOS (звірка provisioning та потокові підписки дашборду)
+теж живуть у колекторах: кожен тримає їх для роутерів своєї частки, а
+веб-воркери читають результат зі знімків.
+
+З EVENTS_ENABLED=true колектор також приймає SNMP-трапи та syslog
+(TRAP_PORT/SYSLOG_PORT) і реагує на них без очікування наступного циклу.
+
+Запуск:
+    SNAPSHOT_DIR=/dev/shm/netwatch python collector.py --node-id a
+    SNAPSHOT_DIR=/dev/shm/netwatch python collector.py --node-id b
+"""
+
+import argparse
+import logging
+import os
+import signal
+import threading
+from typing import Dict, List
+
+from config import (
+    COLLECTOR_NODE_ID,
+    DEVICES_IP_MAP,
+    EVENTS_ENABLED,
+    HISTORY_DB_PATH,
+    HISTORY_MAINTENANCE_INTERVAL,
+    HISTORY_RETENTION_DAYS,
+    HISTORY_ROLLUP_RETENTION_DAYS,
+    MONITOR_INTERVAL,
+    SHARD_TTL,
+    SNAPSHOT_DIR,
+    WARM_START_FILE,
+)
+from monitor.devices import (
+    build_snapshot_payload,
+    monitor_devices,
+    restore_warm_start,
+    save_warm_start,
+    start_event_listener,
+    stop_routeros,
+)
+from monitor.history import HistoryStore
+from monitor.sharding import HashRing, ShardDirectory, snapshot_path
+from monitor.snapshot import MmapSnapshotStore
+from monitor.topology import Topology
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Колектор стану мережевих пристроїв"
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        default=SNAPSHOT_DIR or "/dev/shm/netwatch",
+        help="Каталог для файлів знімків (за замовчуванням SNAPSHOT_DIR)",
+    )
+    parser.add_argument(
+        "--node-id",
+        default=COLLECTOR_NODE_ID,
+        help="Унікальний ідентифікатор колектора в каталозі знімків",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=MONITOR_INTERVAL,
+        help="Інтервал циклу опитування, секунд",
+    )
+    parser.add_argument(
+        "--warm-start",
+        default=WARM_START_FILE,
+        help=(
+            "Файл теплого старту, може містити {node_id} "
+            "(за замовчуванням WARM_START_FILE)"
+        ),
+    )
+    return parser.parse_args()
+
+
+class ShardSelector:
+    """
+    Щоциклу визначає частку інвентаря, що належить цьому колектору.
+
+    Пристрої розподіляються за коренем гілки топології, тож батько та його
+    нащадки завжди опитуються одним колектором.
+    """
+
+    def __init__(self, shards: ShardDirectory, node_id: str):
+        self.shards = shards
+        self.node_id = node_id
+        self.topology = Topology(DEVICES_IP_MAP)
+        self._nodes: tuple = ()
+        self._ring = HashRing(set(shards.live_nodes()) | {node_id})
+
+    def owns(self, key: str) -> bool:
+        """Чи відповідає цей колектор за ключ поза інвентарем (склад — з циклу)"""
+        return self._ring.owner(key) == self.node_id
+
+    def owner(self, ip: str) -> str:
+        """Колектор, що опитує пристрій (для пересилання його подій)"""
+        return self._ring.owner(self.topology.root(ip))
+
+    def __call__(self) -> List[Dict]:
+        nodes = set(self.shards.live_nodes()) | {self.node_id}
+        ring = HashRing(nodes)
+        self._ring = ring
+
+        owned = ring.assign(
+            DEVICES_IP_MAP, self.node_id, key=self.topology.root
+        )
+        if ring.nodes != self._nodes:
+            self._nodes = ring.nodes
+            logger.info(
+                "Склад колекторів: %s. Вузол %s опитує %d з %d пристроїв",
+                ", ".join(ring.nodes),
+                self.node_id,
+                len(owned),
+                len(DEVICES_IP_MAP),
+            )
+        return owned
+
+
+def main():
+    args = parse_args()
+    path = snapshot_path(args.snapshot_dir, args.node_id)
+    store = MmapSnapshotStore(path, writer=True)
+    shards = ShardDirectory(args.snapshot_dir, SHARD_TTL)
+    stop_event = threading.Event()
+    history = (
+        HistoryStore(
+            HISTORY_DB_PATH,
+            writer=True,
+            retention_days=HISTORY_RETENTION_DAYS,
+            rollup_retention_days=HISTORY_ROLLUP_RETENTION_DAYS,
+            maintenance_interval=HISTORY_MAINTENANCE_INTERVAL,
+        )
+        if HISTORY_DB_PATH
+        else None
+    )
+
+    def handle_signal(signum, frame):
+        logger.info("Отримано сигнал %s, зупиняємо колектор...", signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    # Одразу оголошуємо себе іншим колекторам знімком: останнім відомим
+    # станом з теплого старту або порожнім
+    warm_start = args.warm_start.format(node_id=args.node_id)
+    if warm_start:
+        restore_warm_start(warm_start)
+    store.publish(build_snapshot_payload())
+
+    # Порти подій слухає один колектор; чужі події він пересилає власникам
+    selector = ShardSelector(shards, args.node_id)
+    listener = (
+        start_event_listener(
+            owner=selector.owner,
+            node_id=args.node_id,
+            relay_dir=args.snapshot_dir,
+        )
+        if EVENTS_ENABLED
+        else None
+    )
+
+    logger.info("🚀 Колектор %s запущено, знімки у %s", args.node_id, path)
+    try:
+        monitor_devices(
+            args.interval,
+            store,
+            stop_event,
+            select_devices=selector,
+            history=history,
+            warm_start=warm_start,
+            owns=selector.owns,
+        )
+    finally:
+        stop_routeros()
+        if warm_start:
+            save_warm_start(warm_start)
+        if listener is not None:
+            listener.stop()
+        store.close()
+        shards.close()
+        if history is not None:
+            history.close()
+        # Видаляємо знімок, щоб інші колектори одразу підхопили наші пристрої
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        logger.info("Колектор %s зупинено", args.node_id)
+
+
+if __name__ == "__main__":
+    main()
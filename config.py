@@ -1,3 +1,26 @@
+import json
+import os
+
+from environs import Env
+
+# Прочитайте змінні середовища
+env = Env()
+env.read_env()
+
+# Необов'язкове поле "routeros" — назва змінної середовища з обліковими
+# даними RouterOS API у форматі "user,password" (або True — облікові дані
+# ROOT_ROUTER). Такі пристрої входять до зведення /api/ros/fleet.
+#
+# Для SNMPv3 ("version": "3") поле "usm" — назва змінної середовища
+# з обліковим записом "user[,auth,auth_pass[,priv,priv_pass]]", наприклад
+# "monitor,SHA,authsecret,AES,privsecret" (authPriv).
+#
+# Необов'язкове поле "parent" — IP або назва вищого пристрою, через який
+# доступний даний. Поки батько недоступний, нащадки не опитуються і
+# позначаються "UNREACHABLE (upstream)".
+#
+# Необов'язкове поле "liveness" — спосіб перевірки живості пристрою
+# ("auto", "icmp", "snmp", "routeros"; див. LIVENESS_METHOD).
 DEVICES_IP_MAP = [
     {
         "name": "Office Fregat",
@@ -22,10 +45,128 @@ DEVICES_IP_MAP = [
         "ip": "192.162.109.100",
         "community": "public",
         "version": "2c",
-    },{
+        "routeros": "ROS_SCHOOL26",
+    },
+    {
         "name": "Router School No26 RB4011",
         "ip": "88.218.182.225",
         "community": "public",
         "version": "2c",
+        "routeros": "ROS_SCHOOL26_RB4011",
     },
 ]
+
+# Записи, знайдені discover.py (JSON-список у форматі DEVICES_IP_MAP).
+# Адреси, уже наявні вище, з файлу не беруться.
+INVENTORY_FILE = env.str("INVENTORY_FILE", "")
+if INVENTORY_FILE and os.path.exists(INVENTORY_FILE):
+    with open(INVENTORY_FILE, encoding="utf-8") as _inventory:
+        _known = {device["ip"] for device in DEVICES_IP_MAP}
+        DEVICES_IP_MAP += [
+            device
+            for device in json.load(_inventory)
+            if device["ip"] not in _known
+        ]
+
+# Пошук пристроїв (discover.py): підмережі, community, проб на секунду
+DISCOVERY_CIDRS = env.list("DISCOVERY_CIDRS", [])
+DISCOVERY_COMMUNITIES = env.list("DISCOVERY_COMMUNITIES", ["public"])
+DISCOVERY_RATE = env.int("DISCOVERY_RATE", 1000)
+DISCOVERY_IN_FLIGHT = env.int("DISCOVERY_IN_FLIGHT", 2048)
+
+# Каталог з власними профілями збору SNMP-метрик (*.json, формат —
+# protocols/profiles.py); доповнює вбудовані профілі protocols/profiles/
+SNMP_PROFILES_DIR = env.str("SNMP_PROFILES_DIR", "")
+
+# Інтервал циклу моніторингу, секунд
+MONITOR_INTERVAL = env.int("MONITOR_INTERVAL", 10)
+
+# Якість зв'язку: щоциклу кожному пристрою надсилається залп з PING_BURST
+# echo з інтервалом PING_BURST_INTERVAL (секунд); відповідь чекається
+# PING_TIMEOUT секунд. Ковзне вікно — LATENCY_WINDOW останніх циклів.
+PING_BURST = env.int("PING_BURST", 5)
+PING_BURST_INTERVAL = env.float("PING_BURST_INTERVAL", 0.2)
+PING_TIMEOUT = env.float("PING_TIMEOUT", 1.0)
+LATENCY_WINDOW = env.int("LATENCY_WINDOW", 60)
+# Як часто надсилати залп пристроям, чию живість уже засвідчив SNMP/RouterOS
+# (спосіб auto), секунд; за замовчуванням — раз на 6 циклів, 0 — ніколи
+LATENCY_INTERVAL = env.int("LATENCY_INTERVAL", MONITOR_INTERVAL * 6)
+
+# Живість: успішний обмін SNMP чи RouterOS API за останні LIVENESS_WINDOW
+# секунд засвідчує, що пристрій живий, без ICMP (залп для якості зв'язку
+# надсилається окремо, раз на LATENCY_INTERVAL). Спосіб за замовчуванням
+# (поле "liveness" пристрою):
+#   auto     — нещодавній обмін SNMP/RouterOS, інакше ICMP
+#   icmp     — лише ICMP (як без моделі живості)
+#   snmp     — нещодавній обмін SNMP, інакше get sysUpTime; без ICMP
+#   routeros — нещодавній обмін RouterOS API, інакше вхід в API; без ICMP
+LIVENESS_METHOD = env.str("LIVENESS_METHOD", "auto")
+LIVENESS_WINDOW = env.int("LIVENESS_WINDOW", MONITOR_INTERVAL * 2)
+
+# Досяжний пристрій вважається DEGRADED, якщо середній RTT залпу (мс),
+# jitter (мс) або втрати (%) досягають порога
+DEGRADED_RTT_MS = env.float("DEGRADED_RTT_MS", 150.0)
+DEGRADED_JITTER_MS = env.float("DEGRADED_JITTER_MS", 30.0)
+DEGRADED_LOSS = env.float("DEGRADED_LOSS", 20.0)
+
+# Каталог зі знімками стану від окремого колектора (collector.py).
+# Порожнє значення — моніторинг запускається всередині веб-процесу.
+SNAPSHOT_DIR = env.str("SNAPSHOT_DIR", "")
+
+# Ідентифікатор колектора. Кілька колекторів з різними ідентифікаторами
+# в одному SNAPSHOT_DIR ділять інвентар консистентним хешуванням за IP.
+COLLECTOR_NODE_ID = env.str("COLLECTOR_NODE_ID", "fleet")
+
+# Через скільки секунд без оновлення знімка колектор вважається вибулим
+SHARD_TTL = env.int("SHARD_TTL", MONITOR_INTERVAL * 3 + 15)
+
+# Опитувати лічильники інтерфейсів (SNMP) кожного живого пристрою щоциклу
+POLL_INTERFACES = env.bool("POLL_INTERFACES", False)
+
+# Історія в SQLite. Порожній шлях — історія вимкнена.
+HISTORY_DB_PATH = env.str("HISTORY_DB_PATH", "")
+HISTORY_RETENTION_DAYS = env.int("HISTORY_RETENTION_DAYS", 7)
+HISTORY_ROLLUP_RETENTION_DAYS = env.int("HISTORY_ROLLUP_RETENTION_DAYS", 90)
+HISTORY_MAINTENANCE_INTERVAL = env.int("HISTORY_MAINTENANCE_INTERVAL", 300)
+
+# Файл теплого старту: останній відомий стан флоту зберігається періодично
+# та при зупинці і показується (як застарілий) одразу після перезапуску.
+# Порожній шлях — вимкнено. Для колекторів шлях може містити {node_id}.
+WARM_START_FILE = env.str("WARM_START_FILE", "")
+WARM_START_INTERVAL = env.int("WARM_START_INTERVAL", 60)
+WARM_START_MAX_AGE = env.int("WARM_START_MAX_AGE", 24 * 3600)
+
+# Приймач SNMP-трапів та syslog для миттєвої реакції на події пристроїв.
+# Порт 0 вимикає відповідний приймач.
+EVENTS_ENABLED = env.bool("EVENTS_ENABLED", False)
+EVENTS_BIND = env.str("EVENTS_BIND", "0.0.0.0")
+TRAP_PORT = env.int("TRAP_PORT", 1162)
+SYSLOG_PORT = env.int("SYSLOG_PORT", 1514)
+
+# Скільки пристроїв гілки відновлюють опитування за цикл після повернення
+# батьківського пристрою
+UPSTREAM_RESUME_BATCH = env.int("UPSTREAM_RESUME_BATCH", 10)
+
+# Загальний бюджет часу HTTP-запиту, що звертається до пристроїв, секунд.
+# Після його вичерпання обробник повертає часткові або кешовані дані.
+REQUEST_DEADLINE = env.float("REQUEST_DEADLINE", 8.0)
+
+# Масовий CAPsMAN provisioning: кількість паралельних з'єднань з роутером
+# та бюджет часу потокової операції (прогрес надсилається по ходу), секунд
+PROVISION_CONCURRENCY = env.int("PROVISION_CONCURRENCY", 8)
+PROVISION_DEADLINE = env.float("PROVISION_DEADLINE", 120.0)
+
+# Як часто кеш стану provisioning звіряється з роутером, секунд
+# (після змін через панель кеш оновлюється одразу)
+PROVISION_REFRESH_INTERVAL = env.int("PROVISION_REFRESH_INTERVAL", 300)
+
+# Дашборд MikroTik живиться з підписок RouterOS (=follow=, monitor-traffic)
+# замість повних print на кожен запит. Сеанси тримає процес моніторингу для
+# RouterOS-пристроїв своєї частки інвентаря; сеанс закривається, якщо цикл
+# опитування не підтверджував його ROS_SUBSCRIPTION_IDLE секунд.
+ROS_SUBSCRIPTIONS = env.bool("ROS_SUBSCRIPTIONS", True)
+ROS_RESOURCE_INTERVAL = env.int("ROS_RESOURCE_INTERVAL", 5)
+ROS_SUBSCRIPTION_IDLE = env.int("ROS_SUBSCRIPTION_IDLE", 300)
+
+# Скільки роутерів /api/ros/fleet опитує одночасно
+ROS_FLEET_CONCURRENCY = env.int("ROS_FLEET_CONCURRENCY", 8)
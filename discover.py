@@ -0,0 +1,161 @@
+"""
+Пошук пристроїв у підмережах для наповнення інвентаря.
+
+Адреси перевіряються ICMP, відповідачі — SNMP (sysDescr/sysObjectID/sysName)
+та портами RouterOS API. Знайдені пристрої виводяться у форматі
+DEVICES_IP_MAP або з --merge додаються до INVENTORY_FILE, який config.py
+підхоплює при старті (адреси з config.py не дублюються).
+
+Для власного ICMP-сокета потрібен net.ipv4.ping_group_range або CAP_NET_RAW,
+інакше кожна адреса перевіряється окремим процесом ping (значно повільніше).
+
+Запуск:
+    python discover.py 192.168.5.0/24 10.10.0.0/16 --community public
+    INVENTORY_FILE=inventory.json python discover.py --merge
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from config import (
+    DEVICES_IP_MAP,
+    DISCOVERY_CIDRS,
+    DISCOVERY_COMMUNITIES,
+    DISCOVERY_IN_FLIGHT,
+    DISCOVERY_RATE,
+    INVENTORY_FILE,
+)
+from monitor.discovery import merge_inventory, sweep
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Пошук пристроїв у підмережах"
+    )
+    parser.add_argument(
+        "cidrs",
+        nargs="*",
+        default=DISCOVERY_CIDRS,
+        help="Підмережі до /16 (за замовчуванням DISCOVERY_CIDRS)",
+    )
+    parser.add_argument(
+        "--community",
+        action="append",
+        dest="communities",
+        help=(
+            "SNMP community; можна вказати кілька "
+            "(за замовчуванням DISCOVERY_COMMUNITIES)"
+        ),
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DISCOVERY_RATE,
+        help="Проб на секунду",
+    )
+    parser.add_argument(
+        "--in-flight",
+        type=int,
+        default=DISCOVERY_IN_FLIGHT,
+        help="Адрес, що перевіряються одночасно",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=1.0,
+        help="Тайм-аут однієї проби, секунд",
+    )
+    parser.add_argument(
+        "--snmp-all",
+        action="store_true",
+        help="Опитувати SNMP і адреси, що не відповіли на ping",
+    )
+    parser.add_argument(
+        "--no-ros",
+        action="store_true",
+        help="Не перевіряти порти RouterOS API",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Додати нові пристрої до INVENTORY_FILE (або --output)",
+    )
+    parser.add_argument(
+        "--output", default=None, help="Файл для запису JSON замість stdout"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.cidrs:
+        sys.exit("Не задано підмереж: вкажіть CIDR або DISCOVERY_CIDRS")
+
+    def progress(done: int, total: int, found: int):
+        logger.info(
+            "Перевірено %d з %d адрес, знайдено %d", done, total, found
+        )
+
+    started = time.monotonic()
+    try:
+        found = asyncio.run(
+            sweep(
+                args.cidrs,
+                communities=args.communities or DISCOVERY_COMMUNITIES,
+                rate=args.rate,
+                in_flight=args.in_flight,
+                timeout=args.timeout,
+                snmp_all=args.snmp_all,
+                check_ros=not args.no_ros,
+                progress=progress,
+            )
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    logger.info(
+        "Пошук завершено за %.1f с: %d пристроїв",
+        time.monotonic() - started,
+        len(found),
+    )
+
+    output = args.output or (INVENTORY_FILE if args.merge else None)
+    if args.merge:
+        if not output:
+            sys.exit("Для --merge потрібен --output або INVENTORY_FILE")
+        existing = []
+        if os.path.exists(output):
+            with open(output, encoding="utf-8") as f:
+                existing = json.load(f)
+        # Пристрої з config.py уже в інвентарі — у файл їх не дублюємо
+        configured = {device["ip"] for device in DEVICES_IP_MAP}
+        inventory, added = merge_inventory(
+            existing,
+            [device for device in found if device.ip not in configured],
+        )
+        logger.info("Додано до інвентаря: %d", len(added))
+    else:
+        inventory = [device.to_inventory() for device in found]
+
+    text = json.dumps(inventory, ensure_ascii=False, indent=4)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        logger.info("Інвентар записано у %s", output)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
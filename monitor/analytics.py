@@ -0,0 +1,288 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from monitor.fleet_state import DeviceInterfaces, FleetState
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+COUNTER32_WRAP = float(2**32)  # ifInOctets/ifOutOctets — Counter32
+# Приріст, більший за можливий при ifSpeed (з цим запасом), після корекції
+# переповнення вважається скиданням лічильника
+RESET_RATE_SLACK = 1.5
+MIN_FRAME_BYTES = 84  # Мінімальний кадр Ethernet з преамбулою та IFG
+SATURATION_PERCENT = 90.0  # Поріг насичення порту, % від ifSpeed
+ERROR_Z_THRESHOLD = 3.0  # Поріг z-оцінки частки помилок
+MAX_FLAGGED = 500  # Скільки проблемних портів публікувати у знімку
+
+
+@dataclass(frozen=True)
+class CycleMetrics:
+    """
+    Метрики всіх портів флоту за один цикл (паралельні масиви numpy).
+
+    Рядок i відповідає порту if_indexes[i] пристрою ips[device_ids[i]].
+    Для портів без попереднього зразка швидкості дорівнюють NaN.
+    """
+
+    ips: Tuple[str, ...]
+    device_ids: np.ndarray
+    if_indexes: np.ndarray
+    in_bps: np.ndarray
+    out_bps: np.ndarray
+    utilization: np.ndarray
+    error_rate: np.ndarray
+    error_z: np.ndarray
+    saturated: np.ndarray
+    in_errors_ps: np.ndarray
+    out_errors_ps: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.if_indexes)
+
+
+def _column(devices: List[DeviceInterfaces], name: str) -> np.ndarray:
+    """Зшиває колонку всіх пристроїв у один масив float64 (без циклу по портах)"""
+    if not devices:
+        return np.empty(0)
+    return np.concatenate(
+        [np.frombuffer(d.columns[name], dtype=np.uint64) for d in devices]
+    ).astype(np.float64)
+
+
+def _counter_delta(
+    current: np.ndarray, previous: np.ndarray, limit: np.ndarray
+) -> np.ndarray:
+    """
+    Приріст лічильника з урахуванням переповнення Counter32.
+
+    Від'ємний приріст вважається переповненням (+2^32), лише якщо виправлене
+    значення не перевищує limit — найбільший можливий приріст за інтервал
+    при ifSpeed (inf, якщо швидкість невідома). Інакше це скидання
+    лічильника після перезавантаження, і швидкість для цього циклу
+    невідома — NaN.
+    """
+    delta = current - previous
+    wrapped = delta < 0
+    delta = np.where(wrapped, delta + COUNTER32_WRAP, delta)
+    return np.where(wrapped & (delta > limit), np.nan, delta)
+
+
+class FleetAnalytics:
+    """
+    Векторизований розрахунок швидкостей, завантаження та помилок флоту.
+
+    Щоциклу всі лічильники флоту зшиваються у плоскі масиви і порівнюються
+    з попереднім циклом одним проходом numpy замість циклу по портах.
+    """
+
+    def __init__(
+        self,
+        saturation_percent: float = SATURATION_PERCENT,
+        error_z_threshold: float = ERROR_Z_THRESHOLD,
+    ):
+        self.saturation_percent = saturation_percent
+        self.error_z_threshold = error_z_threshold
+        self._previous: Dict[str, DeviceInterfaces] = {}
+        self.latest: Optional[CycleMetrics] = None
+
+    def update(self, state: FleetState) -> CycleMetrics:
+        """Обчислює метрики поточного циклу відносно попереднього"""
+        items = state.items()
+        ips = tuple(ip for ip, _ in items)
+        current = [device for _, device in items]
+
+        # Попередній зразок використовується лише при незмінному наборі портів
+        previous = []
+        for ip, device in items:
+            prev = self._previous.get(ip)
+            if (
+                prev is None
+                or prev.indexes != device.indexes
+                or prev.polled_at >= device.polled_at
+            ):
+                prev = device
+            previous.append(prev)
+
+        lengths = np.fromiter((len(d) for d in current), dtype=np.int64)
+        device_ids = np.repeat(np.arange(len(current)), lengths)
+        if_indexes = (
+            np.concatenate(
+                [np.frombuffer(d.indexes, dtype=np.uint32) for d in current]
+            )
+            if current
+            else np.empty(0, dtype=np.uint32)
+        )
+
+        elapsed = np.repeat(
+            np.fromiter(
+                (c.polled_at - p.polled_at for c, p in zip(current, previous)),
+                dtype=np.float64,
+            ),
+            lengths,
+        )
+        has_rate = elapsed > 0
+        seconds = np.where(has_rate, elapsed, np.nan)
+
+        # Найбільші можливі прирости октетів і пакетів за інтервал
+        speed = _column(current, "speed")
+        byte_limit = np.where(
+            speed > 0, speed / 8 * elapsed * RESET_RATE_SLACK, np.inf
+        )
+        packet_limit = byte_limit / MIN_FRAME_BYTES
+
+        def rate(name: str, limit: np.ndarray) -> np.ndarray:
+            return (
+                _counter_delta(
+                    _column(current, name), _column(previous, name), limit
+                )
+                / seconds
+            )
+
+        in_bps = rate("in_octets", byte_limit) * 8
+        out_bps = rate("out_octets", byte_limit) * 8
+        in_errors_ps = rate("in_errors", packet_limit)
+        out_errors_ps = rate("out_errors", packet_limit)
+        pkts_ps = rate("in_pkts", packet_limit) + rate(
+            "out_pkts", packet_limit
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            utilization = np.where(
+                speed > 0, np.fmax(in_bps, out_bps) / speed * 100.0, np.nan
+            )
+            errors_ps = in_errors_ps + out_errors_ps
+            error_rate = np.where(
+                pkts_ps > 0, errors_ps / (errors_ps + pkts_ps), 0.0
+            )
+            error_rate = np.where(has_rate, error_rate, np.nan)
+
+            valid = ~np.isnan(error_rate)
+            if valid.any():
+                mean = error_rate[valid].mean()
+                std = error_rate[valid].std()
+            else:
+                mean, std = 0.0, 0.0
+            error_z = (
+                (error_rate - mean) / std
+                if std > 0
+                else np.where(valid, 0.0, np.nan)
+            )
+
+        saturated = np.nan_to_num(utilization) >= self.saturation_percent
+
+        self._previous = dict(items)
+        self.latest = CycleMetrics(
+            ips=ips,
+            device_ids=device_ids,
+            if_indexes=if_indexes,
+            in_bps=in_bps,
+            out_bps=out_bps,
+            utilization=utilization,
+            error_rate=error_rate,
+            error_z=error_z,
+            saturated=saturated,
+            in_errors_ps=in_errors_ps,
+            out_errors_ps=out_errors_ps,
+        )
+        return self.latest
+
+    def forget(self, ips: Iterable[str]):
+        for ip in ips:
+            self._previous.pop(ip, None)
+
+    def device_traffic(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Сумарний трафік та макс. завантаження кожного пристрою"""
+        metrics = self.latest
+        if metrics is None or not len(metrics):
+            return {}
+
+        count = len(metrics.ips)
+        ids = metrics.device_ids
+        in_total = np.bincount(ids, np.nan_to_num(metrics.in_bps), count)
+        out_total = np.bincount(ids, np.nan_to_num(metrics.out_bps), count)
+        max_util = np.full(count, -1.0)
+        np.maximum.at(
+            max_util, ids, np.nan_to_num(metrics.utilization, nan=-1.0)
+        )
+
+        return {
+            ip: {
+                "in_bps": round(float(in_total[i]), 1),
+                "out_bps": round(float(out_total[i]), 1),
+                "max_utilization": (
+                    round(float(max_util[i]), 2) if max_util[i] >= 0 else None
+                ),
+            }
+            for i, ip in enumerate(metrics.ips)
+        }
+
+    def summary(self, state: FleetState) -> Dict[str, Any]:
+        """Підсумок циклу для публікації у знімку та /api/analytics"""
+        metrics = self.latest
+        if metrics is None:
+            return {}
+
+        outliers = metrics.error_z >= self.error_z_threshold
+        flagged = np.flatnonzero(metrics.saturated | outliers)
+        # Найбільш завантажені спочатку
+        flagged = flagged[
+            np.argsort(-np.nan_to_num(metrics.utilization[flagged]))
+        ][:MAX_FLAGGED]
+
+        def number(value) -> Optional[float]:
+            return None if np.isnan(value) else round(float(value), 4)
+
+        rows = []
+        for i in flagged:
+            ip = metrics.ips[metrics.device_ids[i]]
+            if_index = int(metrics.if_indexes[i])
+            device = state.get(ip)
+            rows.append(
+                {
+                    "ip": ip,
+                    "if_index": if_index,
+                    "name": device.port_name(if_index) if device else "",
+                    "in_bps": number(metrics.in_bps[i]),
+                    "out_bps": number(metrics.out_bps[i]),
+                    "utilization": number(metrics.utilization[i]),
+                    "error_rate": number(metrics.error_rate[i]),
+                    "error_z": number(metrics.error_z[i]),
+                    "saturated": bool(metrics.saturated[i]),
+                }
+            )
+
+        return {
+            "ports": len(metrics),
+            "ports_with_rates": int((~np.isnan(metrics.in_bps)).sum()),
+            "saturated": int(metrics.saturated.sum()),
+            "error_outliers": int(outliers.sum()),
+            "total_in_bps": round(float(np.nansum(metrics.in_bps)), 1),
+            "total_out_bps": round(float(np.nansum(metrics.out_bps)), 1),
+            "flagged": rows,
+        }
+
+
+def merge_summaries(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Об'єднує підсумки кількох колекторів (шардів) в один"""
+    merged: Dict[str, Any] = {}
+    flagged: List[Dict[str, Any]] = []
+    for summary in summaries:
+        for key, value in summary.items():
+            if key == "flagged":
+                flagged.extend(value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    if not merged and not flagged:
+        return {}
+
+    flagged.sort(key=lambda row: -(row["utilization"] or 0))
+    merged["flagged"] = flagged[:MAX_FLAGGED]
+    return merged
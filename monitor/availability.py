@@ -0,0 +1,215 @@
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Стан вікна для теплого старту: (номер кошика, сирі кошики up, сирі total)
+WindowState = Tuple[Optional[int], bytes, bytes]
+# Стан пристрою для теплого старту: (ip, alive, [стан вікна по WINDOWS])
+DeviceState = Tuple[str, bool, List[WindowState]]
+
+# Вікна доступності: (назва, тривалість у секундах, кількість кошиків)
+WINDOWS: Tuple[Tuple[str, int, int], ...] = (
+    ("24h", 86400, 96),  # кошики по 15 хв
+    ("7d", 7 * 86400, 168),  # кошики по 1 год
+    ("30d", 30 * 86400, 120),  # кошики по 6 год
+)
+
+
+class SlidingWindow:
+    """
+    Ковзне вікно накопичення часу роботи на кошиках фіксованої тривалості.
+
+    Суми по вікну підтримуються інкрементально: при переході до нового
+    кошика внесок найстарішого віднімається, тому запит коштує O(1).
+    """
+
+    __slots__ = ("span", "width", "up", "total", "up_sum", "total_sum", "head")
+
+    def __init__(self, span: int, buckets: int):
+        self.span = span
+        self.width = span / buckets
+        self.up = array("d", bytes(8 * buckets))
+        self.total = array("d", bytes(8 * buckets))
+        self.up_sum = 0.0
+        self.total_sum = 0.0
+        self.head: Optional[int] = None  # Абсолютний номер поточного кошика
+
+    def _rotate(self, bucket: int):
+        """Зсуває вікно до кошика bucket, обнуляючи застарілі кошики"""
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+
+        size = len(self.up)
+        for step in range(1, min(bucket - self.head, size) + 1):
+            i = (self.head + step) % size
+            self.up_sum -= self.up[i]
+            self.total_sum -= self.total[i]
+            self.up[i] = 0.0
+            self.total[i] = 0.0
+
+        self.head = bucket
+        # Захист від накопичення похибки float
+        self.up_sum = max(self.up_sum, 0.0)
+        self.total_sum = max(self.total_sum, 0.0)
+
+    def add(self, start: float, end: float, alive: bool):
+        """Зараховує проміжок [start, end) зі станом alive"""
+        start = max(start, end - self.span)
+        size = len(self.up)
+
+        while start < end:
+            bucket = int(start // self.width)
+            self._rotate(bucket)
+            chunk_end = min(end, (bucket + 1) * self.width)
+            elapsed = chunk_end - start
+            i = bucket % size
+
+            self.total[i] += elapsed
+            self.total_sum += elapsed
+            if alive:
+                self.up[i] += elapsed
+                self.up_sum += elapsed
+
+            start = chunk_end
+
+    def dump(self) -> WindowState:
+        return self.head, self.up.tobytes(), self.total.tobytes()
+
+    def load(self, state: WindowState):
+        head, up, total = state
+        self.up = array("d")
+        self.up.frombytes(up)
+        self.total = array("d")
+        self.total.frombytes(total)
+        self.head = head
+        self.up_sum = sum(self.up)
+        self.total_sum = sum(self.total)
+
+    def percent(self) -> Optional[float]:
+        if self.total_sum <= 0:
+            return None
+        return round(100.0 * self.up_sum / self.total_sum, 3)
+
+
+class DeviceAvailability:
+    """Поточний стан пристрою та його накопичувачі по всіх вікнах"""
+
+    __slots__ = ("alive", "since", "windows")
+
+    def __init__(self, alive: bool, since: float):
+        self.alive = alive
+        self.since = since
+        self.windows = {
+            name: SlidingWindow(span, buckets)
+            for name, span, buckets in WINDOWS
+        }
+
+    def advance(self, now: float):
+        """Зараховує час від останньої події до now у поточному стані"""
+        if now <= self.since:
+            return
+        for window in self.windows.values():
+            window.add(self.since, now, self.alive)
+        self.since = now
+
+
+class AvailabilityTracker:
+    """
+    Інкрементальний облік доступності (SLA) пристроїв.
+
+    Живиться подіями переходу ONLINE/OFFLINE від монітора. Між подіями стан
+    вважається незмінним, тому кількість роботи не залежить від довжини
+    історії: запит по флоту коштує O(пристроїв × вікон).
+    """
+
+    def __init__(self):
+        self._devices: Dict[str, DeviceAvailability] = {}
+        self._lock = threading.Lock()
+
+    def on_transition(
+        self, ip: str, alive: bool, ts: float, previous: Optional[bool] = None
+    ):
+        """Обробник події переходу стану (перше спостереження — previous=None)"""
+        with self._lock:
+            device = self._devices.get(ip)
+            if device is None:
+                self._devices[ip] = DeviceAvailability(alive, ts)
+                return
+            device.advance(ts)
+            device.alive = alive
+
+    def forget(self, ips: Iterable[str]):
+        """Прибирає пристрої, що більше не опитуються цим процесом"""
+        with self._lock:
+            for ip in ips:
+                self._devices.pop(ip, None)
+
+    def export(self, now: float) -> List[DeviceState]:
+        """Накопичувачі всіх пристроїв, доведені до now (для теплого старту)"""
+        with self._lock:
+            result = []
+            for ip, device in self._devices.items():
+                device.advance(now)
+                windows = [
+                    device.windows[name].dump() for name, _, _ in WINDOWS
+                ]
+                result.append((ip, device.alive, windows))
+            return result
+
+    def restore(self, states: Iterable[DeviceState], now: float):
+        """
+        Відновлює накопичувачі, збережені export.
+
+        Час між збереженням і now не спостерігався і не зараховується
+        у жодне вікно. Пристрої, вже відомі трекеру, не змінюються.
+        """
+        sizes = [buckets * 8 for _, _, buckets in WINDOWS]
+        with self._lock:
+            for ip, alive, windows in states:
+                if ip in self._devices or len(windows) != len(WINDOWS):
+                    continue
+                if any(
+                    len(up) != size or len(total) != size
+                    for (_, up, total), size in zip(windows, sizes)
+                ):
+                    continue
+                device = DeviceAvailability(alive, now)
+                for (name, _, _), state in zip(WINDOWS, windows):
+                    device.windows[name].load(state)
+                self._devices[ip] = device
+
+    def device(self, ip: str, now: float) -> Dict[str, Optional[float]]:
+        """Доступність пристрою у відсотках по кожному вікну"""
+        with self._lock:
+            device = self._devices.get(ip)
+            if device is None:
+                return {name: None for name, _, _ in WINDOWS}
+            device.advance(now)
+            return {
+                name: window.percent()
+                for name, window in device.windows.items()
+            }
+
+
+def fleet_sla(devices: Iterable[Dict]) -> Dict[str, Optional[float]]:
+    """
+    Середня доступність флоту по кожному вікну, O(пристроїв).
+
+    Приймає записи пристроїв зі знімка з полем "availability".
+    """
+    sums = {name: 0.0 for name, _, _ in WINDOWS}
+    counts = {name: 0 for name, _, _ in WINDOWS}
+
+    for device in devices:
+        for name, value in (device.get("availability") or {}).items():
+            if value is not None and name in sums:
+                sums[name] += value
+                counts[name] += 1
+
+    return {
+        name: round(sums[name] / counts[name], 3) if counts[name] else None
+        for name in sums
+    }
@@ -1,11 +1,60 @@
+import asyncio
+import atexit
 import logging
-import subprocess
+import queue
 import threading
 import time
-import concurrent.futures
-import platform
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
-from config import DEVICES_IP_MAP
+from ros_api.api import LoginError
+
+from config import (
+    DEGRADED_JITTER_MS,
+    DEGRADED_LOSS,
+    DEGRADED_RTT_MS,
+    DEVICES_IP_MAP,
+    env,
+    EVENTS_BIND,
+    LATENCY_INTERVAL,
+    LATENCY_WINDOW,
+    LIVENESS_METHOD,
+    LIVENESS_WINDOW,
+    MONITOR_INTERVAL,
+    PING_BURST,
+    PING_BURST_INTERVAL,
+    PING_TIMEOUT,
+    POLL_INTERFACES,
+    PROVISION_REFRESH_INTERVAL,
+    ROS_SUBSCRIPTIONS,
+    SNMP_PROFILES_DIR,
+    SYSLOG_PORT,
+    TRAP_PORT,
+    UPSTREAM_RESUME_BATCH,
+    WARM_START_INTERVAL,
+    WARM_START_MAX_AGE,
+)
+from monitor import ros_live, warmstart
+from monitor.analytics import FleetAnalytics
+from monitor.availability import AvailabilityTracker
+from monitor.events import LINK_DOWN, LINK_UP, DeviceEvent, EventListener
+from monitor.fleet_state import FleetState
+from monitor.history import HistoryStore
+from monitor.latency import BurstStats, LatencyTracker, probe_bursts
+from monitor.ros_fleet import ros_devices, router_credentials
+from monitor.snapshot import SnapshotStore
+from monitor.topology import ResumeQueue, Topology
+from monitor.topn import TopTalkers
+from protocols import routeros
+from protocols.breaker import (
+    SOURCE_ICMP,
+    SOURCE_ROUTEROS,
+    SOURCE_SNMP,
+    breakers,
+)
+from protocols.profiles import profiles
+from protocols.provisioning import ProvisioningStateCache
+from protocols.snmp import AsyncSwitchSNMP
+from protocols.usm import UsmUser
 
 # Налаштування логування
 logging.basicConfig(
@@ -14,78 +63,719 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Власні профілі збору доповнюють або перевизначають вбудовані
+if SNMP_PROFILES_DIR:
+    profiles.load_dir(SNMP_PROFILES_DIR)
+
 # Глобальний словник для зберігання статусу
 status = {}
 
-IS_WINDOWS = platform.system().lower() == "windows"
+# Спільні (інтерновані) рядки статусу для всіх пристроїв
+STATUS_ONLINE = "🟢 ONLINE"
+STATUS_DEGRADED = "🟡 DEGRADED"
+STATUS_OFFLINE = "🔴 OFFLINE"
+STATUS_UPSTREAM = "⚪ UNREACHABLE (upstream)"
+
+# Останні лічильники інтерфейсів у компактному вигляді
+fleet_state = FleetState()
+
+# Стан з файлу теплого старту: віддається як застарілий ("stale"), доки
+# перший цикл опитування не дасть свіжого статусу пристрою
+warm_status: Dict[str, Dict] = {}
+
+# Остання отримана системна інформація (SNMP) пристроїв
+device_info: Dict[str, Dict] = {}
+
+# Швидкості, завантаження та помилки портів флоту (векторизовано)
+analytics = FleetAnalytics()
+
+# Рейтинг найнавантаженіших портів, оновлюється лише для змінених портів
+top_talkers = TopTalkers()
+
+# Підписники на зміну стану: callback(ip, alive, ts, previous).
+# previous=None означає перше спостереження пристрою.
+TransitionListener = Callable[[str, bool, float, Optional[bool]], None]
+transition_listeners: List[TransitionListener] = []
+
+# Облік доступності (SLA), живиться подіями зміни стану
+availability = AvailabilityTracker()
+
+# RTT, jitter та втрати залпів ICMP у ковзних вікнах
+latency = LatencyTracker(LATENCY_WINDOW)
+
+# Дерево залежностей інвентаря та черга поступового відновлення гілок
+_topology: Tuple[tuple, Optional[Topology]] = ((), None)
+resume = ResumeQueue(UPSTREAM_RESUME_BATCH)
+
+# Способи перевірки живості → джерела обміну, що засвідчують живість
+# без ICMP (див. LIVENESS_METHOD у config.py)
+LIVENESS_METHODS: Dict[str, Tuple[str, ...]] = {
+    "auto": (SOURCE_SNMP, SOURCE_ROUTEROS),
+    "icmp": (),
+    "snmp": (SOURCE_SNMP,),
+    "routeros": (SOURCE_ROUTEROS,),
+}
+
+# Запит на позачергову публікацію знімка (після подій від пристроїв)
+publish_requested = threading.Event()
+
+# Зміни від потоку приймача подій. status та fleet_state змінює лише потік
+# опитування, тож подія не перезаписує результат циклу і навпаки
+pending_changes: "queue.SimpleQueue[Callable[[], None]]" = queue.SimpleQueue()
+
+# Єдиний кеш стану WiFi provisioning процесу. Фонову звірку з ROOT_ROUTER
+# веде лише процес опитування, відповідальний за ROOT_ROUTER, і публікує
+# у знімку; веб-воркери пишуть у нього write-through змін і примусові звірки
+provisioning_state = ProvisioningStateCache(
+    env.list("ROOT_ROUTER", []), PROVISION_REFRESH_INTERVAL
+)
+
+
+def add_transition_listener(listener: TransitionListener):
+    """Підписує обробник на події зміни стану ONLINE/OFFLINE"""
+    transition_listeners.append(listener)
+
+
+def emit_transition(ip: str, alive: bool, ts: float, previous: Optional[bool]):
+    """Розсилає подію зміни стану всім підписникам"""
+    for listener in transition_listeners:
+        try:
+            listener(ip, alive, ts, previous)
+        except Exception as e:
+            logger.error("Помилка обробника зміни стану %s: %s", ip, e)
+
+
+add_transition_listener(availability.on_transition)
+
+
+def get_topology(devices: List[Dict]) -> Topology:
+    """Топологія поточного інвентаря (перебудовується лише при його зміні)"""
+    global _topology
+    key = tuple((d["ip"], d["name"], d.get("parent")) for d in devices)
+    if _topology[0] != key:
+        _topology = (key, Topology(devices))
+    return _topology[1]
+
+
+def mark_upstream(device: Dict, parent: str, transitions: List):
+    """Позначає пристрій недоступним через недоступний батьківський"""
+    ip = device["ip"]
+    previous = status.get(ip)
+    if previous and previous.get("upstream"):
+        return  # уже позначено, час останньої перевірки не змінюється
+
+    was_alive = previous["alive"] if previous else None
+    now = time.time()
+    if was_alive is not False:
+        emit_transition(ip, False, now, was_alive)
+        if was_alive is not None:
+            transitions.append((ip, False))
+    status[ip] = {
+        "ip": ip,
+        "name": device["name"],
+        "alive": False,
+        "status": STATUS_UPSTREAM,
+        "checked_at": int(now),
+        "upstream": parent,
+    }
+
 
+def request_publish():
+    """Просить цикл опитування опублікувати знімок, не чекаючи інтервалу"""
+    publish_requested.set()
 
-def ping_device_robust(ip: str, retries: int = 3, timeout: int = 1) -> bool:
+
+def defer(change: Callable[[], None]):
+    """Передає зміну стану потоку опитування і будить його"""
+    pending_changes.put(change)
+    request_publish()
+
+
+def apply_pending():
+    """Застосовує відкладені зміни (викликається лише в потоці опитування)"""
+    while True:
+        try:
+            change = pending_changes.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            change()
+        except Exception as e:
+            logger.error("Помилка застосування події: %s", e)
+
+
+def wait_next_cycle(
+    interval: int, stop_event: threading.Event, store: Optional[SnapshotStore]
+):
     """
-    Надійно пінгує пристрій, роблячи кілька спроб.
-    Повертає True, якщо хоча б одна спроба була успішною.
+    Чекає наступного циклу, публікуючи знімок при кожній події.
+
+    Публікація лишається в потоці опитування, тож записувач знімка
+    ніколи не використовується з двох потоків одночасно.
+    """
+    deadline = time.monotonic() + interval
+    while not stop_event.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if publish_requested.wait(min(remaining, 1.0)):
+            publish_requested.clear()
+            apply_pending()
+            if store is not None:
+                store.publish(build_snapshot_payload())
+
+
+def handle_event(event: DeviceEvent):
     """
-    for i in range(retries):
+    Приймає подію пристрою (трап/syslog) з потоку приймача.
+
+    Подія застосовується в потоці опитування (apply_event), який
+    прокидається одразу, не чекаючи кінця інтервалу.
+    """
+    defer(lambda: apply_event(event))
+
+
+def apply_event(event: DeviceEvent):
+    """
+    Застосовує подію пристрою до стану флоту.
+
+    Пристрій, що надіслав подію, вважається доступним, якщо перевірка
+    не визнала його недоступним уже після події; стан порту оновлюється
+    до завершення цільового повторного опитування.
+    """
+    previous = status.get(event.ip)
+    if previous is None:
+        return  # пристрій опитує інший колектор
+
+    entry = {
+        **previous,
+        "last_event": {
+            "kind": event.kind,
+            "source": event.source,
+            "if_index": event.if_index,
+            "if_name": event.if_name,
+            "ts": int(event.ts),
+        },
+    }
+    if not previous["alive"] and event.ts >= previous.get("checked_at", 0):
+        # Пристрій сам надіслав подію, тож придушення через батьківський
+        # більше не діє: інакше лічильники та черга відновлення розходяться
+        entry.pop("upstream", None)
+        resume.forget([event.ip])
+        entry.update(
+            alive=True, status=STATUS_ONLINE, checked_at=int(event.ts)
+        )
+        emit_transition(event.ip, True, event.ts, False)
+    status[event.ip] = entry
+
+    if event.kind in (LINK_UP, LINK_DOWN) and event.if_index is not None:
+        oper_status = "1" if event.kind == LINK_UP else "2"
+        fleet_state.update_rows(
+            event.ip, {"oper_status": {event.if_index: oper_status}}
+        )
+
+
+def snmp_client(device: Dict) -> AsyncSwitchSNMP:
+    """
+    SNMP-клієнт пристрою з інвентаря.
+
+    Необов'язкове поле "profile" примусово задає профіль збору метрик
+    (protocols/profiles); інакше профіль обирається за sysObjectID/sysDescr.
+
+    Для "version": "3" поле "usm" — назва змінної середовища з обліковим
+    записом "user[,auth,auth_pass[,priv,priv_pass]]" (паролі не зберігаються
+    в config.py).
+    """
+    usm_user = None
+    if device.get("version") == "3":
         try:
-            if IS_WINDOWS:
-                # -n <count> — кількість пакетів
-                # -w <timeout> — таймаут у мілісекундах
-                cmd = ["ping", "-n", "1", "-w", str(timeout * 1000), ip]
-            else:
-                # Linux/Mac
-                cmd = ["ping", "-c", "1", "-W", str(timeout), "-n", ip]
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False,
+            usm_user = UsmUser.parse(env.list(device.get("usm") or "", []))
+        except ValueError as e:
+            logger.error(
+                "SNMPv3 %s: обліковий запис %s: %s",
+                device["ip"],
+                device.get("usm"),
+                e,
             )
+    return AsyncSwitchSNMP(
+        device["ip"],
+        device.get("community", "public"),
+        device.get("version", "2c"),
+        usm_user,
+        device.get("profile"),
+    )
 
-            if result.returncode == 0:
-                return True
-            if i < retries - 1:
-                time.sleep(0.5)
-        except (subprocess.SubprocessError, FileNotFoundError):
-            return False
 
-    return False
+def liveness_method(device: Dict) -> str:
+    """Спосіб перевірки живості пристрою (поле "liveness" або LIVENESS_METHOD)"""
+    method = device.get("liveness") or LIVENESS_METHOD
+    if method not in LIVENESS_METHODS:
+        logger.warning(
+            "Невідомий спосіб живості %s для %s, використано auto",
+            method,
+            device["ip"],
+        )
+        return "auto"
+    return method
 
 
-def monitor_devices(interval: int = 10):
-    devices = DEVICES_IP_MAP
+async def routeros_responding(device: Dict) -> bool:
+    """Перевірка живості входом в RouterOS API (невірний пароль — теж відповідь)"""
+    credentials = router_credentials(device)
+    if credentials is None:
+        logger.warning(
+            "Живість %s: немає облікових даних RouterOS API", device["ip"]
+        )
+        return False
+    try:
+        api = await routeros.connect_async(device["ip"], *credentials)
+    except LoginError:
+        return True
+    except Exception as e:
+        logger.debug(
+            "Живість %s: RouterOS API не відповідає: %s", device["ip"], e
+        )
+        return False
+    api.close()
+    return True
 
-    while True:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(devices)) as executor:
-            future_to_device = {
-                executor.submit(ping_device_robust, device["ip"]): device
-                for device in devices
+
+async def check_liveness(
+    devices: Iterable[Dict],
+) -> Dict[str, Tuple[bool, str, Optional[BurstStats]]]:
+    """
+    Живість пристроїв одного рівня дерева.
+
+    Пристрій, що нещодавно успішно обмінявся SNMP чи RouterOS (опитування
+    інтерфейсів, сторінка пристрою, підписки RouterOS), вважається живим
+    без ICMP. Решта перевіряються способом, заданим для пристрою. У способі
+    auto залп ICMP для якості зв'язку все одно надсилається раз на
+    LATENCY_INTERVAL (0 — ніколи), але на вердикт живості не впливає.
+
+    Returns:
+        {ip: (живий, джерело, залп ICMP або None)}
+    """
+    verdicts = {}
+    icmp_ips, snmp_checks, ros_checks = [], [], []
+    for device in devices:
+        ip = device["ip"]
+        method = liveness_method(device)
+        source = breakers.last_exchange(
+            ip, LIVENESS_METHODS[method], LIVENESS_WINDOW
+        )
+        if source is not None:
+            verdicts[ip] = (True, source, None)
+            if (
+                method == "auto"
+                and LATENCY_INTERVAL
+                and latency.due(ip, LATENCY_INTERVAL)
+            ):
+                icmp_ips.append(ip)
+        elif method == "snmp":
+            snmp_checks.append(device)
+        elif method == "routeros":
+            ros_checks.append(device)
+        else:
+            icmp_ips.append(ip)
+
+    async def icmp():
+        if not icmp_ips:
+            return {}
+        return await probe_bursts(
+            icmp_ips, PING_BURST, PING_BURST_INTERVAL, PING_TIMEOUT
+        )
+
+    bursts, snmp_results, ros_results = await asyncio.gather(
+        icmp(),
+        asyncio.gather(
+            *(snmp_client(device).is_responding() for device in snmp_checks)
+        ),
+        asyncio.gather(
+            *(routeros_responding(device) for device in ros_checks)
+        ),
+    )
+    for ip, stats in bursts.items():
+        alive, source, _ = verdicts.get(ip, (stats.alive, SOURCE_ICMP, None))
+        verdicts[ip] = (alive, source, stats)
+    for device, alive in zip(snmp_checks, snmp_results):
+        verdicts[device["ip"]] = (alive, SOURCE_SNMP, None)
+    for device, alive in zip(ros_checks, ros_results):
+        verdicts[device["ip"]] = (alive, SOURCE_ROUTEROS, None)
+    return verdicts
+
+
+async def repoll_interfaces(device: Dict, if_indexes: List[int]):
+    """Цільове опитування стану лише вказаних рядків інтерфейсів"""
+    if fleet_state.get(device["ip"]) is None:
+        return
+    switch = snmp_client(device)
+    rows = await switch.get_interface_rows(if_indexes)
+    if rows:
+        defer(lambda: fleet_state.update_rows(device["ip"], rows))
+
+
+def collect_interfaces(
+    devices: List[Dict],
+) -> Dict[str, Tuple[List[int], Dict[str, Dict[int, str]]]]:
+    """
+    Паралельно опитує лічильники інтерфейсів вказаних пристроїв по SNMP.
+
+    Повертає сирі колонки {ip: (індекси, колонки)} без створення об'єкта
+    на кожен порт — їх одразу завантажує FleetState.
+    """
+
+    async def collect():
+        switches = [snmp_client(device) for device in devices]
+        results = await asyncio.gather(
+            *(switch.get_interfaces_columns() for switch in switches),
+            return_exceptions=True,
+        )
+
+        collected = {}
+        for switch, result in zip(switches, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Помилка опитування інтерфейсів %s: %s",
+                    switch.host,
+                    result,
+                )
+                continue
+            if result[0]:
+                collected[switch.host] = result
+        return collected
+
+    return asyncio.run(collect())
+
+
+def restore_warm_start(path: str) -> bool:
+    """
+    Завантажує останній відомий стан флоту з файлу теплого старту.
+
+    Статуси потрапляють у warm_status (а не в status), тож цикл опитування
+    сприймає перше спостереження пристрою як і при холодному старті.
+    """
+    state = warmstart.load(path, fleet_state.strings, WARM_START_MAX_AGE)
+    if state is None:
+        return False
+    for ip, entry in state.status.items():
+        warm_status[ip] = {**entry, "stale": True}
+    for ip, device_ifaces in state.interfaces.items():
+        if fleet_state.get(ip) is None:
+            fleet_state.put(ip, device_ifaces)
+    for ip, info in state.device_info.items():
+        device_info.setdefault(ip, info)
+    availability.restore(state.availability, time.time())
+    logger.info(
+        "Теплий старт: %d пристроїв, %d з інтерфейсами (стан на %s)",
+        len(state.status),
+        len(state.interfaces),
+        time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state.saved_at)),
+    )
+    return True
+
+
+def save_warm_start(path: str):
+    """Зберігає поточний стан флоту у файл теплого старту"""
+    try:
+        warmstart.save(
+            path,
+            {**warm_status, **status},
+            fleet_state,
+            device_info,
+            availability=availability,
+        )
+    except OSError as e:
+        logger.error("Теплий старт: не вдалося зберегти %s: %s", path, e)
+
+
+def sync_routeros(devices: List[Dict], owns: Optional[Callable[[str], bool]]):
+    """
+    Тримає фонові сеанси RouterOS лише там, де опитуються пристрої.
+
+    Звірку provisioning веде процес, якому належить ROOT_ROUTER (owns;
+    None — процесу належить усе), а потокові підписки — для RouterOS-пристроїв
+    власної частки інвентаря.
+    """
+    if provisioning_state.credentials:
+        if owns is None or owns(provisioning_state.credentials[0]):
+            provisioning_state.start()
+        elif provisioning_state.running:
+            provisioning_state.stop(wait=False)
+
+    if ROS_SUBSCRIPTIONS:
+        routers = {}
+        for device in ros_devices(devices):
+            credentials = router_credentials(device)
+            if credentials is not None:
+                routers[device["ip"]] = credentials
+        ros_live.subscriptions.retain(routers)
+
+
+def stop_routeros():
+    """Зупиняє звірку provisioning та підписки RouterOS процесу"""
+    provisioning_state.stop(wait=False)
+    ros_live.subscriptions.stop_all()
+
+
+def build_snapshot_payload() -> dict:
+    """Формує дані знімка стану флоту для публікації"""
+    now = time.time()
+    traffic = analytics.device_traffic()
+    # Ще не опитані після перезапуску пристрої — з теплого старту
+    current = {
+        **{ip: entry for ip, entry in warm_status.items() if ip not in status},
+        **status,
+    }
+    payload = {
+        "devices": {
+            ip: {
+                **device,
+                "availability": availability.device(ip, now),
+                "latency": latency.device(ip),
+                "traffic": traffic.get(ip),
             }
+            for ip, device in current.items()
+        },
+        "published_at": now,
+    }
+    if POLL_INTERFACES:
+        payload["analytics"] = analytics.summary(fleet_state)
+        payload["top"] = top_talkers.snapshot(fleet_state)
+    if provisioning_state.running and provisioning_state.loaded:
+        payload["provisioning"] = provisioning_state.view()
+    routers = ros_live.subscriptions.snapshot()
+    if routers:
+        payload["routeros"] = routers
+    return payload
 
-            for future in concurrent.futures.as_completed(future_to_device):
-                device = future_to_device[future]
+
+def monitor_devices(
+    interval: int = MONITOR_INTERVAL,
+    store: Optional[SnapshotStore] = None,
+    stop_event: Optional[threading.Event] = None,
+    select_devices: Optional[Callable[[], List[Dict]]] = None,
+    history: Optional[HistoryStore] = None,
+    warm_start: Optional[str] = None,
+    owns: Optional[Callable[[str], bool]] = None,
+):
+    """
+    Цикл опитування пристроїв.
+
+    select_devices дозволяє щоциклу обирати підмножину інвентаря
+    (наприклад, шард колектора); за замовчуванням опитуються всі пристрої.
+    owns(ip) — чи відповідає процес за ключ поза інвентарем (ROOT_ROUTER
+    для звірки provisioning); None — відповідає за все.
+    warm_start — файл, у який стан флоту зберігається кожні
+    WARM_START_INTERVAL секунд.
+    """
+    stop_event = stop_event or threading.Event()
+    warm_saved_at = time.monotonic()
+
+    while not stop_event.is_set():
+        apply_pending()
+        devices = select_devices() if select_devices else DEVICES_IP_MAP
+
+        # Прибираємо пристрої, які більше не належать цьому процесу
+        owned = {device["ip"] for device in devices}
+        released = set(status) - owned
+        for ip in released:
+            status.pop(ip, None)
+            fleet_state.pop(ip)
+        availability.forget(released)
+        latency.forget(released)
+        analytics.forget(released)
+        resume.forget(released)
+        sync_routeros(devices, owns)
+
+        if not devices:
+            warm_status.clear()
+            if store is not None:
+                store.publish(build_snapshot_payload())
+            wait_next_cycle(interval, stop_event, store)
+            continue
+
+        cycle_ts = int(time.time())
+        pings = []
+        transitions = []
+
+        # Опитуємо рівнями дерева: нащадки недоступного батька не пінгуються
+        topology = get_topology(devices)
+        resume.start_cycle()
+        suppressed = 0
+        for level in topology.levels(devices):
+            to_ping = []
+            for device in level:
+                ip = device["ip"]
+                parent = topology.parent(ip)
+                parent_entry = status.get(parent) if parent else None
+                if parent_entry is not None and not parent_entry["alive"]:
+                    resume.forget([ip])
+                    mark_upstream(device, parent, transitions)
+                    suppressed += 1
+                elif status.get(ip, {}).get("upstream") and not resume.admit(
+                    ip
+                ):
+                    suppressed += 1  # батько повернувся, чекаємо своєї черги
+                else:
+                    to_ping.append(device)
+
+            if not to_ping:
+                continue
+
+            verdicts = asyncio.run(check_liveness(to_ping))
+            for device in to_ping:
                 ip = device["ip"]
-                name = device["name"]
+                is_alive, source, stats = verdicts[ip]
+                previous = status.get(ip)
+                # Між залпами якість зв'язку — з останнього залпу
+                degraded = bool(
+                    is_alive and previous and previous.get("degraded")
+                )
+                if stats is not None:
+                    # Лише ICMP дає затримку; SNMP/RouterOS-проби ведуть запобіжник самі
+                    degraded = is_alive and stats.degraded(
+                        DEGRADED_RTT_MS, DEGRADED_JITTER_MS, DEGRADED_LOSS
+                    )
+                    latency.record(ip, stats)
+                if source == SOURCE_ICMP:
+                    # Лише залп, що вирішив живість: залп для якості зв'язку
+                    # пристрою з фільтрованим ICMP не розмикає SNMP/RouterOS
+                    breakers.record(ip, stats.alive, SOURCE_ICMP)
 
-                try:
-                    is_alive = future.result()
-                except Exception as e:
-                    logger.error("Помилка при виконанні завдання: %s", str(e))
-                    is_alive = False
+                pings.append((ip, is_alive))
+                was_alive = previous["alive"] if previous else None
+                if was_alive != is_alive:
+                    emit_transition(ip, is_alive, time.time(), was_alive)
+                    if was_alive is not None:
+                        transitions.append((ip, is_alive))
 
+                # Час зберігається як epoch і форматується лише при видачі
                 status[ip] = {
                     "ip": ip,
-                    "name": name,
+                    "name": device["name"],
                     "alive": is_alive,
-                    "status": "🟢 ONLINE" if is_alive else "🔴 OFFLINE",
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "degraded": degraded,
+                    "liveness": source,
+                    "status": (
+                        STATUS_DEGRADED
+                        if degraded
+                        else STATUS_ONLINE if is_alive else STATUS_OFFLINE
+                    ),
+                    "checked_at": int(time.time()),
                 }
+                if previous and "last_event" in previous:
+                    status[ip]["last_event"] = previous["last_event"]
+
+        if suppressed:
+            logger.info(
+                "Пропущено %d пристроїв за недоступними батьківськими "
+                "(%d у черзі на відновлення)",
+                suppressed,
+                len(resume),
+            )
+
+        interface_rows = []
+        if POLL_INTERFACES:
+            alive_devices = [d for d in devices if status[d["ip"]]["alive"]]
+            collected = collect_interfaces(alive_devices)
+            for ip in owned:
+                if ip not in collected:
+                    fleet_state.pop(ip)
 
-        time.sleep(interval)
+            for ip, (indexes, columns) in collected.items():
+                device_ifaces = fleet_state.update(
+                    ip, indexes, columns, cycle_ts
+                )
+                cols = device_ifaces.columns
+                interface_rows.extend(
+                    zip(
+                        (ip,) * len(device_ifaces),
+                        device_ifaces.indexes,
+                        cols["in_octets"],
+                        cols["out_octets"],
+                        cols["in_errors"],
+                        cols["out_errors"],
+                        cols["oper_status"],
+                        cols["speed"],
+                    )
+                )
 
+            top_talkers.update(analytics.update(fleet_state))
 
-def start_monitoring():
-    """Запускає моніторинг у фоновому потоці."""
-    thread = threading.Thread(target=monitor_devices, args=(10,), daemon=True)
+        if history is not None:
+            history.record_cycle(cycle_ts, pings, transitions, interface_rows)
+
+        # Після повного циклу всі пристрої мають свіжий статус
+        if warm_status:
+            warm_status.clear()
+            for ip, _ in fleet_state.items():
+                if ip not in owned:
+                    fleet_state.pop(ip)
+
+        # Публікуємо знімок один раз за цикл (з подіями, що надійшли за цикл)
+        apply_pending()
+        if store is not None:
+            store.publish(build_snapshot_payload())
+
+        if (
+            warm_start
+            and time.monotonic() - warm_saved_at >= WARM_START_INTERVAL
+        ):
+            save_warm_start(warm_start)
+            warm_saved_at = time.monotonic()
+
+        wait_next_cycle(interval, stop_event, store)
+
+
+def start_monitoring(
+    store: Optional[SnapshotStore] = None,
+    history: Optional[HistoryStore] = None,
+    warm_start: Optional[str] = None,
+):
+    """
+    Запускає моніторинг у фоновому потоці.
+
+    З warm_start останній збережений стан публікується одразу, а поточний
+    зберігається періодично та при завершенні процесу.
+    """
+    if warm_start:
+        if restore_warm_start(warm_start) and store is not None:
+            store.publish(build_snapshot_payload())
+        atexit.register(save_warm_start, warm_start)
+
+    thread = threading.Thread(
+        target=monitor_devices,
+        args=(MONITOR_INTERVAL, store),
+        kwargs={"history": history, "warm_start": warm_start},
+        daemon=True,
+    )
     thread.start()
     logger.info("🚀 Моніторинг запущено...")
+
+
+def start_event_listener(
+    devices: Optional[List[Dict]] = None,
+    owner: Optional[Callable[[str], Optional[str]]] = None,
+    node_id: str = "",
+    relay_dir: str = "",
+) -> EventListener:
+    """
+    Запускає приймач трапів та syslog, що живить стан флоту подіями.
+
+    Для колекторів owner(ip) визначає колектор пристрою, а relay_dir —
+    каталог сокетів, через які події пересилаються власнику.
+    """
+    listener = EventListener(
+        devices if devices is not None else DEVICES_IP_MAP,
+        fleet_state,
+        handle_event,
+        repoll_interfaces,
+        host=EVENTS_BIND,
+        trap_port=TRAP_PORT,
+        syslog_port=SYSLOG_PORT,
+        owner=owner,
+        node_id=node_id,
+        relay_dir=relay_dir,
+    )
+    listener.start()
+    return listener
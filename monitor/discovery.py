@@ -0,0 +1,273 @@
+"""
+Пошук пристроїв у підмережах для наповнення інвентаря.
+
+Кожна адреса перевіряється ICMP echo, відповідачі — SNMP GET
+sysDescr/sysName/sysObjectID (за списком community) та TCP-з'єднанням
+з портами RouterOS API. Запити йдуть через спільні сокети AsyncPinger
+та SnmpProber з обмеженням швидкості, тож тисячі проб одночасно не
+створюють тисяч процесів чи сокетів.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from monitor.icmp import AsyncPinger
+from protocols.snmp_probe import SnmpProber
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+MAX_PREFIX = 16  # Найбільша дозволена підмережа — /16
+DEFAULT_RATE = 1000  # Проб на секунду
+DEFAULT_IN_FLIGHT = 2048  # Адрес, що перевіряються одночасно
+
+OID_SYS_DESCR = "1.3.6.1.2.1.1.1.0"
+OID_SYS_OBJECT_ID = "1.3.6.1.2.1.1.2.0"
+OID_SYS_NAME = "1.3.6.1.2.1.1.5.0"
+FINGERPRINT_OIDS = (OID_SYS_DESCR, OID_SYS_OBJECT_ID, OID_SYS_NAME)
+
+ENTERPRISES = "1.3.6.1.4.1."
+# Номер підприємства IANA у sysObjectID → виробник
+VENDORS = {
+    "9": "Cisco",
+    "11": "HP",
+    "171": "D-Link",
+    "311": "Microsoft",
+    "890": "Zyxel",
+    "2011": "Huawei",
+    "2636": "Juniper",
+    "3902": "ZTE",
+    "4526": "Netgear",
+    "8072": "Net-SNMP",
+    "11863": "TP-Link",
+    "12356": "Fortinet",
+    "14988": "MikroTik",
+    "25506": "H3C",
+    "41112": "Ubiquiti",
+}
+ROS_API_PORTS = (8728, 8729)
+
+Progress = Callable[[int, int, int], None]
+
+
+@dataclass
+class DiscoveredDevice:
+    ip: str
+    rtt: Optional[float] = None  # секунди; None — ICMP не відповів
+    community: Optional[str] = None
+    sys_name: Optional[str] = None
+    sys_descr: Optional[str] = None
+    sys_object_id: Optional[str] = None
+    vendor: Optional[str] = None
+    ros_api_port: Optional[int] = None
+
+    @property
+    def routeros(self) -> bool:
+        return (
+            self.vendor == "MikroTik"
+            or "RouterOS" in (self.sys_descr or "")
+            or self.ros_api_port is not None
+        )
+
+    def to_inventory(self) -> Dict:
+        """Запис у форматі DEVICES_IP_MAP"""
+        entry = {
+            "name": self.sys_name or f"{self.vendor or 'Device'} {self.ip}",
+            "ip": self.ip,
+            "community": self.community or "public",
+            "version": "2c",
+        }
+        if self.vendor:
+            entry["vendor"] = self.vendor
+        if self.sys_descr:
+            entry["model"] = self.sys_descr.splitlines()[0][:120]
+        if self.ros_api_port is not None:
+            # Облікові дані ROOT_ROUTER; за потреби замінити на назву змінної
+            entry["routeros"] = True
+        return entry
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "routeros": self.routeros}
+
+
+def vendor_of(sys_object_id: Optional[str]) -> Optional[str]:
+    if not sys_object_id or not sys_object_id.startswith(ENTERPRISES):
+        return None
+    return VENDORS.get(sys_object_id[len(ENTERPRISES) :].split(".")[0])
+
+
+def expand_targets(
+    cidrs: Iterable[str], max_prefix: int = MAX_PREFIX
+) -> List[ipaddress.IPv4Network]:
+    """
+    Підмережі для сканування.
+
+    Raises:
+        ValueError: некоректний запис або підмережа більша за /max_prefix.
+    """
+    networks = []
+    for cidr in cidrs:
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+        if network.version != 4:
+            raise ValueError(f"Підтримується лише IPv4: {cidr}")
+        if network.prefixlen < max_prefix:
+            raise ValueError(f"Підмережа {cidr} більша за /{max_prefix}")
+        networks.append(network)
+    return networks
+
+
+def iter_hosts(networks: Sequence[ipaddress.IPv4Network]) -> Iterator[str]:
+    seen = set()
+    for network in networks:
+        hosts = (
+            network.hosts()
+            if network.num_addresses > 1
+            else [network.network_address]
+        )
+        for host in hosts:
+            ip = str(host)
+            if ip not in seen:
+                seen.add(ip)
+                yield ip
+
+
+class RateLimiter:
+    """Відро токенів: не більше rate дозволів на секунду з пачкою до burst"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(rate / 10, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._updated) * self.rate,
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def _ros_api_port(ip: str, timeout: float) -> Optional[int]:
+    """Перший відкритий порт RouterOS API або None"""
+    for port in ROS_API_PORTS:
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port), timeout
+            )
+        except (asyncio.TimeoutError, OSError):
+            continue
+        writer.close()
+        return port
+    return None
+
+
+async def sweep(
+    cidrs: Iterable[str],
+    communities: Sequence[str] = ("public",),
+    rate: float = DEFAULT_RATE,
+    in_flight: int = DEFAULT_IN_FLIGHT,
+    timeout: float = 1.0,
+    snmp_all: bool = False,
+    check_ros: bool = True,
+    progress: Optional[Progress] = None,
+) -> List[DiscoveredDevice]:
+    """
+    Сканує підмережі й повертає знайдені пристрої (за зростанням IP).
+
+    snmp_all — опитувати SNMP і ті адреси, що не відповіли на ICMP
+    (пристрої з фільтрованим ping); подвоює кількість проб.
+    """
+    networks = expand_targets(cidrs)
+    total = sum(max(network.num_addresses - 2, 1) for network in networks)
+    hosts = iter_hosts(networks)
+    limiter = RateLimiter(rate)
+    found: List[DiscoveredDevice] = []
+    counters = {"done": 0}
+
+    async with AsyncPinger() as pinger, SnmpProber() as prober:
+
+        async def probe(ip: str) -> Optional[DiscoveredDevice]:
+            await limiter.acquire()
+            rtt = await pinger.ping(ip, timeout)
+            if rtt is None and not snmp_all:
+                return None
+
+            device = DiscoveredDevice(ip=ip, rtt=rtt)
+            for community in communities:
+                await limiter.acquire()
+                values = await prober.get(
+                    ip, FINGERPRINT_OIDS, community, timeout=timeout, retries=0
+                )
+                if values is not None:
+                    device.community = community
+                    device.sys_descr = values.get(OID_SYS_DESCR)
+                    device.sys_object_id = values.get(OID_SYS_OBJECT_ID)
+                    device.sys_name = values.get(OID_SYS_NAME)
+                    device.vendor = vendor_of(device.sys_object_id)
+                    break
+
+            if rtt is None and device.community is None:
+                return None
+            if check_ros:
+                device.ros_api_port = await _ros_api_port(ip, timeout)
+            return device
+
+        async def worker():
+            for ip in hosts:
+                device = await probe(ip)
+                counters["done"] += 1
+                if device is not None:
+                    found.append(device)
+                if progress is not None and counters["done"] % 256 == 0:
+                    progress(counters["done"], total, len(found))
+
+        await asyncio.gather(*(worker() for _ in range(max(in_flight, 1))))
+
+    if progress is not None:
+        progress(counters["done"], total, len(found))
+    found.sort(key=lambda device: ipaddress.ip_address(device.ip))
+    return found
+
+
+def merge_inventory(
+    existing: Sequence[Dict], discovered: Iterable[DiscoveredDevice]
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Додає до інвентаря нові адреси; наявні записи лишаються без змін.
+
+    Returns:
+        (об'єднаний інвентар, лише додані записи)
+    """
+    known = {device["ip"] for device in existing}
+    added = [
+        device.to_inventory()
+        for device in discovered
+        if device.ip not in known
+    ]
+    return list(existing) + added, added
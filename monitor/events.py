@@ -0,0 +1,376 @@
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from monitor.fleet_state import FleetState
+from protocols import syslog, traps
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+# Види подій пристроїв
+LINK_UP = "link_up"
+LINK_DOWN = "link_down"
+REBOOT = "reboot"
+
+TRAP_KINDS = {
+    traps.TRAP_LINK_UP: LINK_UP,
+    traps.TRAP_LINK_DOWN: LINK_DOWN,
+    traps.TRAP_COLD_START: REBOOT,
+    traps.TRAP_WARM_START: REBOOT,
+}
+
+REPOLL_DELAY = 1.0  # Затримка для об'єднання сплеску подій в одне опитування
+ALL_ROWS = -1  # Маркер повторного опитування всіх рядків пристрою
+REBIND_INTERVAL = 10.0  # Повторна спроба зайняти порт трапів/syslog, секунд
+RELAY_SUFFIX = ".events"  # Сокет колектора для подій від інших колекторів
+
+
+@dataclass(frozen=True)
+class DeviceEvent:
+    """Подія від пристрою (трап або syslog), прив'язана до інвентаря"""
+
+    ip: str
+    kind: str
+    source: str  # "trap" або "syslog"
+    ts: float
+    if_index: Optional[int] = None
+    if_name: str = ""
+    detail: str = ""
+
+
+EventHandler = Callable[[DeviceEvent], None]
+Repoller = Callable[[Dict, List[int]], Awaitable[None]]
+Owner = Callable[[str], Optional[str]]
+
+
+def relay_path(directory: str, node_id: str) -> str:
+    """Шлях до сокета, яким колектор приймає події своїх пристроїв"""
+    return os.path.join(directory, f"{node_id}{RELAY_SUFFIX}")
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(
+        self,
+        on_datagram: Callable[[bytes, Tuple, asyncio.DatagramTransport], None],
+    ):
+        self.on_datagram = on_datagram
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple):
+        self.on_datagram(data, addr, self.transport)
+
+
+class EventListener:
+    """
+    Асинхронний приймач SNMP-трапів та syslog від пристроїв.
+
+    Кожна подія зіставляється з пристроєм інвентаря за адресою відправника,
+    одразу передається обробнику (оновлення стану), а затим планується
+    цільове повторне опитування лише зачеплених рядків інтерфейсів.
+    Сплеск подій одного пристрою (флапінг) об'єднується в одне опитування.
+
+    Кілька колекторів не можуть слухати один порт: його займає той, хто
+    встиг першим (решта періодично пробують знову). Він розбирає кожен
+    датаграм і пересилає подію колектору-власнику пристрою (owner) через
+    його сокет у relay_dir; власник застосовує її як власну.
+    """
+
+    def __init__(
+        self,
+        devices: List[Dict],
+        state: FleetState,
+        on_event: EventHandler,
+        repoll: Repoller,
+        host: str = "0.0.0.0",
+        trap_port: int = 1162,
+        syslog_port: int = 1514,
+        repoll_delay: float = REPOLL_DELAY,
+        owner: Optional[Owner] = None,
+        node_id: str = "",
+        relay_dir: str = "",
+        rebind_interval: float = REBIND_INTERVAL,
+    ):
+        self.inventory = {device["ip"]: device for device in devices}
+        self.state = state
+        self.on_event = on_event
+        self.repoll = repoll
+        self.host = host
+        self.trap_port = trap_port
+        self.syslog_port = syslog_port
+        self.repoll_delay = repoll_delay
+        self.owner = owner
+        self.node_id = node_id
+        self.relay_dir = relay_dir
+        self.rebind_interval = rebind_interval
+        self._relay: Optional[socket.socket] = None
+
+        self._pending: Dict[str, Set[int]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self):
+        """Запускає приймач у фоновому потоці з власним циклом asyncio"""
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self.serve()),
+            name="event-listener",
+            daemon=True,
+        )
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self):
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        transports = []
+        unbound = []
+        try:
+            if self.relay_dir:
+                transports.append(await self._open_relay())
+            for port, handler, name in (
+                (self.trap_port, self._on_trap, "SNMP-трапів"),
+                (self.syslog_port, self._on_syslog, "syslog"),
+            ):
+                if not port:
+                    continue
+                transport = await self._bind(port, handler, name)
+                if transport is None:
+                    unbound.append((port, handler, name))
+                else:
+                    transports.append(transport)
+        finally:
+            self._ready.set()
+
+        try:
+            # Порт зайнятий іншим колектором: підхоплюємо, коли він зупиниться
+            while unbound and self.relay_dir:
+                try:
+                    await asyncio.wait_for(
+                        self._stop.wait(), self.rebind_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                if self._stop.is_set():
+                    break
+                for entry in list(unbound):
+                    transport = await self._bind(*entry, quiet=True)
+                    if transport is not None:
+                        transports.append(transport)
+                        unbound.remove(entry)
+            await self._stop.wait()
+        finally:
+            for transport in transports:
+                transport.close()
+            if self._relay is not None:
+                self._relay.close()
+            if self.relay_dir:
+                try:
+                    os.unlink(relay_path(self.relay_dir, self.node_id))
+                except FileNotFoundError:
+                    pass
+
+    async def _bind(
+        self, port: int, handler: Callable, name: str, quiet: bool = False
+    ) -> Optional[asyncio.DatagramTransport]:
+        try:
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(handler),
+                local_addr=(self.host, port),
+            )
+        except OSError as e:
+            if not quiet:
+                logger.log(
+                    logging.INFO if self.relay_dir else logging.ERROR,
+                    "Не вдалося відкрити порт %s/udp для %s: %s",
+                    port,
+                    name,
+                    e,
+                )
+            return None
+        logger.info("📡 Приймач %s слухає %s:%s/udp", name, self.host, port)
+        return transport
+
+    async def _open_relay(self) -> asyncio.DatagramTransport:
+        """Сокет для подій, пересланих колектором, що слухає порти"""
+        path = relay_path(self.relay_dir, self.node_id)
+        try:
+            os.unlink(path)  # залишок попереднього запуску
+        except FileNotFoundError:
+            pass
+        transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(self._on_relay),
+            local_addr=path,
+            family=socket.AF_UNIX,
+        )
+        self._relay = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._relay.setblocking(False)
+        return transport
+
+    def _on_relay(self, data: bytes, addr, transport):
+        try:
+            event = DeviceEvent(**json.loads(data))
+        except (ValueError, TypeError) as e:
+            logger.debug("Некоректна переслана подія: %s", e)
+            return
+        self._dispatch(event, relayed=True)
+
+    def _forward(self, node_id: str, event: DeviceEvent):
+        """Пересилає подію колектору, що опитує пристрій"""
+        payload = json.dumps(dataclasses.asdict(event)).encode()
+        try:
+            self._relay.sendto(payload, relay_path(self.relay_dir, node_id))
+        except OSError as e:
+            logger.warning(
+                "Подію %s не передано колектору %s: %s", event.ip, node_id, e
+            )
+
+    def _on_trap(self, data: bytes, addr: Tuple, transport):
+        try:
+            trap = traps.decode_trap(data)
+        except (ValueError, IndexError) as e:
+            logger.debug("Некоректний трап від %s: %s", addr[0], e)
+            return
+
+        # У SNMPv1 адреса агента передається в самому трапі (через NAT/релей)
+        device = self.inventory.get(addr[0]) or self.inventory.get(
+            trap.agent_addr or ""
+        )
+        if device is None:
+            logger.debug("Трап від невідомого пристрою %s", addr[0])
+            return
+        if trap.community != device.get("community", "public"):
+            logger.warning("Трап від %s з неправильним community", addr[0])
+            return
+
+        if trap.response is not None:
+            transport.sendto(trap.response, addr)
+
+        kind = TRAP_KINDS.get(trap.trap_oid)
+        if kind is None:
+            return
+        self._dispatch(
+            DeviceEvent(
+                ip=device["ip"],
+                kind=kind,
+                source="trap",
+                ts=time.time(),
+                if_index=trap.if_index,
+                detail=trap.trap_oid,
+            )
+        )
+
+    def _on_syslog(self, data: bytes, addr: Tuple, transport):
+        device = self.inventory.get(addr[0])
+        if device is None:
+            return
+        message = syslog.parse_syslog(data)
+        if message is None:
+            return
+
+        link = syslog.link_event(message.message)
+        if link is not None:
+            if_name, state = link
+            event = DeviceEvent(
+                ip=device["ip"],
+                kind=LINK_UP if state == syslog.LINK_UP else LINK_DOWN,
+                source="syslog",
+                ts=time.time(),
+                if_name=if_name,
+                detail=message.message,
+            )
+        elif syslog.is_reboot(message.message):
+            event = DeviceEvent(
+                ip=device["ip"],
+                kind=REBOOT,
+                source="syslog",
+                ts=time.time(),
+                detail=message.message,
+            )
+        else:
+            return
+        self._dispatch(event)
+
+    def _resolve_port(self, event: DeviceEvent) -> DeviceEvent:
+        """Доповнює назву або ifIndex порту зі стану інтерфейсів власника"""
+        device_ifaces = self.state.get(event.ip)
+        if device_ifaces is None:
+            return event
+        if event.if_index is not None and not event.if_name:
+            return dataclasses.replace(
+                event, if_name=device_ifaces.port_name(event.if_index)
+            )
+        if event.if_name and event.if_index is None:
+            return dataclasses.replace(
+                event, if_index=device_ifaces.port_index(event.if_name)
+            )
+        return event
+
+    def _dispatch(self, event: DeviceEvent, relayed: bool = False):
+        owner = self.owner(event.ip) if self.owner and not relayed else None
+        if owner is not None and owner != self.node_id and self.relay_dir:
+            self._forward(owner, event)
+            return
+
+        event = self._resolve_port(event)
+        logger.info(
+            "Подія %s від %s (%s) %s",
+            event.kind,
+            event.ip,
+            event.source,
+            event.if_name or "",
+        )
+        try:
+            self.on_event(event)
+        except Exception as e:
+            logger.error("Помилка обробника події %s: %s", event.ip, e)
+
+        if event.kind == REBOOT:
+            row = ALL_ROWS  # лічильники та статуси всіх портів скинуто
+        elif event.if_index is not None:
+            row = event.if_index
+        else:
+            return  # інтерфейс з syslog ще не відомий — дочекаємось циклу
+
+        pending = self._pending.get(event.ip)
+        if pending is None:
+            self._pending[event.ip] = {row}
+            self._loop.call_later(
+                self.repoll_delay,
+                lambda: asyncio.ensure_future(self._flush(event.ip)),
+            )
+        else:
+            pending.add(row)
+
+    async def _flush(self, ip: str):
+        rows = self._pending.pop(ip, set())
+        if ALL_ROWS in rows:
+            device_ifaces = self.state.get(ip)
+            rows = set(device_ifaces.indexes) if device_ifaces else set()
+        if not rows:
+            return
+        try:
+            await self.repoll(self.inventory[ip], sorted(rows))
+        except Exception as e:
+            logger.error("Помилка повторного опитування %s: %s", ip, e)
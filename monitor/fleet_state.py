@@ -0,0 +1,285 @@
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Числові колонки інтерфейсу, що зберігаються як масиви 64-бітних лічильників
+COUNTER_FIELDS: Tuple[str, ...] = (
+    "speed",
+    "in_octets",
+    "out_octets",
+    "in_pkts",
+    "out_pkts",
+    "in_errors",
+    "out_errors",
+)
+# Статуси ifAdminStatus/ifOperStatus вміщуються в байт
+STATUS_FIELDS: Tuple[str, ...] = ("admin_status", "oper_status")
+
+
+def _to_int(value: Optional[str]) -> int:
+    """Безпечне перетворення значення SNMP у невід'ємне ціле"""
+    try:
+        return max(int(value), 0) if value else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+class StringTable:
+    """
+    Таблиця інтернованих рядків (назви та alias інтерфейсів).
+
+    Однакові назви ("ether1", "GigabitEthernet0/1") у всьому флоті
+    зберігаються один раз, а пристрої тримають лише їхні номери.
+    """
+
+    def __init__(self):
+        self._strings: List[str] = [""]
+        self._ids: Dict[str, int] = {"": 0}
+        self._lock = threading.Lock()
+
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            with self._lock:
+                string_id = self._ids.get(value)
+                if string_id is None:
+                    string_id = len(self._strings)
+                    self._strings.append(value)
+                    self._ids[value] = string_id
+        return string_id
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Номер рядка без його додавання до таблиці"""
+        return self._ids.get(value)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self._strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+class InterfaceView:
+    """
+    Легке представлення одного рядка DeviceInterfaces.
+
+    Має ті самі атрибути, що й InterfaceStats, тож сумісне з API та шаблонами,
+    але не копіює даних — лише посилання на пристрій і номер рядка.
+    """
+
+    __slots__ = ("_device", "_row")
+
+    def __init__(self, device: "DeviceInterfaces", row: int):
+        self._device = device
+        self._row = row
+
+    def __getattr__(self, name: str):
+        device = self._device
+        if name in COUNTER_FIELDS or name in STATUS_FIELDS:
+            return device.columns[name][self._row]
+        if name == "index":
+            return device.indexes[self._row]
+        if name == "name":
+            return device.strings[device.name_ids[self._row]]
+        if name == "alias":
+            return device.strings[device.alias_ids[self._row]]
+        raise AttributeError(name)
+
+    @property
+    def total_octets(self) -> int:
+        """Загальна кількість переданих байтів"""
+        return self.in_octets + self.out_octets
+
+    @property
+    def total_errors(self) -> int:
+        """Загальна кількість помилок"""
+        return self.in_errors + self.out_errors
+
+    def to_dict(self) -> Dict:
+        """Словник з тими ж полями, що й asdict(InterfaceStats)"""
+        device, row = self._device, self._row
+        data = {
+            "index": device.indexes[row],
+            "name": device.strings[device.name_ids[row]],
+            "alias": device.strings[device.alias_ids[row]],
+        }
+        for name in COUNTER_FIELDS + STATUS_FIELDS:
+            data[name] = device.columns[name][row]
+        return data
+
+
+class DeviceInterfaces:
+    """
+    Стан інтерфейсів одного пристрою у вигляді struct-of-arrays.
+
+    Кожна колонка — типізований масив (array), тому 48 портів займають
+    кілька компактних буферів замість 48 об'єктів зі своїм __dict__.
+    """
+
+    __slots__ = (
+        "strings",
+        "indexes",
+        "name_ids",
+        "alias_ids",
+        "columns",
+        "polled_at",
+    )
+
+    def __init__(self, strings: StringTable):
+        self.strings = strings
+        self.indexes = array("I")
+        self.name_ids = array("I")
+        self.alias_ids = array("I")
+        self.columns: Dict[str, array] = {}
+        self.polled_at = 0  # epoch, секунди
+
+    def load(
+        self,
+        indexes: List[int],
+        columns: Dict[str, Dict[int, str]],
+        polled_at: int,
+    ):
+        """Заповнює масиви з сирих колонок SNMP"""
+        intern = self.strings.intern
+        names = columns.get("name", {})
+        aliases = columns.get("alias", {})
+
+        self.indexes = array("I", indexes)
+        self.name_ids = array("I", (intern(names.get(i, "")) for i in indexes))
+        self.alias_ids = array(
+            "I", (intern(aliases.get(i, "")) for i in indexes)
+        )
+        for name in COUNTER_FIELDS:
+            data = columns.get(name, {})
+            self.columns[name] = array(
+                "Q", (_to_int(data.get(i)) for i in indexes)
+            )
+        for name in STATUS_FIELDS:
+            data = columns.get(name, {})
+            self.columns[name] = array(
+                "B", (min(_to_int(data.get(i)), 255) for i in indexes)
+            )
+        self.polled_at = polled_at
+
+    def copy(self) -> "DeviceInterfaces":
+        """Незалежна копія масивів (для оновлення окремих рядків)"""
+        device = DeviceInterfaces(self.strings)
+        device.indexes = array("I", self.indexes)
+        device.name_ids = array("I", self.name_ids)
+        device.alias_ids = array("I", self.alias_ids)
+        device.columns = {
+            name: array(column.typecode, column)
+            for name, column in self.columns.items()
+        }
+        device.polled_at = self.polled_at
+        return device
+
+    def set_rows(self, columns: Dict[str, Dict[int, str]]):
+        """
+        Перезаписує значення окремих рядків сирими колонками SNMP.
+
+        Невідомі ifIndex пропускаються; polled_at не змінюється, тож
+        розрахунок швидкостей за лічильниками лишається коректним.
+        """
+        rows = {if_index: row for row, if_index in enumerate(self.indexes)}
+        for name, data in columns.items():
+            for if_index, value in data.items():
+                row = rows.get(if_index)
+                if row is None:
+                    continue
+                if name == "name":
+                    self.name_ids[row] = self.strings.intern(value)
+                elif name == "alias":
+                    self.alias_ids[row] = self.strings.intern(value)
+                elif name in STATUS_FIELDS:
+                    self.columns[name][row] = min(_to_int(value), 255)
+                elif name in COUNTER_FIELDS:
+                    self.columns[name][row] = _to_int(value)
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+    def __iter__(self) -> Iterator[InterfaceView]:
+        return (InterfaceView(self, row) for row in range(len(self.indexes)))
+
+    def port_name(self, if_index: int) -> str:
+        """Назва порту за ifIndex (порожній рядок, якщо порту немає)"""
+        if if_index not in self.indexes:
+            return ""
+        return self.strings[self.name_ids[self.indexes.index(if_index)]]
+
+    def port_index(self, name: str) -> Optional[int]:
+        """ifIndex порту за назвою (ifDescr), None якщо такого немає"""
+        string_id = self.strings.lookup(name)
+        if string_id is None or string_id not in self.name_ids:
+            return None
+        return self.indexes[self.name_ids.index(string_id)]
+
+    def page(self, offset: int, limit: int) -> List[Dict]:
+        """Рядки [offset, offset + limit) у форматі InterfaceView.to_dict"""
+        end = min(offset + limit, len(self.indexes))
+        return [
+            InterfaceView(self, row).to_dict() for row in range(offset, end)
+        ]
+
+    def to_dict(self) -> Dict[int, Dict]:
+        """{if_index: поля інтерфейсу} — формат відповіді /api/device/<ip>"""
+        return {view.index: view.to_dict() for view in self}
+
+
+class FleetState:
+    """
+    Компактний стан інтерфейсів усього флоту {ip: DeviceInterfaces}.
+
+    Кожне опитування створює новий DeviceInterfaces і підміняє посилання,
+    тож читачі з інших потоків завжди бачать узгоджений цикл.
+    """
+
+    def __init__(self):
+        self.strings = StringTable()
+        self._devices: Dict[str, DeviceInterfaces] = {}
+
+    def update(
+        self,
+        ip: str,
+        indexes: List[int],
+        columns: Dict[str, Dict[int, str]],
+        polled_at: int,
+    ) -> DeviceInterfaces:
+        device = DeviceInterfaces(self.strings)
+        device.load(indexes, columns, polled_at)
+        self._devices[ip] = device
+        return device
+
+    def update_rows(
+        self, ip: str, columns: Dict[str, Dict[int, str]]
+    ) -> Optional[DeviceInterfaces]:
+        """
+        Оновлює окремі рядки пристрою (копіювання при записі).
+
+        Читачі продовжують бачити попередній узгоджений стан, доки
+        посилання не буде підмінено.
+        """
+        current = self._devices.get(ip)
+        if current is None:
+            return None
+        device = current.copy()
+        device.set_rows(columns)
+        self._devices[ip] = device
+        return device
+
+    def put(self, ip: str, device: DeviceInterfaces):
+        """Встановлює готовий стан пристрою (наприклад, з теплого старту)"""
+        self._devices[ip] = device
+
+    def get(self, ip: str) -> Optional[DeviceInterfaces]:
+        return self._devices.get(ip)
+
+    def pop(self, ip: str):
+        self._devices.pop(ip, None)
+
+    def items(self):
+        return list(self._devices.items())
+
+    def __len__(self) -> int:
+        return len(self._devices)
@@ -0,0 +1,400 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+ROLLUP_PERIOD = 3600  # Годинні агрегати
+QUEUE_SIZE = 1000  # Макс. кількість циклів, що очікують запису
+COUNTER32_WRAP = 2**32  # ifInOctets/ifOutOctets/ifInErrors — Counter32
+# Приріст октетів, більший за ifSpeed/8 * інтервал з цим запасом, вважається
+# скиданням лічильника (перезавантаження), а не переповненням
+RESET_RATE_SLACK = 1.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ping_samples (
+    ip TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    alive INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_ping_samples_ip_ts ON ping_samples (ip, ts);
+CREATE INDEX IF NOT EXISTS ix_ping_samples_ts ON ping_samples (ts);
+
+CREATE TABLE IF NOT EXISTS state_transitions (
+    ip TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    alive INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_state_transitions_ip_ts
+    ON state_transitions (ip, ts);
+
+CREATE TABLE IF NOT EXISTS interface_samples (
+    ip TEXT NOT NULL,
+    if_index INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    in_octets INTEGER NOT NULL,
+    out_octets INTEGER NOT NULL,
+    in_errors INTEGER NOT NULL,
+    out_errors INTEGER NOT NULL,
+    oper_status INTEGER NOT NULL,
+    speed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_interface_samples_ip_if_ts
+    ON interface_samples (ip, if_index, ts);
+CREATE INDEX IF NOT EXISTS ix_interface_samples_ts ON interface_samples (ts);
+
+CREATE TABLE IF NOT EXISTS ping_rollup_hourly (
+    ip TEXT NOT NULL,
+    period_ts INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    up_samples INTEGER NOT NULL,
+    PRIMARY KEY (ip, period_ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS interface_rollup_hourly (
+    ip TEXT NOT NULL,
+    if_index INTEGER NOT NULL,
+    period_ts INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    in_octets_delta INTEGER NOT NULL,
+    out_octets_delta INTEGER NOT NULL,
+    in_errors_delta INTEGER NOT NULL,
+    out_errors_delta INTEGER NOT NULL,
+    PRIMARY KEY (ip, if_index, period_ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Годинні агрегати трафіку: сума приростів між сусідніми зразками порту.
+# Від'ємний приріст октетів — переповнення Counter32 (+2^32), якщо
+# виправлене значення можливе за ifSpeed; інакше це скидання лічильника,
+# і приріст відкидається. Від'ємний приріст помилок — завжди скидання.
+# Попередній зразок шукається й до початку діапазону (за годину).
+INTERFACE_ROLLUP_SQL = """
+INSERT OR REPLACE INTO interface_rollup_hourly
+WITH deltas AS (
+    SELECT ip, if_index, ts, speed,
+        ts - LAG(ts) OVER w AS elapsed,
+        in_octets - LAG(in_octets) OVER w AS d_in,
+        out_octets - LAG(out_octets) OVER w AS d_out,
+        in_errors - LAG(in_errors) OVER w AS d_in_err,
+        out_errors - LAG(out_errors) OVER w AS d_out_err
+    FROM interface_samples
+    WHERE ts >= :start - :p AND ts < :end
+    WINDOW w AS (PARTITION BY ip, if_index ORDER BY ts)
+),
+corrected AS (
+    SELECT ip, if_index, ts, speed, elapsed,
+        CASE WHEN d_in < 0 THEN d_in + :wrap ELSE d_in END AS d_in,
+        CASE WHEN d_out < 0 THEN d_out + :wrap ELSE d_out END AS d_out,
+        CASE WHEN d_in_err >= 0 THEN d_in_err END AS d_in_err,
+        CASE WHEN d_out_err >= 0 THEN d_out_err END AS d_out_err
+    FROM deltas
+    WHERE ts >= :start
+)
+SELECT ip, if_index, ts - ts % :p, COUNT(*),
+    COALESCE(SUM(CASE WHEN speed = 0 OR d_in * 8 <= speed * elapsed * :slack
+        THEN d_in END), 0),
+    COALESCE(SUM(CASE WHEN speed = 0 OR d_out * 8 <= speed * elapsed * :slack
+        THEN d_out END), 0),
+    COALESCE(SUM(d_in_err), 0),
+    COALESCE(SUM(d_out_err), 0)
+FROM corrected
+GROUP BY ip, if_index, ts - ts % :p
+"""
+
+
+class HistoryStore:
+    """
+    Історія стану пристроїв у SQLite (режим WAL).
+
+    Записувач (колектор або вбудований монітор) ставить у чергу один пакет
+    на цикл опитування, а фоновий потік записує його однією транзакцією.
+    Той самий потік періодично будує годинні агрегати та видаляє старі дані.
+    Читачі (веб-процеси) відкривають власні з'єднання і не блокують запис.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        writer: bool = False,
+        retention_days: int = 7,
+        rollup_retention_days: int = 90,
+        maintenance_interval: int = 300,
+    ):
+        self.path = path
+        self.writer = writer
+        self.retention = retention_days * 86400
+        self.rollup_retention = rollup_retention_days * 86400
+        self.maintenance_interval = maintenance_interval
+        self._local = threading.local()
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue(QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if writer:
+            conn = self._connect()
+            self._create_schema(conn)
+            conn.close()
+            self._thread = threading.Thread(
+                target=self._writer_loop, name="history-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        conn.executescript(SCHEMA)
+        # Бази, створені до появи колонки speed
+        columns = {
+            row[1]
+            for row in conn.execute("PRAGMA table_info(interface_samples)")
+        }
+        if "speed" not in columns:
+            conn.execute(
+                "ALTER TABLE interface_samples"
+                " ADD COLUMN speed INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def _reader(self) -> sqlite3.Connection:
+        """З'єднання для читання, окреме для кожного потоку"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            # Веб-процес може стартувати раніше за колектор
+            self._create_schema(conn)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # --- Запис ---
+
+    def record_cycle(
+        self,
+        ts: int,
+        pings: Sequence[Tuple[str, bool]],
+        transitions: Sequence[Tuple[str, bool]] = (),
+        interfaces: Sequence[Tuple] = (),
+    ):
+        """
+        Ставить у чергу результати одного циклу опитування.
+
+        Args:
+            ts: час циклу (epoch, секунди)
+            pings: [(ip, alive)]
+            transitions: [(ip, alive)] — лише пристрої, що змінили стан
+            interfaces: [(ip, if_index, in_octets, out_octets,
+                          in_errors, out_errors, oper_status, speed)]
+        """
+        if not self.writer:
+            raise RuntimeError("Історія відкрита лише для читання")
+
+        try:
+            self._queue.put_nowait((ts, pings, transitions, interfaces))
+        except queue.Full:
+            logger.warning("Черга запису історії переповнена, цикл пропущено")
+
+    def _writer_loop(self):
+        conn = self._connect()
+        last_maintenance = 0.0
+
+        while True:
+            try:
+                batch = self._queue.get(timeout=self.maintenance_interval)
+            except queue.Empty:
+                batch = ()
+
+            if batch is None:
+                break
+
+            if batch:
+                try:
+                    self._write_batch(conn, *batch)
+                except sqlite3.Error as e:
+                    logger.error("Помилка запису історії: %s", e)
+
+            if (
+                time.monotonic() - last_maintenance
+                >= self.maintenance_interval
+            ):
+                last_maintenance = time.monotonic()
+                try:
+                    self._maintenance(conn, int(time.time()))
+                except sqlite3.Error as e:
+                    logger.error("Помилка обслуговування історії: %s", e)
+
+        conn.close()
+
+    @staticmethod
+    def _write_batch(conn, ts, pings, transitions, interfaces):
+        """Записує цикл однією транзакцією"""
+        with conn:
+            conn.executemany(
+                "INSERT INTO ping_samples (ip, ts, alive) VALUES (?, ?, ?)",
+                [(ip, ts, int(alive)) for ip, alive in pings],
+            )
+            conn.executemany(
+                "INSERT INTO state_transitions (ip, ts, alive) VALUES (?, ?, ?)",
+                [(ip, ts, int(alive)) for ip, alive in transitions],
+            )
+            conn.executemany(
+                "INSERT INTO interface_samples (ip, if_index, ts, in_octets,"
+                " out_octets, in_errors, out_errors, oper_status, speed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(row[0], row[1], ts, *row[2:]) for row in interfaces],
+            )
+
+    def _maintenance(self, conn, now: int):
+        """Будує годинні агрегати та застосовує політику зберігання"""
+        row = conn.execute(
+            "SELECT value FROM meta WHERE key = 'rollup_watermark'"
+        ).fetchone()
+        # Перераховуємо останню годину, щоб врахувати дані, що надійшли пізніше
+        start = max(
+            (row[0] if row else 0) - ROLLUP_PERIOD, now - self.retention
+        )
+        start -= start % ROLLUP_PERIOD
+        end = now - now % ROLLUP_PERIOD
+
+        with conn:
+            if end > start:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ping_rollup_hourly"
+                    " SELECT ip, ts - ts % :p, COUNT(*), SUM(alive)"
+                    " FROM ping_samples WHERE ts >= :start AND ts < :end"
+                    " GROUP BY ip, ts - ts % :p",
+                    {"p": ROLLUP_PERIOD, "start": start, "end": end},
+                )
+                conn.execute(
+                    INTERFACE_ROLLUP_SQL,
+                    {
+                        "p": ROLLUP_PERIOD,
+                        "start": start,
+                        "end": end,
+                        "wrap": COUNTER32_WRAP,
+                        "slack": RESET_RATE_SLACK,
+                    },
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value)"
+                    " VALUES ('rollup_watermark', ?)",
+                    (end,),
+                )
+
+            raw_cutoff = now - self.retention
+            rollup_cutoff = now - self.rollup_retention
+            conn.execute(
+                "DELETE FROM ping_samples WHERE ts < ?", (raw_cutoff,)
+            )
+            conn.execute(
+                "DELETE FROM interface_samples WHERE ts < ?", (raw_cutoff,)
+            )
+            conn.execute(
+                "DELETE FROM state_transitions WHERE ts < ?", (rollup_cutoff,)
+            )
+            conn.execute(
+                "DELETE FROM ping_rollup_hourly WHERE period_ts < ?",
+                (rollup_cutoff,),
+            )
+            conn.execute(
+                "DELETE FROM interface_rollup_hourly WHERE period_ts < ?",
+                (rollup_cutoff,),
+            )
+
+        logger.info("Обслуговування історії виконано (агрегати до %d)", end)
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    # --- Читання ---
+
+    def _query(self, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._reader().execute(sql, params)]
+
+    def ping_history(
+        self, ip: str, start: int, end: int, limit: int = 5000
+    ) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT ts, alive FROM ping_samples"
+            " WHERE ip = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+            (ip, start, end, limit),
+        )
+
+    def transitions(
+        self, ip: str, start: int, end: int, limit: int = 5000
+    ) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT ts, alive FROM state_transitions"
+            " WHERE ip = ? AND ts >= ? AND ts < ? ORDER BY ts LIMIT ?",
+            (ip, start, end, limit),
+        )
+
+    def interface_history(
+        self,
+        ip: str,
+        start: int,
+        end: int,
+        if_index: Optional[int] = None,
+        limit: int = 5000,
+    ) -> List[Dict[str, Any]]:
+        if if_index is None:
+            return self._query(
+                "SELECT if_index, ts, in_octets, out_octets, in_errors,"
+                " out_errors, oper_status FROM interface_samples"
+                " WHERE ip = ? AND ts >= ? AND ts < ?"
+                " ORDER BY if_index, ts LIMIT ?",
+                (ip, start, end, limit),
+            )
+        return self._query(
+            "SELECT if_index, ts, in_octets, out_octets, in_errors,"
+            " out_errors, oper_status FROM interface_samples"
+            " WHERE ip = ? AND if_index = ? AND ts >= ? AND ts < ?"
+            " ORDER BY ts LIMIT ?",
+            (ip, if_index, start, end, limit),
+        )
+
+    def ping_rollups(
+        self, ip: str, start: int, end: int
+    ) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT period_ts, samples, up_samples FROM ping_rollup_hourly"
+            " WHERE ip = ? AND period_ts >= ? AND period_ts < ?"
+            " ORDER BY period_ts",
+            (ip, start, end),
+        )
+
+    def interface_rollups(
+        self, ip: str, start: int, end: int
+    ) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT if_index, period_ts, samples, in_octets_delta,"
+            " out_octets_delta, in_errors_delta, out_errors_delta"
+            " FROM interface_rollup_hourly"
+            " WHERE ip = ? AND period_ts >= ? AND period_ts < ?"
+            " ORDER BY if_index, period_ts",
+            (ip, start, end),
+        )
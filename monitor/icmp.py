@@ -0,0 +1,165 @@
+"""
+Асинхронний ICMP echo на одному сокеті.
+
+Замість процесу ping на кожну адресу всі запити надсилаються через один
+сокет, а відповіді зіставляються за (адреса, sequence). Потрібен або
+непривілейований ICMP-сокет (net.ipv4.ping_group_range), або CAP_NET_RAW;
+інакше використовується системна утиліта ping.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import platform
+import socket
+import struct
+import time
+from typing import Dict, Optional, Tuple
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+ECHO_REQUEST = 8
+ECHO_REPLY = 0
+RECV_BUFFER = 4 * 1024 * 1024
+IS_WINDOWS = platform.system().lower() == "windows"
+
+
+def checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def echo_request(ident: int, seq: int, payload: bytes = b"netwatch") -> bytes:
+    header = struct.pack("!BBHHH", ECHO_REQUEST, 0, 0, ident, seq)
+    return (
+        struct.pack(
+            "!BBHHH", ECHO_REQUEST, 0, checksum(header + payload), ident, seq
+        )
+        + payload
+    )
+
+
+def _open_socket() -> Tuple[Optional[socket.socket], bool]:
+    """ICMP-сокет і ознака raw (відповіді містять IP-заголовок)"""
+    for kind, raw in ((socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)):
+        try:
+            sock = socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+        except (PermissionError, OSError):
+            continue
+        sock.setblocking(False)
+        try:
+            # Тисячі відповідей одночасно не мають губитися в черзі сокета
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+        except OSError:
+            pass
+        return sock, raw
+    return None, False
+
+
+class AsyncPinger:
+    """
+    Пул одночасних ICMP echo.
+
+        async with AsyncPinger() as pinger:
+            rtt = await pinger.ping("10.0.0.1", timeout=1.0)  # секунди або None
+    """
+
+    def __init__(self):
+        self._sock: Optional[socket.socket] = None
+        self._raw = False
+        self._ident = os.getpid() & 0xFFFF
+        self._seq = itertools.count(1)
+        self._pending: Dict[Tuple[str, int], Tuple[float, asyncio.Future]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def native(self) -> bool:
+        """Чи працює власний ICMP-сокет (інакше — утиліта ping)"""
+        return self._sock is not None
+
+    async def __aenter__(self) -> "AsyncPinger":
+        self._loop = asyncio.get_running_loop()
+        self._sock, self._raw = _open_socket()
+        if self._sock is None:
+            logger.warning(
+                "ICMP-сокет недоступний (потрібен ping_group_range або CAP_NET_RAW), "
+                "використовується утиліта ping"
+            )
+        else:
+            self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._sock is not None:
+            self._loop.remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    def _on_readable(self):
+        while True:
+            try:
+                data, addr = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug("ICMP: %s", e)
+                return
+            if self._raw:
+                data = data[(data[0] & 0x0F) * 4 :]  # Пропускаємо IP-заголовок
+            if len(data) < 8:
+                continue
+            kind, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+            # Для непривілейованого сокета ident підставляє ядро
+            if kind != ECHO_REPLY or (self._raw and ident != self._ident):
+                continue
+            sent_at, future = self._pending.get((addr[0], seq), (None, None))
+            if future is not None and not future.done():
+                future.set_result(time.monotonic() - sent_at)
+
+    async def ping(self, host: str, timeout: float = 1.0) -> Optional[float]:
+        """RTT у секундах або None, якщо відповіді немає"""
+        if self._sock is None:
+            return await self._ping_process(host, timeout)
+
+        seq = next(self._seq) & 0xFFFF
+        key = (host, seq)
+        future = self._loop.create_future()
+        self._pending[key] = (time.monotonic(), future)
+        try:
+            self._sock.sendto(echo_request(self._ident, seq), (host, 0))
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            self._pending.pop(key, None)
+
+    @staticmethod
+    async def _ping_process(host: str, timeout: float) -> Optional[float]:
+        if IS_WINDOWS:
+            cmd = ["ping", "-n", "1", "-w", str(int(timeout * 1000)), host]
+        else:
+            cmd = ["ping", "-c", "1", "-W", str(max(int(timeout), 1)), host]
+        started = time.monotonic()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            returncode = await asyncio.wait_for(proc.wait(), timeout + 1)
+        except (asyncio.TimeoutError, FileNotFoundError, OSError):
+            return None
+        return time.monotonic() - started if returncode == 0 else None
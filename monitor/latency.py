@@ -0,0 +1,209 @@
+"""
+Якість зв'язку з пристроями: серії ICMP echo та ковзні вікна RTT/jitter/втрат.
+
+Кожного циклу пристрою надсилається короткий залп із кількох echo через
+спільний сокет AsyncPinger. Із залпу обчислюються min/avg/max RTT, jitter
+(mdev, як у ping) та відсоток втрат; останні LATENCY_WINDOW циклів кожного
+пристрою зберігаються у кільцевих типізованих масивах.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from monitor.icmp import AsyncPinger
+
+BURST_SIZE = 5  # Echo у залпі
+BURST_INTERVAL = 0.2  # Пауза між echo залпу, секунд
+ECHO_TIMEOUT = 1.0  # Очікування відповіді на echo, секунд
+LATENCY_WINDOW = 60  # Циклів у ковзному вікні
+
+# Пороги стану DEGRADED (досяжний, але з поганою якістю зв'язку)
+DEGRADED_RTT_MS = 150.0
+DEGRADED_JITTER_MS = 30.0
+DEGRADED_LOSS = 20.0  # %
+
+
+@dataclass(frozen=True)
+class BurstStats:
+    """Результат одного залпу; RTT та jitter у мілісекундах"""
+
+    sent: int
+    received: int
+    rtt_min: Optional[float]
+    rtt_avg: Optional[float]
+    rtt_max: Optional[float]
+    jitter: Optional[float]
+    loss: float  # %
+
+    @classmethod
+    def from_rtts(cls, rtts: Sequence[Optional[float]]) -> "BurstStats":
+        """Статистика з RTT окремих echo (секунди; None — відповіді немає)"""
+        replies = [rtt * 1000 for rtt in rtts if rtt is not None]
+        sent = len(rtts)
+        loss = (
+            round(100.0 * (sent - len(replies)) / sent, 1) if sent else 100.0
+        )
+        if not replies:
+            return cls(sent, 0, None, None, None, None, loss)
+        avg = sum(replies) / len(replies)
+        # mdev = sqrt(E[rtt²] - E[rtt]²), як у iputils ping
+        mdev = math.sqrt(
+            max(sum(r * r for r in replies) / len(replies) - avg * avg, 0.0)
+        )
+        return cls(
+            sent,
+            len(replies),
+            round(min(replies), 2),
+            round(avg, 2),
+            round(max(replies), 2),
+            round(mdev, 2),
+            loss,
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.received > 0
+
+    def degraded(
+        self,
+        rtt_ms: float = DEGRADED_RTT_MS,
+        jitter_ms: float = DEGRADED_JITTER_MS,
+        loss: float = DEGRADED_LOSS,
+    ) -> bool:
+        """Досяжний, але затримка, jitter або втрати перевищують пороги"""
+        return self.alive and (
+            self.loss >= loss
+            or self.rtt_avg >= rtt_ms
+            or self.jitter >= jitter_ms
+        )
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class LatencyWindow:
+    """
+    Кільце останніх залпів пристрою: avg RTT, jitter (float32) та втрати (байт).
+
+    Залп без відповідей зберігається як NaN у RTT/jitter і не впливає на
+    середні значення затримки, лише на втрати.
+    """
+
+    __slots__ = ("rtt", "jitter", "loss", "head", "count")
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self.rtt = array("f", [math.nan]) * size
+        self.jitter = array("f", [math.nan]) * size
+        self.loss = array("B", bytes(size))
+        self.head = 0
+        self.count = 0
+
+    def add(self, stats: BurstStats):
+        i = self.head
+        self.rtt[i] = stats.rtt_avg if stats.rtt_avg is not None else math.nan
+        self.jitter[i] = stats.jitter if stats.jitter is not None else math.nan
+        self.loss[i] = int(round(stats.loss))
+        self.head = (i + 1) % len(self.rtt)
+        self.count = min(self.count + 1, len(self.rtt))
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        if not self.count:
+            return {
+                "samples": 0,
+                "rtt_avg": None,
+                "rtt_max": None,
+                "jitter": None,
+                "loss": None,
+            }
+        # До заповнення кільця дійсні лише перші count елементів
+        rtts = [
+            value for value in self.rtt[: self.count] if not math.isnan(value)
+        ]
+        jitters = [
+            value
+            for value in self.jitter[: self.count]
+            if not math.isnan(value)
+        ]
+        return {
+            "samples": self.count,
+            "rtt_avg": round(sum(rtts) / len(rtts), 2) if rtts else None,
+            "rtt_max": round(max(rtts), 2) if rtts else None,
+            "jitter": (
+                round(sum(jitters) / len(jitters), 2) if jitters else None
+            ),
+            "loss": round(sum(self.loss[: self.count]) / self.count, 1),
+        }
+
+
+class LatencyTracker:
+    """Останній залп і ковзне вікно якості зв'язку для кожного пристрою"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._windows: Dict[str, LatencyWindow] = {}
+        self._last: Dict[str, BurstStats] = {}
+        self._probed_at: Dict[str, float] = {}  # time.monotonic() залпу
+        self._lock = threading.Lock()
+
+    def record(self, ip: str, stats: BurstStats):
+        with self._lock:
+            window = self._windows.get(ip)
+            if window is None:
+                window = self._windows[ip] = LatencyWindow(self.window)
+            window.add(stats)
+            self._last[ip] = stats
+            self._probed_at[ip] = time.monotonic()
+
+    def due(self, ip: str, interval: float) -> bool:
+        """Чи минуло interval секунд від останнього залпу пристрою"""
+        with self._lock:
+            probed_at = self._probed_at.get(ip)
+        return probed_at is None or time.monotonic() - probed_at >= interval
+
+    def device(self, ip: str) -> Optional[Dict]:
+        """{"last": залп, "window": зведення вікна} або None"""
+        with self._lock:
+            last = self._last.get(ip)
+            if last is None:
+                return None
+            return {
+                "last": last.to_dict(),
+                "window": self._windows[ip].summary(),
+            }
+
+    def forget(self, ips: Iterable[str]):
+        with self._lock:
+            for ip in ips:
+                self._windows.pop(ip, None)
+                self._last.pop(ip, None)
+                self._probed_at.pop(ip, None)
+
+
+async def _burst(
+    pinger: AsyncPinger, ip: str, count: int, interval: float, timeout: float
+) -> BurstStats:
+    tasks = []
+    for i in range(count):
+        if i:
+            await asyncio.sleep(interval)
+        tasks.append(asyncio.ensure_future(pinger.ping(ip, timeout)))
+    return BurstStats.from_rtts(await asyncio.gather(*tasks))
+
+
+async def probe_bursts(
+    ips: Sequence[str],
+    count: int = BURST_SIZE,
+    interval: float = BURST_INTERVAL,
+    timeout: float = ECHO_TIMEOUT,
+) -> Dict[str, BurstStats]:
+    """Паралельні залпи до всіх адрес через один ICMP-сокет"""
+    async with AsyncPinger() as pinger:
+        results: List[BurstStats] = await asyncio.gather(
+            *(_burst(pinger, ip, count, interval, timeout) for ip in ips)
+        )
+    return dict(zip(ips, results))
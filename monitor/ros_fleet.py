@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import env
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+FLEET_CONCURRENCY = 8  # Одночасно опитуваних роутерів
+CAP_READY_STATES = {"ok"}
+
+Fetch = Callable[[str, str, str], Awaitable[Dict]]
+
+
+def router_credentials(device: Dict) -> Optional[Tuple[str, str]]:
+    """
+    Облікові дані RouterOS API пристрою з інвентаря.
+
+    Поле "routeros" — назва змінної середовища у форматі "user,password"
+    (пароль не зберігається в config.py) або True — облікові дані
+    ROOT_ROUTER. Для самого ROOT_ROUTER поле не обов'язкове.
+    """
+    root = env.list("ROOT_ROUTER", [])
+    source = device.get("routeros")
+    if isinstance(source, str):
+        value = env.list(source, [])
+        if len(value) >= 2:
+            return value[0], value[1]
+        return None
+    if len(root) >= 3 and (source is True or root[0] == device["ip"]):
+        return root[1], root[2]
+    return None
+
+
+def ros_devices(devices: Iterable[Dict]) -> List[Dict]:
+    """Пристрої інвентаря, позначені як RouterOS (поле "routeros" або ROOT_ROUTER)"""
+    root = env.list("ROOT_ROUTER", [])
+    return [
+        device
+        for device in devices
+        if device.get("routeros") or (root and root[0] == device["ip"])
+    ]
+
+
+def _int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def summarize_router(device: Dict, data: Dict) -> Dict:
+    """Короткий підсумок роутера з відповіді get_mikrotik_data"""
+    summary = {"ip": device["ip"], "name": device.get("name", device["ip"])}
+    if not data.get("status"):
+        return {**summary, "status": False, "error": data.get("error")}
+
+    system = data.get("system", {})
+    total_memory = _int(system.get("total_memory"))
+    used_memory = total_memory - _int(system.get("free_memory"))
+    interfaces = data.get("interfaces", [])
+    caps = data.get("caps", []) + data.get("caps2", [])
+
+    return {
+        **summary,
+        "status": True,
+        "partial": data.get("partial", False),
+        "stale": data.get("stale", False),
+        "model": system.get("model"),
+        "version": system.get("version"),
+        "uptime": system.get("uptime"),
+        "cpu_load": _int(system.get("cpu_load"), None),
+        "memory": {
+            "total": total_memory,
+            "used": used_memory,
+            "percent": (
+                round(used_memory / total_memory * 100, 1)
+                if total_memory
+                else None
+            ),
+        },
+        "temperature": system.get("temperature"),
+        "interfaces": {
+            "total": len(interfaces),
+            "running": sum(
+                1 for iface in interfaces if iface.get("running") == "true"
+            ),
+            "disabled": sum(
+                1 for iface in interfaces if iface.get("disabled") == "true"
+            ),
+            # Швидкості є лише у даних з підписок (monitor-traffic)
+            "rx_bps": sum(
+                _int(iface.get("rx-bits-per-second")) for iface in interfaces
+            ),
+            "tx_bps": sum(
+                _int(iface.get("tx-bits-per-second")) for iface in interfaces
+            ),
+        },
+        "caps": {
+            "total": len(caps),
+            "ok": sum(
+                1
+                for cap in caps
+                if str(cap.get("state", "")).lower() in CAP_READY_STATES
+            ),
+        },
+    }
+
+
+async def collect_fleet(
+    devices: Iterable[Dict], fetch: Fetch, concurrency: int = FLEET_CONCURRENCY
+) -> List[Dict]:
+    """
+    Опитує всі роутери паралельно (не більше concurrency одночасно).
+
+    Загальний час — приблизно час найповільнішого роутера, а не сума.
+    Помилка одного роутера потрапляє в його підсумок і не зупиняє інших.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def collect(device: Dict) -> Dict:
+        credentials = router_credentials(device)
+        if credentials is None:
+            return {
+                **summarize_router(device, {"status": False}),
+                "error": f"Облікові дані {device.get('routeros')} не задано",
+            }
+        user, password = credentials
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                data = await fetch(device["ip"], user, password)
+            except Exception as e:
+                logger.warning(
+                    "Флот RouterOS: %s не опитано: %s", device["ip"], e
+                )
+                data = {"status": False, "error": str(e)}
+            elapsed = time.monotonic() - started
+        summary = summarize_router(device, data)
+        summary["elapsed"] = round(elapsed, 3)
+        return summary
+
+    return list(await asyncio.gather(*(collect(device) for device in devices)))
+
+
+def fleet_totals(routers: List[Dict]) -> Dict:
+    online = [router for router in routers if router["status"]]
+    loads = [
+        router["cpu_load"]
+        for router in online
+        if router["cpu_load"] is not None
+    ]
+    return {
+        "routers": len(routers),
+        "online": len(online),
+        "offline": len(routers) - len(online),
+        "cpu_load_avg": round(sum(loads) / len(loads), 1) if loads else None,
+        "cpu_load_max": max(loads) if loads else None,
+        "caps_total": sum(router["caps"]["total"] for router in online),
+        "caps_ok": sum(router["caps"]["ok"] for router in online),
+        "interfaces_running": sum(
+            router["interfaces"]["running"] for router in online
+        ),
+    }
@@ -0,0 +1,549 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import ROS_RESOURCE_INTERVAL, ROS_SUBSCRIPTION_IDLE
+from protocols import routeros
+from protocols.breaker import SOURCE_ROUTEROS, CircuitOpenError, breakers
+from protocols.ros_stream import (
+    REPLY_DONE,
+    REPLY_RE,
+    REPLY_TRAP,
+    Reply,
+    StreamSession,
+)
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+TABLE = "table"  # follow-only + повний print для синхронізації, ключ .id
+PERIODIC = "periodic"  # print з =interval=, роутер сам повторює відповідь
+ONCE = "once"  # звичайний print при кожному (пере)підключенні
+
+MAX_BACKOFF = 60.0  # Максимальна пауза між спробами перепідключення, секунд
+DEAD_VALUES = {"yes", "true"}
+TRAFFIC_FIELDS = ("name", "rx-bits-per-second", "tx-bits-per-second")
+
+
+class Subscription:
+    """Опис потоку: ключ у моделі, запит та режим"""
+
+    def __init__(
+        self, name: str, query: routeros.Query, mode: str, key: str = ".id"
+    ):
+        self.name = name
+        self.query = query
+        self.mode = mode
+        self.key = key
+
+
+# Ті самі розділи, що й MIKROTIK_QUERIES дашборду. Оренди DHCP
+# підписуються повністю (з проекцією): фільтр ?status=bound на follow
+# не повідомив би про оренди, що вийшли зі стану bound.
+SUBSCRIPTIONS = (
+    Subscription(
+        "system_resource",
+        routeros.Query("/system/resource").select(
+            "uptime", "version", "cpu-load", "total-memory", "free-memory"
+        ),
+        PERIODIC,
+        key="",
+    ),
+    Subscription(
+        "routerboard",
+        routeros.Query("/system/routerboard").select("model"),
+        ONCE,
+    ),
+    Subscription(
+        "health",
+        routeros.Query("/system/health")
+        .select("name", "value")
+        .where(name="temperature"),
+        PERIODIC,
+        key="name",
+    ),
+    Subscription(
+        "interfaces",
+        routeros.Query("/interface").select(
+            ".id",
+            "name",
+            "type",
+            "comment",
+            "mac-address",
+            "running",
+            "disabled",
+            "rx-byte",
+            "tx-byte",
+        ),
+        TABLE,
+    ),
+    Subscription(
+        "dhcp_leases",
+        routeros.Query("/ip/dhcp-server/lease").select(
+            ".id",
+            "address",
+            "mac-address",
+            "host-name",
+            "status",
+            "expires-after",
+            "comment",
+        ),
+        TABLE,
+    ),
+    Subscription(
+        "caps",
+        routeros.Query("/caps-man/remote-cap").select(
+            ".id", "identity", "base-mac", "board", "state", "version"
+        ),
+        TABLE,
+    ),
+    Subscription(
+        "caps2",
+        routeros.Query("/interface/wifi/capsman/remote-cap").select(
+            ".id",
+            "identity",
+            "base-mac",
+            "board-name",
+            "state",
+            "version",
+            "uptime",
+        ),
+        TABLE,
+    ),
+)
+
+
+class RouterModel:
+    """
+    Стан роутера в пам'яті, який наповнюють потоки підписок.
+
+    Таблиці замінюються атомарно при кожній (пере)синхронізації, тож
+    після перепідключення не лишається рядків, видалених за час розриву.
+    До першої синхронізації модель не готова (ready = False); після
+    розриву вона продовжує віддавати останні дані з ознакою stale.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        self.tables: Dict[str, Dict[str, Dict]] = {}
+        self.traffic: Dict[str, Dict] = {}
+        self.unavailable: Dict[str, str] = {}
+        self.connected = False
+        self.updated_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._synced = set()
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._synced.issuperset(self.names)
+
+    def replace(self, name: str, rows: Dict[str, Dict]):
+        with self._lock:
+            self.tables[name] = rows
+            self.unavailable.pop(name, None)
+            self._synced.add(name)
+            self.updated_at = time.time()
+
+    def apply(self, name: str, key: str, attrs: Dict[str, str]):
+        """Інкрементне оновлення рядка (.dead — рядок видалено)"""
+        row_key = attrs.get(key, "") if key else ""
+        with self._lock:
+            table = self.tables.setdefault(name, {})
+            if attrs.get(".dead") in DEAD_VALUES:
+                table.pop(row_key, None)
+            else:
+                table.setdefault(row_key, {}).update(attrs)
+            self._synced.add(name)
+            self.updated_at = time.time()
+
+    def mark_unavailable(self, name: str, message: str):
+        """Розділ не підтримується роутером (наприклад, немає пакета caps-man)"""
+        with self._lock:
+            self.tables[name] = {}
+            self.unavailable[name] = message
+            self._synced.add(name)
+
+    def set_traffic(self, attrs: Dict[str, str]):
+        with self._lock:
+            self.traffic[attrs.get("name", "")] = attrs
+
+    def replace_traffic(self, names: Sequence[str]):
+        """Лишає швидкості лише інтерфейсів, що досі існують"""
+        with self._lock:
+            self.traffic = {
+                name: row
+                for name, row in self.traffic.items()
+                if name in names
+            }
+
+    def interface_names(self) -> List[str]:
+        with self._lock:
+            rows = self.tables.get("interfaces", {}).values()
+            return sorted(row["name"] for row in rows if row.get("name"))
+
+    def set_connected(self, connected: bool, error: Optional[str] = None):
+        with self._lock:
+            self.connected = connected
+            self.error = error
+
+    def results(self) -> Dict[str, List[Dict]]:
+        """Розділи у форматі відповідей print (як у MIKROTIK_QUERIES)"""
+        with self._lock:
+            results = {
+                name: [dict(row) for row in rows.values()]
+                for name, rows in self.tables.items()
+            }
+            traffic = {name: dict(row) for name, row in self.traffic.items()}
+
+        for row in results.get("interfaces", []):
+            rates = traffic.get(row.get("name"), {})
+            row["rx-bits-per-second"] = rates.get("rx-bits-per-second")
+            row["tx-bits-per-second"] = rates.get("tx-bits-per-second")
+        results["dhcp_leases"] = [
+            lease
+            for lease in results.get("dhcp_leases", [])
+            if lease.get("status") == "bound"
+        ]
+        return results
+
+
+class RouterSubscriber:
+    """
+    Один сеанс RouterOS API на роутер, що тримає відкритими всі підписки.
+
+    Після розриву з'єднання підключається повторно з експоненційною
+    паузою (з урахуванням запобіжника пристрою) і синхронізує модель
+    заново. Якщо модель ніхто не читає idle_timeout секунд, потік
+    завершується, щоб не тримати з'єднання з роутером даремно.
+    """
+
+    def __init__(
+        self,
+        ip: str,
+        user: str,
+        password: str,
+        subscriptions: Sequence[Subscription] = SUBSCRIPTIONS,
+        resource_interval: float = ROS_RESOURCE_INTERVAL,
+        idle_timeout: float = ROS_SUBSCRIPTION_IDLE,
+        on_stop: Optional[Callable[["RouterSubscriber"], None]] = None,
+    ):
+        self.ip = ip
+        self.user = user
+        self.password = password
+        self.subscriptions = list(subscriptions)
+        self.resource_interval = resource_interval
+        self.idle_timeout = idle_timeout
+        self.on_stop = on_stop
+        self.model = RouterModel([sub.name for sub in self.subscriptions])
+        self.last_used = time.monotonic()
+        self._handlers: Dict[str, Callable[[Reply], None]] = {}
+        self._traffic_tag: Optional[str] = None
+        self._traffic_names: List[str] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Життєвий цикл ---
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name=f"ros-live-{self.ip}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self.last_used > self.idle_timeout
+
+    def _run(self):
+        backoff = 1.0
+        try:
+            while not self._stop.is_set() and not self._idle():
+                try:
+                    api = routeros.connect(self.ip, self.user, self.password)
+                except CircuitOpenError as e:
+                    self.model.set_connected(False, str(e))
+                    self._stop.wait(max(e.retry_in, 1.0))
+                    continue
+                except Exception as e:
+                    logger.warning(
+                        "Підписки %s: підключення не вдалося: %s", self.ip, e
+                    )
+                    self.model.set_connected(False, str(e))
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, MAX_BACKOFF)
+                    continue
+
+                session = StreamSession(api, self.resource_interval * 3 + 5)
+                updated_at = self.model.updated_at
+                try:
+                    self._serve(session)
+                except Exception as e:
+                    logger.warning(
+                        "Підписки %s: з'єднання втрачено: %s", self.ip, e
+                    )
+                    self.model.set_connected(False, str(e))
+                    if self.model.updated_at != updated_at:
+                        # Сеанс встиг отримати дані — пауза знову мінімальна
+                        backoff = 1.0
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, MAX_BACKOFF)
+                finally:
+                    session.close()
+        finally:
+            self.model.set_connected(False, self.model.error)
+            logger.info("Підписки %s зупинено", self.ip)
+            if self.on_stop is not None:
+                self.on_stop(self)
+
+    def _serve(self, session: StreamSession):
+        self._handlers = {}
+        self._traffic_tag = None
+        self._traffic_names = []
+        self.model.set_connected(True)
+        for subscription in self.subscriptions:
+            self._subscribe(session, subscription)
+
+        breaker = breakers.get(self.ip, SOURCE_ROUTEROS)
+        while not self._stop.is_set() and not self._idle():
+            reply = session.read()
+            # Потік відповідей підписок підтверджує живість роутера
+            breaker.record_success()
+            handler = self._handlers.get(reply.tag)
+            if handler is not None:
+                handler(reply)
+
+    # --- Підписки ---
+
+    def _subscribe(self, session: StreamSession, subscription: Subscription):
+        words = subscription.query.words()
+        if subscription.mode == ONCE:
+            self._subscribe_once(session, subscription, words)
+        elif subscription.mode == PERIODIC:
+            self._subscribe_periodic(session, subscription, words)
+        else:
+            self._subscribe_table(session, subscription, words)
+
+    def _subscribe_once(self, session, subscription, words):
+        rows: Dict[str, Dict] = {}
+        name = subscription.name
+
+        def handle(reply: Reply):
+            if reply.kind == REPLY_RE:
+                rows[reply.attrs.get(subscription.key, "")] = reply.attrs
+            elif reply.kind == REPLY_TRAP:
+                self.model.mark_unavailable(
+                    name, reply.attrs.get("message", "")
+                )
+            elif reply.kind == REPLY_DONE:
+                if name not in self.model.unavailable:
+                    self.model.replace(name, rows)
+                self._handlers.pop(reply.tag, None)
+
+        self._handlers[session.send(words)] = handle
+
+    def _subscribe_periodic(self, session, subscription, words):
+        name = subscription.name
+
+        def handle(reply: Reply):
+            if reply.kind == REPLY_RE:
+                self.model.apply(name, subscription.key, reply.attrs)
+            elif reply.kind == REPLY_TRAP:
+                self.model.mark_unavailable(
+                    name, reply.attrs.get("message", "")
+                )
+
+        interval = f"=interval={self.resource_interval:g}"
+        self._handlers[session.send((*words, interval))] = handle
+
+    def _subscribe_table(self, session, subscription, words):
+        """
+        Синхронізація таблиці без втрати змін: спершу вмикається
+        follow-only, потім повний print. Зміни, що надійшли до кінця
+        print, буферизуються й застосовуються поверх знімка.
+        """
+        name = subscription.name
+        snapshot: Dict[str, Dict] = {}
+        buffered: List[Dict[str, str]] = []
+        state = {"syncing": True, "failed": False}
+
+        def on_change(attrs: Dict[str, str]):
+            self.model.apply(name, subscription.key, attrs)
+            if name == "interfaces":
+                self._refresh_traffic(session)
+
+        def handle_follow(reply: Reply):
+            if reply.kind == REPLY_RE:
+                if state["syncing"]:
+                    buffered.append(reply.attrs)
+                else:
+                    on_change(reply.attrs)
+            elif reply.kind == REPLY_TRAP:
+                fail(reply)
+
+        def handle_print(reply: Reply):
+            if reply.kind == REPLY_RE:
+                snapshot[reply.attrs.get(subscription.key, "")] = reply.attrs
+            elif reply.kind == REPLY_TRAP:
+                fail(reply)
+            elif reply.kind == REPLY_DONE:
+                self._handlers.pop(reply.tag, None)
+                if state["failed"]:
+                    return
+                self.model.replace(name, snapshot)
+                state["syncing"] = False
+                for attrs in buffered:
+                    self.model.apply(name, subscription.key, attrs)
+                buffered.clear()
+                if name == "interfaces":
+                    self._refresh_traffic(session)
+
+        def fail(reply: Reply):
+            if state["failed"]:
+                return
+            state["failed"] = True
+            self.model.mark_unavailable(name, reply.attrs.get("message", ""))
+            for tag in (follow_tag, print_tag):
+                self._handlers.pop(tag, None)
+            session.cancel(follow_tag)
+
+        follow_tag = session.send((*words, "=follow-only="))
+        self._handlers[follow_tag] = handle_follow
+        print_tag = session.send(words)
+        self._handlers[print_tag] = handle_print
+
+    def _refresh_traffic(self, session: StreamSession):
+        """Перезапускає monitor-traffic, якщо змінився набір інтерфейсів"""
+        names = self.model.interface_names()
+        if names == self._traffic_names:
+            return
+        if self._traffic_tag is not None:
+            self._handlers.pop(self._traffic_tag, None)
+            session.cancel(self._traffic_tag)
+            self._traffic_tag = None
+        self._traffic_names = names
+        self.model.replace_traffic(names)
+        if not names:
+            return
+
+        def handle(reply: Reply):
+            if reply.kind == REPLY_RE:
+                self.model.set_traffic(reply.attrs)
+
+        self._traffic_tag = session.send(
+            (
+                "/interface/monitor-traffic",
+                "=interface=" + ",".join(names),
+                "=.proplist=" + ",".join(TRAFFIC_FIELDS),
+            )
+        )
+        self._handlers[self._traffic_tag] = handle
+
+
+class RouterSubscriptions:
+    """
+    Пул підписок: не більше одного сеансу на роутер.
+
+    Пулом керує лише процес, що опитує пристрої (колектор або монітор
+    у процесі веб-сервера): retain() щоциклу тримає сеанси RouterOS-пристроїв
+    свого шарду, а snapshot() публікується у знімку стану флоту, тож
+    кількість веб-воркерів не множить з'єднання з роутерами.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, RouterSubscriber] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ip: str, user: str, password: str) -> RouterSubscriber:
+        """Повертає (запускаючи за потреби) підписки роутера"""
+        with self._lock:
+            subscriber = self._subscribers.get(ip)
+            if subscriber is None or not subscriber.alive:
+                subscriber = RouterSubscriber(
+                    ip, user, password, on_stop=self._forget
+                )
+                self._subscribers[ip] = subscriber
+                subscriber.start()
+            subscriber.touch()
+            return subscriber
+
+    def _forget(self, subscriber: RouterSubscriber):
+        with self._lock:
+            if self._subscribers.get(subscriber.ip) is subscriber:
+                del self._subscribers[subscriber.ip]
+
+    def retain(self, routers: Dict[str, Tuple[str, str]]):
+        """
+        Тримає сеанси лише вказаних роутерів {ip: (user, password)}.
+
+        Сеанси роутерів, що вийшли з шарду, зупиняються одразу, не
+        чекаючи ROS_SUBSCRIPTION_IDLE.
+        """
+        with self._lock:
+            released = [
+                subscriber
+                for ip, subscriber in self._subscribers.items()
+                if ip not in routers
+            ]
+        for subscriber in released:
+            subscriber.stop()
+        for ip, (user, password) in routers.items():
+            self.get(ip, user, password)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Дані моделей для знімка: {ip: {...}}. Роутери, чия перша
+        синхронізація ще не завершилася, пропускаються (тоді дашборд
+        опитує роутер звичайним print).
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        views = {}
+        for subscriber in subscribers:
+            model = subscriber.model
+            if not model.ready:
+                continue
+            views[subscriber.ip] = {
+                "results": model.results(),
+                "connected": model.connected,
+                "error": model.error,
+                "unavailable": dict(model.unavailable),
+                "updated_at": model.updated_at,
+            }
+        return views
+
+    def stop_all(self):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for subscriber in subscribers:
+            subscriber.stop()
+
+
+def merge_views(sections: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Об'єднує моделі роутерів зі знімків колекторів (свіжіша перемагає)"""
+    merged: Dict[str, Dict] = {}
+    for views in sections:
+        for ip, view in views.items():
+            current = merged.get(ip)
+            if current is None or (view["updated_at"] or 0) > (
+                current["updated_at"] or 0
+            ):
+                merged[ip] = view
+    return merged
+
+
+subscriptions = RouterSubscriptions()
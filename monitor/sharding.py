@@ -0,0 +1,232 @@
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from monitor.analytics import merge_summaries
+from monitor.ros_live import merge_views
+from monitor.snapshot import EMPTY_SNAPSHOT, FleetSnapshot, MmapSnapshotStore
+from monitor.topn import merge_tops
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = ".snapshot"
+VIRTUAL_NODES = 128  # Кількість віртуальних вузлів на колектор
+RESCAN_INTERVAL = 1.0  # Як часто перечитувати вміст каталогу, секунд
+
+
+def _hash(key: str) -> int:
+    """Стабільний 64-бітний хеш (не залежить від PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+def snapshot_path(directory: str, node_id: str) -> str:
+    """Шлях до файлу знімка конкретного колектора"""
+    return os.path.join(directory, f"{node_id}{SNAPSHOT_SUFFIX}")
+
+
+class HashRing:
+    """
+    Консистентне хешування IP-адрес пристроїв між колекторами.
+
+    При додаванні/видаленні колектора переносяться лише ~1/N пристроїв.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = VIRTUAL_NODES):
+        self.nodes = tuple(sorted(set(nodes)))
+        points = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(replicas)
+        )
+        self._keys = [key for key, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """Повертає колектор, відповідальний за ключ"""
+        if not self._keys:
+            return None
+        pos = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[pos]
+
+    def assign(
+        self,
+        devices: List[Dict[str, Any]],
+        node_id: str,
+        key: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        Відбирає пристрої, що належать вказаному колектору.
+
+        key перетворює IP на ключ хешування (наприклад, корінь гілки
+        топології, щоб уся гілка опитувалась одним колектором).
+        """
+        key = key or (lambda ip: ip)
+        return [d for d in devices if self.owner(key(d["ip"])) == node_id]
+
+
+class ShardDirectory:
+    """
+    Читач усіх знімків колекторів у спільному каталозі.
+
+    Колектор вважається живим, якщо його знімок оновлювався не пізніше ttl
+    секунд тому. Використовується як колекторами (визначення складу кільця),
+    так і веб-процесом (об'єднання знімків).
+
+    Каталог перечитується фоновим потоком кожні RESCAN_INTERVAL секунд;
+    перелік читачів замінюється цілим словником, тож read_all не бере
+    блокувань і не звертається до файлової системи.
+    """
+
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+        self._readers: Dict[str, MmapSnapshotStore] = {}
+        self._stop = threading.Event()
+        self.rescan()
+        self._thread = threading.Thread(
+            target=self._rescan_loop, name="shard-rescan", daemon=True
+        )
+        self._thread.start()
+
+    def rescan(self):
+        """Оновлює перелік файлів знімків у каталозі"""
+        try:
+            names = {
+                name[: -len(SNAPSHOT_SUFFIX)]
+                for name in os.listdir(self.directory)
+                if name.endswith(SNAPSHOT_SUFFIX)
+            }
+        except FileNotFoundError:
+            names = set()
+
+        readers = dict(self._readers)
+        for node_id in set(readers) - names:
+            readers.pop(node_id).close()
+        # Перезапущений колектор створює новий файл під тим самим іменем
+        for node_id in names & set(readers):
+            if readers[node_id].replaced():
+                readers.pop(node_id).close()
+        for node_id in names - set(readers):
+            readers[node_id] = MmapSnapshotStore(
+                snapshot_path(self.directory, node_id)
+            )
+        self._readers = readers
+
+    def _rescan_loop(self):
+        while not self._stop.wait(RESCAN_INTERVAL):
+            try:
+                self.rescan()
+            except OSError as e:
+                logger.warning("Не вдалося перечитати каталог знімків: %s", e)
+
+    def read_all(self) -> Dict[str, FleetSnapshot]:
+        """Повертає {node_id: знімок} для всіх живих колекторів"""
+        now = time.time()
+        result = {}
+        for node_id, reader in self._readers.items():
+            snapshot = reader.read()
+            if not snapshot.version:
+                continue
+            if now - snapshot.published_at > self.ttl:
+                continue
+            result[node_id] = snapshot
+        return result
+
+    def live_nodes(self) -> List[str]:
+        return sorted(self.read_all())
+
+    def close(self):
+        self._stop.set()
+
+
+class ShardedSnapshotReader:
+    """
+    Об'єднує знімки всіх колекторів у єдиний знімок флоту для веб-процесу.
+
+    Злиття виконується лише коли змінюється версія хоча б одного з колекторів.
+    Під час ребалансування пристрій може бути в двох знімках — береться
+    свіжіший.
+    """
+
+    def __init__(self, directory: str, ttl: float):
+        self.shards = ShardDirectory(directory, ttl)
+        # (версії знімків колекторів, об'єднаний знімок)
+        self._merged: Tuple[Tuple, FleetSnapshot] = ((), EMPTY_SNAPSHOT)
+        self._lock = threading.Lock()  # Лише для злиття
+
+    def read(self) -> FleetSnapshot:
+        shards = self.shards.read_all()
+        versions = tuple(sorted((n, s.version) for n, s in shards.items()))
+        merged_versions, merged = self._merged
+        if versions == merged_versions:
+            return merged
+
+        with self._lock:
+            merged_versions, merged = self._merged
+            if versions == merged_versions:
+                return merged
+
+            devices: Dict[str, Any] = {}
+            owners: Dict[str, float] = {}
+            for node_id, snapshot in sorted(shards.items()):
+                for ip, device in snapshot.by_ip.items():
+                    if snapshot.published_at >= owners.get(ip, 0):
+                        devices[ip] = device
+                        owners[ip] = snapshot.published_at
+
+            merged = {
+                "devices": devices,
+                "published_at": max(
+                    (snapshot.published_at for snapshot in shards.values()),
+                    default=0,
+                ),
+                "nodes": sorted(shards),
+            }
+            analytics = merge_summaries(
+                snapshot.sections["analytics"]
+                for snapshot in shards.values()
+                if snapshot.sections.get("analytics")
+            )
+            if analytics:
+                merged["analytics"] = analytics
+            top = merge_tops(
+                snapshot.sections["top"]
+                for snapshot in shards.values()
+                if snapshot.sections.get("top")
+            )
+            if top:
+                merged["top"] = top
+            # Під час зміни складу звірку може вести й попередній власник
+            provisioning = max(
+                (
+                    snapshot.sections["provisioning"]
+                    for snapshot in shards.values()
+                    if snapshot.sections.get("provisioning")
+                ),
+                key=lambda state: state["updated_at"] or 0,
+                default=None,
+            )
+            if provisioning:
+                merged["provisioning"] = provisioning
+            routers = merge_views(
+                snapshot.sections["routeros"]
+                for snapshot in shards.values()
+                if snapshot.sections.get("routeros")
+            )
+            if routers:
+                merged["routeros"] = routers
+            snapshot = FleetSnapshot.build(self._merged[1].version + 1, merged)
+            self._merged = (versions, snapshot)
+            return snapshot
+
+    def close(self):
+        self.shards.close()
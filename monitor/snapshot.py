@@ -0,0 +1,333 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+# Заголовок файлу знімка: magic, резерв, номер версії (seqlock), довжина даних
+HEADER = struct.Struct("<4sIQQ")
+MAGIC = b"NWS1"
+INITIAL_CAPACITY = 64 * 1024
+READ_ATTEMPTS = 50
+
+
+@dataclass(frozen=True)
+class FleetSnapshot:
+    """
+    Незмінний знімок стану флоту за один цикл опитування.
+
+    Агрегати та JSON-відповідь /api/devices обчислюються один раз при
+    створенні, тож читачі лише беруть посилання на поточний знімок — без
+    блокувань, перерахунків і змін спільних даних.
+    """
+
+    version: int
+    devices: Tuple[Mapping[str, Any], ...]
+    by_ip: Mapping[str, Mapping[str, Any]]
+    online_count: int
+    degraded_count: int
+    offline_count: int
+    unreachable_count: int
+    total_count: int
+    timestamp: str
+    published_at: float
+    sections: Mapping[str, Any] = field(default_factory=dict)
+    json: bytes = b""
+
+    @classmethod
+    def build(
+        cls, version: int, payload: Optional[Dict[str, Any]]
+    ) -> "FleetSnapshot":
+        """Створює знімок з даних, опублікованих монітором"""
+        payload = payload or {}
+        published_at = payload.get("published_at", 0.0)
+
+        # Монітор зберігає час як epoch; форматуємо тут, один раз на знімок
+        formatted: Dict[int, str] = {}
+
+        def with_timestamp(device: Mapping[str, Any]) -> Dict[str, Any]:
+            device = dict(device)
+            checked_at = device.get("checked_at")
+            if checked_at is not None:
+                if checked_at not in formatted:
+                    formatted[checked_at] = time.strftime(
+                        "%Y-%m-%d %H:%M:%S", time.localtime(checked_at)
+                    )
+                device["timestamp"] = formatted[checked_at]
+            return device
+
+        by_ip = MappingProxyType(
+            {
+                ip: MappingProxyType(with_timestamp(device))
+                for ip, device in payload.get("devices", {}).items()
+            }
+        )
+        devices = tuple(by_ip.values())
+        online_count = sum(1 for device in devices if device["alive"])
+        # DEGRADED — досяжні (входять до онлайн), але з поганою якістю зв'язку
+        degraded_count = sum(1 for device in devices if device.get("degraded"))
+        # Недоступні через батьківський пристрій не рахуються офлайн
+        unreachable_count = sum(
+            1 for device in devices if device.get("upstream")
+        )
+        offline_count = len(devices) - online_count - unreachable_count
+        timestamp = (
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(published_at))
+            if published_at
+            else time.strftime("%Y-%m-%d %H:%M:%S")
+        )
+
+        body = json.dumps(
+            {
+                "devices": [dict(device) for device in devices],
+                "online_count": online_count,
+                "degraded_count": degraded_count,
+                "offline_count": offline_count,
+                "unreachable_count": unreachable_count,
+                "total_count": len(devices),
+                "timestamp": timestamp,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+
+        return cls(
+            version=version,
+            devices=devices,
+            by_ip=by_ip,
+            online_count=online_count,
+            degraded_count=degraded_count,
+            offline_count=offline_count,
+            unreachable_count=unreachable_count,
+            total_count=len(devices),
+            timestamp=timestamp,
+            published_at=published_at,
+            sections=MappingProxyType(
+                {k: v for k, v in payload.items() if k != "devices"}
+            ),
+            json=body,
+        )
+
+
+EMPTY_SNAPSHOT = FleetSnapshot.build(0, None)
+
+
+class SnapshotStore:
+    """
+    Сховище останнього знімка стану флоту в межах одного процесу.
+
+    Використовується, коли моніторинг працює у тому ж процесі, що й веб-сервер.
+    Заміна знімка — одне присвоєння посилання, тому читачам не потрібні блокування.
+    """
+
+    def __init__(self):
+        self._current = EMPTY_SNAPSHOT
+        self._write_lock = threading.Lock()
+
+    def publish(self, payload: Dict[str, Any]) -> int:
+        """Публікує новий знімок і повертає його версію"""
+        with self._write_lock:
+            snapshot = FleetSnapshot.build(self._current.version + 1, payload)
+            self._current = snapshot
+        return snapshot.version
+
+    def read(self) -> FleetSnapshot:
+        """Повертає останній опублікований знімок"""
+        return self._current
+
+    def close(self):
+        pass
+
+
+class MmapSnapshotStore:
+    """
+    Знімок стану флоту у файлі, відображеному в пам'ять (mmap).
+
+    Колектор є єдиним записувачем, веб-воркери лише читають. Узгодженість
+    забезпечується seqlock-протоколом: під час запису номер версії непарний,
+    читач копіює заголовок і дані та повторює спробу, якщо версія змінилась
+    або непарна. Читання не бере блокувань: відображення та останній
+    декодований знімок замінюються присвоєнням незмінних кортежів.
+    Рекомендоване розташування файлу — /dev/shm (tmpfs).
+    """
+
+    def __init__(self, path: str, writer: bool = False):
+        self.path = path
+        self.writer = writer
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._seq = 0
+        self._lock = threading.Lock()  # Лише для записувача
+        # Читач: (відображення, st_dev, st_ino) та (версія, знімок)
+        self._view: Optional[Tuple[mmap.mmap, int, int]] = None
+        self._state: Tuple[int, FleetSnapshot] = (0, EMPTY_SNAPSHOT)
+
+        if writer:
+            self._open_writer()
+
+    def _open_writer(self):
+        """Створює (або підхоплює існуючий) файл знімка для запису"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+
+        if size < HEADER.size:
+            os.ftruncate(self._fd, INITIAL_CAPACITY)
+            size = INITIAL_CAPACITY
+
+        self._mm = mmap.mmap(self._fd, size)
+        magic, _, seq, _ = HEADER.unpack_from(self._mm, 0)
+
+        # Продовжуємо нумерацію версій після перезапуску колектора
+        self._seq = seq + (seq & 1) if magic == MAGIC else 0
+        HEADER.pack_into(self._mm, 0, MAGIC, 0, self._seq, 0)
+
+    def _ensure_capacity(self, length: int):
+        """Збільшує файл, якщо новий знімок не вміщується"""
+        needed = HEADER.size + length
+        if needed <= len(self._mm):
+            return
+
+        capacity = len(self._mm)
+        while capacity < needed:
+            capacity *= 2
+
+        os.ftruncate(self._fd, capacity)
+        self._mm.close()
+        self._mm = mmap.mmap(self._fd, capacity)
+
+    def publish(self, payload: Dict[str, Any]) -> int:
+        """Серіалізує та атомарно (для читачів) публікує знімок"""
+        if not self.writer:
+            raise RuntimeError("Сховище відкрито лише для читання")
+
+        data = json.dumps(payload, separators=(",", ":")).encode()
+
+        with self._lock:
+            self._ensure_capacity(len(data))
+            mm = self._mm
+
+            # Непарна версія сигналізує читачам про запис у процесі
+            struct.pack_into("<Q", mm, 8, self._seq + 1)
+            mm[HEADER.size : HEADER.size + len(data)] = data
+            struct.pack_into("<Q", mm, 16, len(data))
+            self._seq += 2
+            struct.pack_into("<Q", mm, 8, self._seq)
+
+        return self._seq // 2
+
+    def _map_for_read(self) -> Optional[mmap.mmap]:
+        """
+        Відображає файл для читання (спочатку або після його росту).
+
+        Дескриптор закривається одразу: mmap тримає власну копію. Попереднє
+        відображення не закривається явно — його звільнить збирач сміття,
+        коли жоден потік більше не читатиме з нього.
+        """
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            stat = os.fstat(fd)
+            if stat.st_size < HEADER.size:
+                return None
+            mm = mmap.mmap(fd, stat.st_size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._view = (mm, stat.st_dev, stat.st_ino)
+        return mm
+
+    def read(self) -> FleetSnapshot:
+        """
+        Повертає останній опублікований знімок.
+
+        Декодування виконується лише при зміні версії, інакше повертається кеш.
+        """
+        seq, cached = self._state
+        if self.writer:
+            return cached
+
+        view = self._view
+        mm = view[0] if view is not None else self._map_for_read()
+        if mm is None:
+            return cached
+
+        for _ in range(READ_ATTEMPTS):
+            magic, _, seq_before, length = HEADER.unpack(mm[: HEADER.size])
+            if magic != MAGIC:
+                return cached
+
+            if seq_before & 1:
+                time.sleep(0.001)
+                continue
+
+            if seq_before == seq:
+                return cached
+
+            if HEADER.size + length > len(mm):
+                # Файл виріс після відображення — перевідкриваємо
+                mm = self._map_for_read()
+                if mm is None:
+                    return cached
+                continue
+
+            data = mm[HEADER.size : HEADER.size + length]
+            seq_after = struct.unpack_from("<Q", mm, 8)[0]
+            if seq_after != seq_before:
+                continue
+
+            try:
+                payload = json.loads(data) if length else None
+            except ValueError as e:
+                logger.error("Пошкоджений знімок %s: %s", self.path, e)
+                return cached
+
+            snapshot = FleetSnapshot.build(seq_before // 2, payload)
+            self._state = (seq_before, snapshot)
+            return snapshot
+
+        logger.warning("Не вдалося узгоджено прочитати знімок %s", self.path)
+        return cached
+
+    def replaced(self) -> bool:
+        """
+        Файл за шляхом видалено або створено заново (перезапуск колектора).
+
+        Відображення продовжує вказувати на старий (unlink) файл, тож такого
+        читача слід перевідкрити.
+        """
+        view = self._view
+        if view is None:
+            return False
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (current.st_dev, current.st_ino) != view[1:]
+
+    def close(self):
+        # Відображення читача звільняється, щойно його покинуть усі потоки
+        self._view = None
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
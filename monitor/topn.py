@@ -0,0 +1,134 @@
+import heapq
+import logging
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from monitor.analytics import CycleMetrics
+from monitor.fleet_state import FleetState
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+# Метрики, за якими ведеться рейтинг портів флоту
+METRICS: Tuple[str, ...] = (
+    "in_bps",
+    "out_bps",
+    "utilization",
+    "errors_ps",
+    "error_rate",
+)
+TOP_PUBLISHED = 100  # Скільки лідерів кожної метрики публікувати у знімку
+
+# Ключ порту: (ip пристрою, ifIndex)
+PortKey = Tuple[str, int]
+
+
+def _metric_values(cycle: CycleMetrics) -> Dict[str, np.ndarray]:
+    """Значення метрик циклу (NaN — невідоме значення)"""
+    return {
+        "in_bps": cycle.in_bps,
+        "out_bps": cycle.out_bps,
+        "utilization": cycle.utilization,
+        "errors_ps": cycle.in_errors_ps + cycle.out_errors_ps,
+        "error_rate": cycle.error_rate,
+    }
+
+
+def top_rows(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Номери n найбільших додатних значень за спаданням.
+
+    Нульові та NaN відкидаються одразу (метрики помилок здебільшого нульові),
+    з решти np.argpartition відбирає кандидатів за O(портів), а сортуються
+    лише вони — вартість не залежить від того, скільки портів змінилось.
+    """
+    with np.errstate(invalid="ignore"):
+        rows = np.flatnonzero(values > 0)
+    if len(rows) > n:
+        rows = rows[np.argpartition(values[rows], len(rows) - n)[-n:]]
+    return rows[np.argsort(-values[rows], kind="stable")]
+
+
+class TopTalkers:
+    """
+    Рейтинг найнавантаженіших портів усього флоту.
+
+    Зберігаються лише size лідерів кожної метрики: щоциклу вони заново
+    відбираються з векторів метрик флоту (top_rows), без підтримки повного
+    відсортованого індексу всіх портів.
+    """
+
+    def __init__(
+        self, metrics: Iterable[str] = METRICS, size: int = TOP_PUBLISHED
+    ):
+        self.metrics = tuple(metrics)
+        self.size = size
+        self.leaders: Dict[str, List[Tuple[PortKey, float]]] = {
+            metric: [] for metric in self.metrics
+        }
+
+    def update(self, cycle: CycleMetrics):
+        """Оновлює рейтинги за метриками циклу"""
+        values = _metric_values(cycle)
+        ips, device_ids, if_indexes = (
+            cycle.ips,
+            cycle.device_ids,
+            cycle.if_indexes,
+        )
+        leaders = {}
+        for metric in self.metrics:
+            current = values[metric]
+            leaders[metric] = [
+                (
+                    (ips[device_ids[row]], int(if_indexes[row])),
+                    float(current[row]),
+                )
+                for row in top_rows(current, self.size)
+            ]
+        self.leaders = leaders
+
+    def top(self, metric: str, n: int) -> List[Tuple[PortKey, float]]:
+        return self.leaders[metric][:n]
+
+    def snapshot(
+        self, state: FleetState, limit: int = TOP_PUBLISHED
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Лідери кожної метрики для публікації у знімку"""
+        result = {}
+        for metric in self.metrics:
+            rows = []
+            for (ip, if_index), value in self.top(metric, limit):
+                device = state.get(ip)
+                rows.append(
+                    {
+                        "ip": ip,
+                        "if_index": if_index,
+                        "name": device.port_name(if_index) if device else "",
+                        "value": round(value, 4),
+                    }
+                )
+            result[metric] = rows
+        return result
+
+
+def merge_tops(
+    tops: Iterable[Dict[str, List[Dict[str, Any]]]],
+    limit: int = TOP_PUBLISHED,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Об'єднує рейтинги кількох колекторів (вже відсортовані) в один"""
+    by_metric: Dict[str, List[List[Dict[str, Any]]]] = {}
+    for top in tops:
+        for metric, rows in top.items():
+            by_metric.setdefault(metric, []).append(rows)
+    return {
+        metric: list(
+            islice(heapq.merge(*lists, key=lambda row: -row["value"]), limit)
+        )
+        for metric, lists in by_metric.items()
+    }
@@ -0,0 +1,117 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+class Topology:
+    """
+    Дерево залежностей пристроїв за полем "parent" інвентаря.
+
+    "parent" — IP або назва вищого (upstream) пристрою, через який доступний
+    даний. Пристрої без батька або з батьком поза інвентарем є коренями.
+    Цикли розриваються з попередженням у журналі.
+    """
+
+    def __init__(self, devices: Iterable[Dict]):
+        devices = list(devices)
+        by_name = {device["name"]: device["ip"] for device in devices}
+        ips = {device["ip"] for device in devices}
+
+        self.parents: Dict[str, str] = {}
+        for device in devices:
+            parent = device.get("parent")
+            if not parent:
+                continue
+            parent_ip = parent if parent in ips else by_name.get(parent)
+            if parent_ip is None or parent_ip == device["ip"]:
+                logger.warning(
+                    "Батьківський пристрій %s для %s не знайдено в інвентарі",
+                    parent,
+                    device["ip"],
+                )
+                continue
+            self.parents[device["ip"]] = parent_ip
+
+        self._break_cycles()
+        self.depth = {
+            device["ip"]: self._depth(device["ip"]) for device in devices
+        }
+
+    def _break_cycles(self):
+        for start in list(self.parents):
+            seen, ip = set(), start
+            while ip in self.parents:
+                if ip in seen:
+                    logger.warning(
+                        "Цикл у топології через %s, зв'язок розірвано", ip
+                    )
+                    del self.parents[ip]
+                    break
+                seen.add(ip)
+                ip = self.parents[ip]
+
+    def _depth(self, ip: str) -> int:
+        depth = 0
+        while ip in self.parents:
+            ip = self.parents[ip]
+            depth += 1
+        return depth
+
+    def parent(self, ip: str) -> Optional[str]:
+        return self.parents.get(ip)
+
+    def root(self, ip: str) -> str:
+        """Корінь гілки, до якої належить пристрій"""
+        while ip in self.parents:
+            ip = self.parents[ip]
+        return ip
+
+    def levels(self, devices: Iterable[Dict]) -> List[List[Dict]]:
+        """Пристрої, згруповані за глибиною: спочатку корені, потім їхні нащадки"""
+        levels: List[List[Dict]] = []
+        for device in devices:
+            depth = self.depth.get(device["ip"], 0)
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(device)
+        return [level for level in levels if level]
+
+
+class ResumeQueue:
+    """
+    Поступове відновлення опитування гілки після повернення батька.
+
+    Щоциклу допускається не більше batch пристроїв, що чекають, щоб
+    відновлений маршрутизатор не отримав одночасно пінги та SNMP-запити
+    від усієї гілки. Решта лишаються позначеними до наступних циклів.
+    """
+
+    def __init__(self, batch: int):
+        self.batch = max(batch, 1)
+        self._waiting: Set[str] = set()
+        self._quota = self.batch
+
+    def start_cycle(self):
+        """Відкриває квоту поточного циклу"""
+        self._quota = self.batch
+
+    def admit(self, ip: str) -> bool:
+        """Чи можна опитати пристрій у цьому циклі (інакше він чекає)"""
+        if self._quota > 0:
+            self._quota -= 1
+            self._waiting.discard(ip)
+            return True
+        self._waiting.add(ip)
+        return False
+
+    def forget(self, ips: Iterable[str]):
+        self._waiting.difference_update(ips)
+
+    def __len__(self) -> int:
+        return len(self._waiting)
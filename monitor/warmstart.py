@@ -0,0 +1,234 @@
+"""
+Теплий старт: останній відомий стан флоту у компактному бінарному файлі.
+
+Файл містить статуси пінгу, системну інформацію, лічильники інтерфейсів
+(масиви FleetState як є, без перетворення на об'єкти чи JSON) та кошики
+вікон доступності, щоб SLA за 7 та 30 днів переживали перезапуск. Після
+перезапуску стан завантажується як застарілий і віддається одразу, доки
+перший цикл опитування не замінить його свіжими даними.
+
+Формат: заголовок (magic, версія, час збереження, довжина метаданих),
+далі zlib(метадані JSON + сирі масиви інтерфейсів).
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from monitor.availability import WINDOWS, AvailabilityTracker, DeviceState
+
+from monitor.fleet_state import (
+    COUNTER_FIELDS,
+    STATUS_FIELDS,
+    DeviceInterfaces,
+    FleetState,
+    StringTable,
+)
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<4sHdI")
+MAGIC = b"NWWS"
+FORMAT_VERSION = 1
+MAX_AGE = 24 * 3600  # Старіший стан не показуємо, секунд
+
+# Масиви, що є атрибутами DeviceInterfaces (решта — у columns)
+ROW_ATTRIBUTES = ("indexes", "name_ids", "alias_ids")
+# Порядок масивів рядка в файлі: (атрибут/колонка, typecode)
+ROW_ARRAYS: Tuple[Tuple[str, str], ...] = (
+    ("indexes", "I"),
+    ("name_ids", "I"),
+    ("alias_ids", "I"),
+    *((name, "Q") for name in COUNTER_FIELDS),
+    *((name, "B") for name in STATUS_FIELDS),
+)
+
+
+@dataclass
+class WarmState:
+    saved_at: float
+    status: Dict[str, Dict] = field(default_factory=dict)
+    device_info: Dict[str, Dict] = field(default_factory=dict)
+    interfaces: Dict[str, DeviceInterfaces] = field(default_factory=dict)
+    availability: List[DeviceState] = field(default_factory=list)
+
+
+def _layout() -> Dict[str, int]:
+    """Розміри елементів масивів: файл іншої платформи не читаємо"""
+    return {typecode: array(typecode).itemsize for _, typecode in ROW_ARRAYS}
+
+
+def _get_array(device: DeviceInterfaces, name: str) -> array:
+    if name in ROW_ATTRIBUTES:
+        return getattr(device, name)
+    return device.columns[name]
+
+
+def save(
+    path: str,
+    status: Dict[str, Dict],
+    fleet_state: FleetState,
+    device_info: Dict[str, Dict],
+    saved_at: Optional[float] = None,
+    availability: Optional[AvailabilityTracker] = None,
+):
+    """Атомарно записує стан флоту (через тимчасовий файл і rename)"""
+    saved_at = saved_at or time.time()
+    strings: Dict[int, int] = {}  # id у StringTable процесу → id у файлі
+    table = []
+
+    def remap(ids: Iterable[int]) -> array:
+        result = array("I")
+        for string_id in ids:
+            local = strings.get(string_id)
+            if local is None:
+                local = strings[string_id] = len(table)
+                table.append(fleet_state.strings[string_id])
+            result.append(local)
+        return result
+
+    devices, chunks = [], []
+    for ip, device in fleet_state.items():
+        devices.append([ip, len(device), device.polled_at])
+        for name, typecode in ROW_ARRAYS:
+            values = _get_array(device, name)
+            if name in ("name_ids", "alias_ids"):
+                values = remap(values)
+            chunks.append(values.tobytes())
+
+    # Кошики доступності йдуть після масивів інтерфейсів
+    accumulators = []
+    for ip, alive, windows in (
+        availability.export(saved_at) if availability else ()
+    ):
+        accumulators.append([ip, alive, [head for head, _, _ in windows]])
+        for _, up, total in windows:
+            chunks.extend((up, total))
+
+    meta = json.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "layout": _layout(),
+            "status": status,
+            "device_info": device_info,
+            "strings": table,
+            "interfaces": devices,
+            "availability_windows": WINDOWS,
+            "availability": accumulators,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode()
+    data = HEADER.pack(
+        MAGIC, FORMAT_VERSION, saved_at, len(meta)
+    ) + zlib.compress(meta + b"".join(chunks), 6)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load(
+    path: str, strings: StringTable, max_age: float = MAX_AGE
+) -> Optional[WarmState]:
+    """
+    Читає стан флоту; None — файлу немає, він застарий або пошкоджений.
+
+    Назви інтерфейсів інтернуються у strings (таблицю FleetState процесу).
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning("Теплий старт: не вдалося прочитати %s: %s", path, e)
+        return None
+
+    try:
+        magic, version, saved_at, meta_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            logger.warning(
+                "Теплий старт: %s має інший формат, пропускаємо", path
+            )
+            return None
+        if time.time() - saved_at > max_age:
+            logger.info("Теплий старт: стан у %s застарий, пропускаємо", path)
+            return None
+
+        body = zlib.decompress(data[HEADER.size :])
+        meta = json.loads(body[:meta_length])
+        if meta["byteorder"] != sys.byteorder or meta["layout"] != _layout():
+            logger.warning(
+                "Теплий старт: %s збережено на іншій платформі", path
+            )
+            return None
+
+        local_ids = array(
+            "I", (strings.intern(value) for value in meta["strings"])
+        )
+        state = WarmState(saved_at, meta["status"], meta["device_info"])
+        pos = meta_length
+        for ip, rows, polled_at in meta["interfaces"]:
+            device = DeviceInterfaces(strings)
+            for name, typecode in ROW_ARRAYS:
+                values = array(typecode)
+                end = pos + rows * values.itemsize
+                values.frombytes(body[pos:end])
+                pos = end
+                if len(values) != rows:
+                    raise ValueError("Обрізаний масив інтерфейсів")
+                if name in ("name_ids", "alias_ids"):
+                    values = array("I", (local_ids[i] for i in values))
+                if name in ROW_ATTRIBUTES:
+                    setattr(device, name, values)
+                else:
+                    device.columns[name] = values
+            device.polled_at = polled_at
+            state.interfaces[ip] = device
+
+        # Файл без кошиків або з іншою розбивкою вікон — SLA накопичується заново
+        windows = [
+            tuple(window) for window in meta.get("availability_windows", ())
+        ]
+        if windows == list(WINDOWS):
+            sizes = [buckets * 8 for _, _, buckets in WINDOWS]
+            for ip, alive, heads in meta.get("availability", ()):
+                accumulators = []
+                for head, size in zip(heads, sizes):
+                    accumulators.append(
+                        (
+                            head,
+                            body[pos : pos + size],
+                            body[pos + size : pos + 2 * size],
+                        )
+                    )
+                    pos += 2 * size
+                state.availability.append((ip, alive, accumulators))
+    except (
+        struct.error,
+        zlib.error,
+        ValueError,
+        KeyError,
+        IndexError,
+        TypeError,
+    ) as e:
+        logger.warning("Теплий старт: пошкоджений файл %s: %s", path, e)
+        return None
+    return state
@@ -24,4 +24,4 @@ print(r)
 
 
 async def get_ros():
-    return {}
\ No newline at end of file
+    return {}
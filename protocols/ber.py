@@ -0,0 +1,177 @@
+"""
+Мінімальний кодек ASN.1 BER для повідомлень SNMP.
+
+Підтримує лише типи, що зустрічаються у трапах та GET SNMPv1/v2c:
+INTEGER, OCTET STRING, NULL, OBJECT IDENTIFIER, SEQUENCE, прикладні типи
+SMI (IpAddress, Counter32, Gauge32, TimeTicks, Counter64) та теги PDU.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Універсальні теги
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+
+# Прикладні типи SMI
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIMETICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+
+# Винятки varbind SNMPv2 (noSuchObject, noSuchInstance, endOfMibView)
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+
+# Теги PDU
+GET_REQUEST = 0xA0
+GET_RESPONSE = 0xA2
+TRAP_V1 = 0xA4
+INFORM_REQUEST = 0xA6
+TRAP_V2 = 0xA7
+
+UNSIGNED_TYPES = (COUNTER32, GAUGE32, TIMETICKS, COUNTER64)
+
+TLV = Tuple[int, bytes]
+
+
+class BERError(ValueError):
+    """Пошкоджене або непідтримуване BER-кодування"""
+
+
+def decode_tlv(data: bytes, pos: int = 0) -> Tuple[int, bytes, int]:
+    """
+    Читає один елемент tag-length-value починаючи з pos.
+
+    Returns:
+        (тег, байти значення, позиція наступного елемента)
+    """
+    if pos + 2 > len(data):
+        raise BERError("Неповний заголовок TLV")
+
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+
+    if length & 0x80:
+        size = length & 0x7F
+        if not 0 < size <= 4 or pos + size > len(data):
+            raise BERError("Непідтримувана довжина TLV")
+        length = int.from_bytes(data[pos : pos + size], "big")
+        pos += size
+
+    end = pos + length
+    if end > len(data):
+        raise BERError("Довжина TLV виходить за межі повідомлення")
+    return tag, data[pos:end], end
+
+
+def decode_sequence(data: bytes) -> List[TLV]:
+    """Розбирає вміст SEQUENCE/PDU на список (тег, значення)"""
+    items, pos = [], 0
+    while pos < len(data):
+        tag, value, pos = decode_tlv(data, pos)
+        items.append((tag, value))
+    return items
+
+
+def decode_integer(data: bytes) -> int:
+    return int.from_bytes(data, "big", signed=True) if data else 0
+
+
+def decode_oid(data: bytes) -> str:
+    """OBJECT IDENTIFIER у точковому записі (без початкової крапки)"""
+    if not data:
+        raise BERError("Порожній OID")
+
+    arcs, value = [], 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(value)
+            value = 0
+
+    first = arcs[0]
+    head = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+    return ".".join(str(arc) for arc in head + arcs[1:])
+
+
+def decode_value(tag: int, data: bytes) -> Any:
+    """Перетворює значення varbind у тип Python"""
+    if tag == INTEGER:
+        return decode_integer(data)
+    if tag in UNSIGNED_TYPES:
+        return int.from_bytes(data, "big") if data else 0
+    if tag == OCTET_STRING or tag == OPAQUE:
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return data.hex(":")
+    if tag == OBJECT_IDENTIFIER:
+        return decode_oid(data)
+    if tag == IP_ADDRESS:
+        return ".".join(str(byte) for byte in data)
+    if tag in (NULL, NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW):
+        return None
+    raise BERError(f"Непідтримуваний тип 0x{tag:02x}")
+
+
+def decode_varbinds(data: bytes) -> Dict[str, Any]:
+    """Список VarBind (SEQUENCE OF SEQUENCE {name, value}) у словник"""
+    result = {}
+    for tag, item in decode_sequence(data):
+        if tag != SEQUENCE:
+            raise BERError("Очікувався VarBind")
+        (name_tag, name), (value_tag, value) = decode_sequence(item)
+        if name_tag != OBJECT_IDENTIFIER:
+            raise BERError("Очікувався OID у VarBind")
+        result[decode_oid(name)] = decode_value(value_tag, value)
+    return result
+
+
+def encode_tlv(tag: int, value: bytes) -> bytes:
+    """Кодує один елемент tag-length-value"""
+    length = len(value)
+    if length < 0x80:
+        header = bytes((tag, length))
+    else:
+        size = (length.bit_length() + 7) // 8
+        header = bytes((tag, 0x80 | size)) + length.to_bytes(size, "big")
+    return header + value
+
+
+def encode_integer(value: int) -> bytes:
+    """INTEGER у мінімальному доповняльному коді"""
+    size = max((value + (value < 0)).bit_length() // 8 + 1, 1)
+    return encode_tlv(INTEGER, value.to_bytes(size, "big", signed=True))
+
+
+def encode_oid(oid: str) -> bytes:
+    arcs = [int(arc) for arc in oid.strip(".").split(".")]
+    if len(arcs) < 2:
+        raise BERError(f"Некоректний OID {oid}")
+    body = bytearray()
+    for arc in [arcs[0] * 40 + arcs[1]] + arcs[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        body.extend(reversed(chunk))
+    return encode_tlv(OBJECT_IDENTIFIER, bytes(body))
+
+
+def encode_null_varbinds(oids: Iterable[str]) -> bytes:
+    """VarBindList запиту GET: кожен OID зі значенням NULL"""
+    return encode_tlv(
+        SEQUENCE,
+        b"".join(
+            encode_tlv(SEQUENCE, encode_oid(oid) + encode_tlv(NULL, b""))
+            for oid in oids
+        ),
+    )
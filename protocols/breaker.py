@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+FAILURE_THRESHOLD = 2  # Послідовних невдач до розмикання
+RESET_TIMEOUT = 30.0  # Через скільки секунд дозволити пробний запит
+
+# Джерела успішного обміну з пристроєм (для моделі живості)
+SOURCE_ICMP = "icmp"
+SOURCE_SNMP = "snmp"
+SOURCE_ROUTEROS = "routeros"
+
+
+class CircuitOpenError(Exception):
+    """Запит до пристрою відхилено: запобіжник розімкнено"""
+
+    def __init__(self, host: str, retry_in: float = 0.0):
+        super().__init__(
+            f"Пристрій {host} недоступний (повторна перевірка через {retry_in:.0f}с)"
+        )
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Запобіжник одного джерела пристрою: closed → open → half-open → closed.
+
+    Після failure_threshold послідовних невдач запити відхиляються одразу,
+    без таймаутів і повторних спроб. Через reset_timeout дозволяється
+    рівно один пробний запит: успіх замикає запобіжник, невдача —
+    розмикає знову.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        source: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ):
+        self.host = host
+        self.source = source
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_success: Optional[float] = None  # time.monotonic()
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """
+        Дозвіл на запит.
+
+        Returns:
+            True, якщо це пробний запит (half-open) — його результат
+            обов'язково має бути переданий у record_success/record_failure.
+
+        Raises:
+            CircuitOpenError: запобіжник розімкнено або проба вже триває.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+
+            retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            raise CircuitOpenError(self.host, max(retry_in, 0.0))
+
+    def release(self):
+        """Повертає пробу без результату (виклик скасовано з інших причин)"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        """Успішний обмін: засвідчує живість пристрою цим джерелом"""
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(
+                    "Запобіжник %s (%s) замкнено: пристрій відповідає",
+                    self.host,
+                    self.source,
+                )
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+            self.last_success = time.monotonic()
+
+    def last_exchange(self, max_age: float) -> Optional[float]:
+        """Час (monotonic) успішного обміну не старшого за max_age секунд"""
+        with self._lock:
+            # Після невдалого обміну давній успіх живості не засвідчує
+            if (
+                self.state != CLOSED
+                or self.failures
+                or self.last_success is None
+            ):
+                return None
+            if time.monotonic() - self.last_success > max_age:
+                return None
+            return self.last_success
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED
+                and self.failures >= self.failure_threshold
+            ):
+                if self.state == CLOSED:
+                    logger.warning(
+                        "Запобіжник %s (%s) розімкнено після %d невдач",
+                        self.host,
+                        self.source,
+                        self.failures,
+                    )
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def trip(self):
+        """Розмикає запобіжник без власних невдач: недоступність засвідчено"""
+        with self._lock:
+            if self.state != CLOSED:
+                return
+            logger.warning(
+                "Запобіжник %s (%s) розімкнено: пристрій не відповідає на ICMP",
+                self.host,
+                self.source,
+            )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class BreakerRegistry:
+    """
+    Спільні запобіжники пристроїв, окремі для кожного джерела (SNMP,
+    RouterOS, ICMP): невдачі SNMP не блокують RouterOS і навпаки.
+
+    ICMP записується лише тоді, коли саме він вирішує живість пристрою.
+    Якщо ping засвідчив недоступність, SNMP та RouterOS розмикаються теж:
+    мертвий пристрій коштує одну пробу кожного протоколу раз на
+    reset_timeout, а не повні таймаути щоциклу. Пристрій з фільтрованим
+    ICMP, що відповідає SNMP, живість засвідчує SNMP, тож ICMP для нього
+    не записується.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str, source: str) -> CircuitBreaker:
+        breaker = self._breakers.get((host, source))
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    (host, source),
+                    CircuitBreaker(
+                        host,
+                        source,
+                        self.failure_threshold,
+                        self.reset_timeout,
+                    ),
+                )
+        return breaker
+
+    def record(self, host: str, success: bool, source: str):
+        breaker = self.get(host, source)
+        if success:
+            breaker.record_success()
+            return
+        breaker.record_failure()
+        if source == SOURCE_ICMP and breaker.state == OPEN:
+            for other in (SOURCE_SNMP, SOURCE_ROUTEROS):
+                tripped = self._breakers.get((host, other))
+                if tripped is not None:
+                    tripped.trip()
+
+    def last_exchange(
+        self, host: str, sources: Iterable[str], max_age: float
+    ) -> Optional[str]:
+        """
+        Чим пристрій нещодавно підтвердив живість (SNMP, RouterOS тощо).
+
+        Returns:
+            Джерело останнього успішного обміну за max_age секунд або None.
+        """
+        recent = []
+        for source in sources:
+            breaker = self._breakers.get((host, source))
+            at = breaker.last_exchange(max_age) if breaker else None
+            if at is not None:
+                recent.append((at, source))
+        return max(recent)[1] if recent else None
+
+    def state(self, host: str, source: str) -> Optional[str]:
+        breaker = self._breakers.get((host, source))
+        return breaker.state if breaker else None
+
+
+breakers = BreakerRegistry()
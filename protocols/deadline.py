@@ -0,0 +1,108 @@
+"""
+Наскрізний дедлайн запиту для звернень до пристроїв.
+
+Обробник HTTP відкриває бюджет часу через `with deadline(секунд)`, а
+SNMP, RouterOS та async_retry беруть з нього свої таймаути. Бюджет
+зберігається у contextvars, тож автоматично доступний у всіх задачах
+asyncio.gather, створених усередині обробника.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+MIN_BUDGET = 0.2  # Менше цього запит до пристрою не має сенсу починати
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет часу запиту вичерпано — виклик пропущено"""
+
+
+class Deadline:
+    """Момент завершення бюджету та ознака, що його не вистачило"""
+
+    __slots__ = ("at", "exhausted")
+
+    def __init__(self, at: float):
+        self.at = at
+        self.exhausted = False  # Щось було пропущено або обрізано
+
+    def remaining(self) -> float:
+        return self.at - time.monotonic()
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[Deadline]:
+    """Відкриває бюджет часу; вкладений бюджет не може бути довшим за зовнішній"""
+    outer = _current.get()
+    at = time.monotonic() + seconds
+    if outer is not None:
+        at = min(at, outer.at)
+    budget = Deadline(at)
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        if outer is not None and budget.exhausted:
+            outer.exhausted = True
+        _current.reset(token)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    """Залишок бюджету, секунд (None — дедлайн не встановлено)"""
+    budget = _current.get()
+    return budget.remaining() if budget is not None else None
+
+
+def timeout(default: float, min_budget: float = MIN_BUDGET) -> float:
+    """
+    Таймаут виклику з урахуванням бюджету: min(default, залишок).
+
+    Raises:
+        DeadlineExceeded: залишку замало, щоб починати виклик.
+    """
+    budget = _current.get()
+    if budget is None:
+        return default
+
+    left = budget.remaining()
+    if left < min_budget:
+        budget.exhausted = True
+        raise DeadlineExceeded(f"Бюджет запиту вичерпано ({left:.2f}с)")
+    return min(default, left)
+
+
+def allows(seconds: float) -> bool:
+    """Чи вистачить бюджету на очікування (наприклад, backoff перед повтором)"""
+    left = remaining()
+    return left is None or left - seconds >= MIN_BUDGET
+
+
+def mark_exhausted():
+    """Позначає, що виклик обірвано через дедлайн (результат неповний)"""
+    budget = _current.get()
+    if budget is not None:
+        budget.exhausted = True
+
+
+def exhausted() -> bool:
+    budget = _current.get()
+    return budget is not None and budget.exhausted
+
+
+def bind(func: Callable[..., T]) -> Callable[..., T]:
+    """Переносить поточний дедлайн у потік виконавця (run_in_executor)"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
@@ -0,0 +1,299 @@
+"""
+Декларативні профілі збору SNMP-метрик.
+
+Профіль (JSON у protocols/profiles/) перелічує скаляри й таблиці, які треба
+зібрати з пристроїв певного виробника чи моделі. При завантаженні профіль
+компілюється у префіксне дерево OID: кожен varbind відповіді потрапляє у свій
+слот за один прохід по дугах OID, без перебору колонок.
+
+Формат профілю:
+    {
+        "name": "mikrotik",
+        "extends": "default",
+        "match": {"sys_object_id": ["1.3.6.1.4.1.14988"], "sys_descr": ["RouterOS"]},
+        "scalars": {"temperature": {"oid": "1.3.6.1.4.1.14988.1.1.3.10.0",
+                                    "type": "float", "scale": 0.1}},
+        "tables": {"poe": {"name": "1.3.6.1.4.1.14988.1.1.15.1.1.2", ...}}
+    }
+
+Колонку чи скаляр можна задати просто рядком OID (тип "str").
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "profiles")
+DEFAULT_PROFILE = "default"
+VALUE_TYPES = ("str", "int", "float")
+
+_LEAF = object()  # Ключ значення у вузлі дерева
+
+
+class OidTrie:
+    """Префіксне дерево за дугами OID з пошуком найдовшого префікса"""
+
+    def __init__(self):
+        self._root: Dict[Any, Any] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, oid: str, value: Any):
+        node = self._root
+        for arc in oid.strip(".").split("."):
+            node = node.setdefault(arc, {})
+        if _LEAF not in node:
+            self._size += 1
+        node[_LEAF] = value
+
+    def longest_match(self, oid: str) -> Optional[Tuple[Any, str]]:
+        """
+        Значення найдовшого префікса OID та решта OID після нього.
+
+        Returns:
+            (значення, суфікс без початкової крапки) або None
+        """
+        node, best = self._root, None
+        arcs = oid.strip(".").split(".")
+        for position, arc in enumerate(arcs):
+            node = node.get(arc)
+            if node is None:
+                break
+            if _LEAF in node:
+                best = (node[_LEAF], position + 1)
+        if best is None:
+            return None
+        value, consumed = best
+        return value, ".".join(arcs[consumed:])
+
+
+class Slot(NamedTuple):
+    """Місце метрики: таблиця (None для скаляра), назва, тип і множник"""
+
+    table: Optional[str]
+    name: str
+    type: str = "str"
+    scale: float = 1.0
+
+    def convert(self, raw: str) -> Any:
+        raw = raw.strip()
+        if raw.startswith('"') and raw.endswith('"'):
+            raw = raw[1:-1]
+        if self.type == "str":
+            return raw
+        # Числа можуть прийти як "up(1)" або "42 C" — беремо перше число
+        match = re.search(r"-?\d+(?:\.\d+)?", raw)
+        if match is None:
+            return None
+        number = float(match.group()) * self.scale
+        if self.type == "int":
+            return int(round(number))
+        return round(number, 3)
+
+
+def _slot(table: Optional[str], name: str, spec: Any) -> Tuple[str, Slot]:
+    if isinstance(spec, str):
+        return spec, Slot(table, name)
+    kind = spec.get("type", "str")
+    if kind not in VALUE_TYPES:
+        raise ValueError(f"Невідомий тип {kind} у метриці {name}")
+    return spec["oid"], Slot(table, name, kind, float(spec.get("scale", 1.0)))
+
+
+@dataclass
+class Profile:
+    """Скомпільований профіль збору"""
+
+    name: str
+    sys_object_ids: List[str] = field(default_factory=list)
+    sys_descr_patterns: List[str] = field(default_factory=list)
+    scalars: Dict[str, Slot] = field(default_factory=dict)  # OID → слот
+    columns: Dict[str, Slot] = field(
+        default_factory=dict
+    )  # OID колонки → слот
+    walk_roots: List[str] = field(default_factory=list)  # Один walk на таблицю
+    trie: OidTrie = field(default_factory=OidTrie)
+
+    @property
+    def empty(self) -> bool:
+        return not self.scalars and not self.columns
+
+    def route(self, varbinds: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Розкладає varbinds по слотах профілю.
+
+        Returns:
+            {"scalars": {назва: значення},
+             "tables": {таблиця: {індекс: {колонка: значення}}}}
+        """
+        scalars: Dict[str, Any] = {}
+        tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for oid, raw in varbinds:
+            match = self.trie.longest_match(oid)
+            if match is None:
+                continue
+            slot, index = match
+            if slot.table is None:
+                scalars[slot.name] = slot.convert(raw)
+            elif index:
+                tables.setdefault(slot.table, {}).setdefault(index, {})[
+                    slot.name
+                ] = slot.convert(raw)
+        return {"profile": self.name, "scalars": scalars, "tables": tables}
+
+
+def compile_profile(spec: Dict, parent: Optional[Profile] = None) -> Profile:
+    """
+    Компілює опис профілю (з успадкованими від parent метриками).
+
+    Raises:
+        ValueError, KeyError: некоректний опис.
+    """
+    match = spec.get("match", {})
+    profile = Profile(
+        name=spec["name"],
+        sys_object_ids=[
+            oid.strip(".") for oid in match.get("sys_object_id", [])
+        ],
+        sys_descr_patterns=list(match.get("sys_descr", [])),
+        scalars=dict(parent.scalars) if parent else {},
+        columns=dict(parent.columns) if parent else {},
+    )
+    for name, metric in spec.get("scalars", {}).items():
+        oid, slot = _slot(None, name, metric)
+        profile.scalars[oid.strip(".")] = slot
+    for table, columns in spec.get("tables", {}).items():
+        for name, metric in columns.items():
+            oid, slot = _slot(table, name, metric)
+            profile.columns[oid.strip(".")] = slot
+    for oid, slot in {**profile.scalars, **profile.columns}.items():
+        profile.trie.insert(oid, slot)
+
+    # Таблиця обходиться одним walk від її entry (спільного префікса колонок);
+    # зайві колонки відсіює дерево. Колонки з різних entry — окремими walk.
+    tables: Dict[str, List[List[str]]] = {}
+    for oid, slot in profile.columns.items():
+        tables.setdefault(slot.table, []).append(oid.split("."))
+    for arcs in tables.values():
+        root = os.path.commonprefix(arcs)
+        if (
+            len(arcs) > 1
+            and len(root) >= max(len(column) for column in arcs) - 1
+        ):
+            profile.walk_roots.append(".".join(root))
+        else:
+            profile.walk_roots.extend(".".join(column) for column in arcs)
+    return profile
+
+
+class ProfileRegistry:
+    """Профілі та вибір профілю пристрою за sysObjectID/sysDescr"""
+
+    def __init__(self):
+        self._profiles: Dict[str, Profile] = {
+            DEFAULT_PROFILE: Profile(DEFAULT_PROFILE)
+        }
+        self._by_object_id = OidTrie()
+        self._selected: Dict[str, Profile] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._profiles
+
+    def get(self, name: str) -> Profile:
+        return self._profiles.get(name, self._profiles[DEFAULT_PROFILE])
+
+    def load_dir(self, path: str):
+        """Завантажує всі *.json каталогу; батьківські профілі — першими"""
+        specs = {}
+        for filename in sorted(os.listdir(path)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(path, filename), encoding="utf-8") as f:
+                    spec = json.load(f)
+                specs[spec["name"]] = spec
+            except (OSError, ValueError, KeyError) as e:
+                logger.error("Профіль %s пропущено: %s", filename, e)
+
+        def load(name: str, chain: Tuple[str, ...] = ()):
+            if name in chain:
+                raise ValueError(f"Циклічне успадкування профілю {name}")
+            spec = specs.pop(name)
+            parent = spec.get("extends")
+            if parent in specs:
+                load(parent, chain + (name,))
+            self.add(compile_profile(spec, self._profiles.get(parent)))
+
+        while specs:
+            name = next(iter(specs))
+            try:
+                load(name)
+            except (ValueError, KeyError) as e:
+                logger.error("Профіль %s пропущено: %s", name, e)
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.name] = profile
+            for oid in profile.sys_object_ids:
+                self._by_object_id.insert(oid, profile)
+            self._selected.clear()
+        logger.debug(
+            "Профіль %s: %d скалярів, %d колонок",
+            profile.name,
+            len(profile.scalars),
+            len(profile.columns),
+        )
+
+    def select(
+        self, host: str, sys_object_id: Optional[str], sys_descr: Optional[str]
+    ) -> Profile:
+        """
+        Профіль пристрою: найдовший збіг sysObjectID, інакше шаблон sysDescr,
+        інакше профіль за замовчуванням. Результат кешується для host.
+        """
+        with self._lock:
+            selected = self._selected.get(host)
+            if selected is not None:
+                return selected
+            match = (
+                self._by_object_id.longest_match(sys_object_id)
+                if sys_object_id
+                else None
+            )
+            if match is not None:
+                selected = match[0]
+            else:
+                selected = next(
+                    (
+                        profile
+                        for profile in self._profiles.values()
+                        if sys_descr
+                        and any(
+                            re.search(pattern, sys_descr, re.IGNORECASE)
+                            for pattern in profile.sys_descr_patterns
+                        )
+                    ),
+                    self._profiles[DEFAULT_PROFILE],
+                )
+            # Без даних ідентифікації не кешуємо — спробуємо наступного разу
+            if sys_object_id or sys_descr:
+                self._selected[host] = selected
+            return selected
+
+
+profiles = ProfileRegistry()
+profiles.load_dir(PROFILE_DIR)
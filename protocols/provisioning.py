@@ -0,0 +1,428 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import ros_api
+from ros_api.api import RouterOSTrapError
+
+from protocols import routeros
+from protocols.deadline import DeadlineExceeded
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+# Правила provisioning: master-configuration → slave-configurations,
+# що вмикаються разом з гостьовою (student) мережею
+STUDENT_SLAVES = {
+    "cfg-2ghz-N_staff": "cfg-2ghz-N_student",
+    "cfg-5ghz-AC_staff": "cfg-5ghz-AC_student",
+}
+
+PROVISION_CONCURRENCY = 8  # Одночасних з'єднань для provision CAP
+PROVISION_REFRESH_INTERVAL = 300  # Звірка кешу стану з роутером, секунд
+CAP_READY_STATES = {
+    "ok"
+}  # Стан remote-cap, що не потребує повторного provision
+
+ProgressCallback = Callable[[Dict], None]
+
+
+def desired_state(enable: bool) -> Dict[str, str]:
+    """Бажані slave-configurations для кожного master-configuration"""
+    return {
+        master: slave if enable else ""
+        for master, slave in STUDENT_SLAVES.items()
+    }
+
+
+def _configurations(value: str) -> frozenset:
+    """Список конфігурацій RouterOS ("a,b") як множина для порівняння"""
+    return frozenset(item for item in (value or "").split(",") if item)
+
+
+@dataclass
+class ProvisioningPlan:
+    """Різниця між поточним та бажаним станом"""
+
+    rules: List[Dict] = field(default_factory=list)  # Правила до зміни
+    caps: List[Dict] = field(default_factory=list)  # CAP до provision
+    unchanged_caps: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "rules": self.rules,
+            "caps": self.caps,
+            "unchanged_caps": self.unchanged_caps,
+        }
+
+
+def plan_provisioning(
+    desired: Dict[str, str], provisioning: List[Dict], remote_caps: List[Dict]
+) -> ProvisioningPlan:
+    """
+    Порівнює бажаний стан з прочитаним з роутера.
+
+    Змінюються лише правила, чиї slave-configurations відрізняються.
+    Якщо змінилося хоча б одне правило, provision потрібен усім CAP;
+    інакше — лише тим, що не у робочому стані.
+    """
+    plan = ProvisioningPlan()
+    seen = set()
+    for item in provisioning:
+        master = item.get("master-configuration")
+        if master not in desired or not item.get(".id"):
+            continue
+        seen.add(master)
+        current = item.get("slave-configurations", "")
+        if _configurations(current) != _configurations(desired[master]):
+            plan.rules.append(
+                {
+                    "id": item[".id"],
+                    "master": master,
+                    "current": current,
+                    "desired": desired[master],
+                }
+            )
+
+    for master in desired.keys() - seen:
+        logger.warning(
+            "Правило provisioning для %s не знайдено на роутері", master
+        )
+
+    for cap in remote_caps:
+        if not cap.get(".id"):
+            continue
+        ready = str(cap.get("state", "")).lower() in CAP_READY_STATES
+        if plan.rules or not ready:
+            plan.caps.append(
+                {
+                    "id": cap[".id"],
+                    "identity": cap.get("identity", ""),
+                    "address": cap.get("address", ""),
+                    "state": cap.get("state", ""),
+                }
+            )
+        else:
+            plan.unchanged_caps += 1
+    return plan
+
+
+class ProvisioningStateCache:
+    """
+    Кеш стану WiFi provisioning для сторінки керування та /status.
+
+    Читання не звертаються до роутера: кеш оновлюється write-through
+    після успішних змін (ProvisioningEngine) та звіряється з роутером
+    у фоновому потоці раз на refresh_interval секунд. Фонова звірка
+    запускається лише в одному процесі — тому, що опитує ROOT_ROUTER;
+    веб-воркери отримують її результат через знімок стану флоту.
+    """
+
+    def __init__(
+        self,
+        credentials: Sequence[str],
+        refresh_interval: float = PROVISION_REFRESH_INTERVAL,
+    ):
+        self.credentials = list(credentials)
+        self.refresh_interval = refresh_interval
+        self.updated_at: Optional[float] = None
+        self._rules: Dict[str, Dict] = {}  # master-configuration → правило
+        self._ssid = ""
+        self._writes = 0  # Лічильник write-through змін
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.updated_at is not None
+
+    @property
+    def running(self) -> bool:
+        """Чи працює фонова звірка (і не зупиняється)"""
+        return (
+            self._thread is not None
+            and self._thread.is_alive()
+            and not self._stop.is_set()
+        )
+
+    def start(self):
+        """Запускає фонову звірку з роутером (перша — одразу)"""
+        self._stop.clear()
+        if self._thread is not None and self._thread.is_alive():
+            return  # зупинку скасовано, потік продовжує звірку
+        self._thread = threading.Thread(
+            target=self._refresh_loop, name="provisioning-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Зупиняє звірку; wait=False не чекає завершення поточного читання"""
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            try:
+                asyncio.run(self.refresh())
+            except Exception as e:
+                logger.warning("Звірка стану provisioning не вдалася: %s", e)
+            self._stop.wait(self.refresh_interval)
+
+    async def refresh(self):
+        """Перечитує стан з роутера одним з'єднанням"""
+        writes = self._writes
+        api = await routeros.connect_async(*self.credentials)
+        try:
+            provisioning = await routeros.talk_async(
+                api, "/interface/wifi/provisioning/print"
+            )
+            configuration = await routeros.talk_async(
+                api,
+                routeros.Query("/interface/wifi/configuration")
+                .select("name", "ssid")
+                .where_in("name", STUDENT_SLAVES.values()),
+            )
+        finally:
+            api.close()
+        if writes != self._writes:
+            # Під час читання стан змінено через write-through — прочитане застаріло
+            return
+        self.load(provisioning, configuration)
+
+    def load(
+        self,
+        provisioning: List[Dict],
+        configuration: Optional[List[Dict]] = None,
+        reconciled: bool = True,
+    ):
+        """
+        Замінює кеш прочитаним з роутера (configuration — за наявності).
+
+        reconciled=False — правила прочитано попутно (план змін), а не
+        повною звіркою: час звірки updated_at не змінюється.
+        """
+        rules = {
+            item["master-configuration"]: dict(item)
+            for item in provisioning
+            if item.get("master-configuration")
+        }
+        ssid = None
+        if configuration is not None:
+            ssid = next(
+                (
+                    item.get("ssid", "")
+                    for item in configuration
+                    if item.get("name") in STUDENT_SLAVES.values()
+                ),
+                "",
+            )
+        with self._lock:
+            self._rules = rules
+            if ssid is not None:
+                self._ssid = ssid
+            if reconciled:
+                self.updated_at = time.time()
+
+    def set_slave(self, master: str, slave: str):
+        """Write-through: правило успішно змінено на роутері"""
+        with self._lock:
+            rule = self._rules.setdefault(
+                master, {"master-configuration": master}
+            )
+            rule["slave-configurations"] = slave
+            self._writes += 1
+            self.updated_at = time.time()  # свіжіше за останню звірку
+
+    def view(self) -> Dict:
+        """Стан для шаблону та API: по інтерфейсу на кожне правило STUDENT_SLAVES"""
+        with self._lock:
+            rules = [dict(rule) for rule in self._rules.values()]
+            by_master = {rule["master-configuration"]: rule for rule in rules}
+            ssid = self._ssid
+            updated_at = self.updated_at
+
+        interfaces = {}
+        for number, master in enumerate(STUDENT_SLAVES):
+            config = by_master.get(master, {}).get("slave-configurations", "")
+            interfaces[f"interface_{number}"] = {
+                "enabled": bool(config),
+                "config": config,
+            }
+        return {
+            "is_enabled": all(item["enabled"] for item in interfaces.values()),
+            "ssid": ssid,
+            "interfaces": interfaces,
+            "config_details": rules,
+            "updated_at": updated_at,
+        }
+
+
+class ProvisioningEngine:
+    """
+    Застосовує бажаний стан CAPsMAN provisioning одним проходом.
+
+    Поточний стан читається один раз, змінюються лише відмінні правила,
+    а provision виконується лише для CAP, яким він потрібен — паралельно
+    через кілька з'єднань RouterOS API (не більше concurrency). Прогрес
+    кожного кроку передається у on_progress.
+    """
+
+    def __init__(
+        self,
+        credentials: Sequence[str],
+        concurrency: int = PROVISION_CONCURRENCY,
+        cache: Optional["ProvisioningStateCache"] = None,
+    ):
+        self.credentials = list(credentials)
+        self.concurrency = max(concurrency, 1)
+        self.cache = cache
+
+    async def plan(
+        self, api: ros_api.Api, desired: Dict[str, str]
+    ) -> ProvisioningPlan:
+        provisioning = await routeros.talk_async(
+            api, "/interface/wifi/provisioning/print"
+        )
+        remote_caps = await routeros.talk_async(
+            api,
+            routeros.Query("/interface/wifi/capsman/remote-cap").select(
+                ".id", "identity", "address", "state"
+            ),
+        )
+        if self.cache is not None:
+            # Свіжо прочитані правила оновлюють кеш, але не час звірки
+            self.cache.load(provisioning, reconciled=False)
+        return plan_provisioning(desired, provisioning, remote_caps)
+
+    async def apply(
+        self,
+        desired: Dict[str, str],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        """
+        Приводить роутер до бажаного стану.
+
+        Returns:
+            Підсумок: кількість змінених правил, успішних та невдалих
+            provision CAP.
+        """
+        emit = on_progress or (lambda event: None)
+        api = await routeros.connect_async(*self.credentials)
+        try:
+            plan = await self.plan(api, desired)
+            emit({"event": "plan", **plan.to_dict()})
+
+            for rule in plan.rules:
+                await routeros.talk_async(
+                    api,
+                    "/interface/wifi/provisioning/set"
+                    f"\n=.id={rule['id']}"
+                    f"\n=slave-configurations={rule['desired']}",
+                )
+                if self.cache is not None:
+                    self.cache.set_slave(rule["master"], rule["desired"])
+                emit({"event": "rule", **rule, "ok": True})
+
+            failed = await self._provision_caps(api, plan.caps, emit)
+        finally:
+            api.close()
+
+        logger.info(
+            "Provisioning: правил змінено %d, CAP оновлено %d, помилок %d, без змін %d",
+            len(plan.rules),
+            len(plan.caps) - len(failed),
+            len(failed),
+            plan.unchanged_caps,
+        )
+        return {
+            "success": not failed,
+            "changed_rules": len(plan.rules),
+            "provisioned": len(plan.caps) - len(failed),
+            "failed": failed,
+            "unchanged_caps": plan.unchanged_caps,
+        }
+
+    async def _provision_caps(
+        self, api: ros_api.Api, caps: List[Dict], emit: ProgressCallback
+    ) -> List[Dict]:
+        """Provision CAP через пул з'єднань; повертає невдалі CAP"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for cap in caps:
+            queue.put_nowait(cap)
+
+        failed: List[Dict] = []
+        progress = {"done": 0, "total": len(caps)}
+
+        def finish(cap: Dict, error: Optional[str] = None):
+            progress["done"] += 1
+            if error is not None:
+                failed.append({**cap, "error": error})
+            emit(
+                {
+                    "event": "cap",
+                    **cap,
+                    "ok": error is None,
+                    "error": error,
+                    **progress,
+                }
+            )
+
+        workers = [self._worker(api, queue, finish)]
+        workers += [
+            self._extra_worker(queue, finish)
+            for _ in range(min(self.concurrency, len(caps)) - 1)
+        ]
+        await asyncio.gather(*workers)
+
+        # Усі з'єднання втрачено раніше, ніж черга спорожніла
+        while not queue.empty():
+            finish(
+                queue.get_nowait(),
+                "Не виконано: з'єднання з роутером втрачено",
+            )
+        return failed
+
+    async def _extra_worker(self, queue: asyncio.Queue, finish: Callable):
+        try:
+            api = await routeros.connect_async(*self.credentials)
+        except Exception as e:
+            # Решту черги оброблять інші з'єднання
+            logger.warning(
+                "Provisioning: додаткове з'єднання не вдалося: %s", e
+            )
+            return
+        try:
+            await self._worker(api, queue, finish)
+        finally:
+            api.close()
+
+    @staticmethod
+    async def _worker(
+        api: ros_api.Api, queue: asyncio.Queue, finish: Callable
+    ):
+        while not queue.empty():
+            cap = queue.get_nowait()
+            try:
+                await routeros.talk_async(
+                    api,
+                    f"/interface/wifi/capsman/remote-cap/provision\n=.id={cap['id']}",
+                )
+            except RouterOSTrapError as e:
+                # Роутер відхилив команду, з'єднання придатне до наступних
+                finish(cap, str(e))
+                continue
+            except (DeadlineExceeded, OSError) as e:
+                # Після таймауту з'єднання непридатне — працівник завершується
+                finish(cap, str(e) or type(e).__name__)
+                return
+            finish(cap)
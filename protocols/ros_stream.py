@@ -0,0 +1,148 @@
+"""
+Потоковий обмін з RouterOS API поверх сокета ros_api.Api.
+
+ros_api.Api.talk чекає на !done, тому непридатний для команд, що ніколи
+не завершуються (=follow=, =interval=, monitor-traffic). StreamSession
+бере вже авторизований сокет і веде кілька команд одночасно, розрізняючи
+відповіді за .tag.
+"""
+
+import socket
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import ros_api
+
+REPLY_RE = "!re"
+REPLY_DONE = "!done"
+REPLY_TRAP = "!trap"
+REPLY_FATAL = "!fatal"
+REPLY_EMPTY = "!empty"
+
+
+class StreamClosed(ConnectionError):
+    """Роутер закрив з'єднання або надіслав !fatal"""
+
+
+class Reply(NamedTuple):
+    kind: str  # !re, !done, !trap, !fatal, !empty
+    tag: Optional[str]
+    attrs: Dict[str, str]
+
+
+def encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return length.to_bytes(1, "big")
+    if length < 0x4000:
+        return (length | 0x8000).to_bytes(2, "big")
+    if length < 0x200000:
+        return (length | 0xC00000).to_bytes(3, "big")
+    if length < 0x10000000:
+        return (length | 0xE0000000).to_bytes(4, "big")
+    return b"\xf0" + length.to_bytes(4, "big")
+
+
+def encode_sentence(words: Iterable[str]) -> bytes:
+    """Речення API: слова з префіксом довжини та нульове слово в кінці"""
+    chunks = []
+    for word in words:
+        data = word.encode("utf-8")
+        chunks.append(encode_length(len(data)))
+        chunks.append(data)
+    chunks.append(b"\x00")
+    return b"".join(chunks)
+
+
+def parse_reply(sentence: List[str]) -> Reply:
+    attrs: Dict[str, str] = {}
+    tag = None
+    for word in sentence[1:]:
+        if word.startswith(".tag="):
+            tag = word[5:]
+        elif word.startswith("="):
+            key, _, value = word[1:].partition("=")
+            attrs[key] = value
+    return Reply(sentence[0], tag, attrs)
+
+
+class StreamSession:
+    """
+    Мультиплексований сеанс RouterOS API.
+
+    Надсилати команди можна з будь-якого потоку; читати відповіді —
+    лише з одного (read блокується до наступного речення або таймауту
+    сокета).
+    """
+
+    def __init__(self, api: ros_api.Api, read_timeout: float):
+        self.api = api
+        self.sock = api.sock
+        self.sock.settimeout(read_timeout)
+        self._buffer = bytearray()
+        self._write_lock = threading.Lock()
+        self._next_tag = 0
+
+    def send(self, words: Iterable[str]) -> str:
+        """Надсилає команду з новим .tag і повертає його"""
+        with self._write_lock:
+            self._next_tag += 1
+            tag = str(self._next_tag)
+            self.sock.sendall(encode_sentence([*words, f".tag={tag}"]))
+        return tag
+
+    def cancel(self, tag: str):
+        """Зупиняє потокову команду (вона завершиться !trap та !done)"""
+        with self._write_lock:
+            self.sock.sendall(encode_sentence(["/cancel", f"=tag={tag}"]))
+
+    def _recv(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            try:
+                chunk = self.sock.recv(65536)
+            except socket.timeout as e:
+                raise TimeoutError("RouterOS не надсилає даних") from e
+            if not chunk:
+                raise StreamClosed("З'єднання з RouterOS закрито")
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _read_length(self) -> int:
+        first = self._recv(1)[0]
+        if first < 0x80:
+            return first
+        if first < 0xC0:
+            return (
+                int.from_bytes(bytes([first]) + self._recv(1), "big") & 0x3FFF
+            )
+        if first < 0xE0:
+            return (
+                int.from_bytes(bytes([first]) + self._recv(2), "big")
+                & 0x1FFFFF
+            )
+        if first < 0xF0:
+            return (
+                int.from_bytes(bytes([first]) + self._recv(3), "big")
+                & 0xFFFFFFF
+            )
+        return int.from_bytes(self._recv(4), "big")
+
+    def read(self) -> Reply:
+        """Наступна відповідь роутера"""
+        sentence: List[str] = []
+        while not sentence:
+            # Порожні речення між відповідями пропускаються
+            while length := self._read_length():
+                sentence.append(
+                    self._recv(length).decode("utf-8", "backslashreplace")
+                )
+        reply = parse_reply(sentence)
+        if reply.kind == REPLY_FATAL:
+            raise StreamClosed(
+                f"RouterOS завершив сеанс: {' '.join(sentence[1:])}"
+            )
+        return reply
+
+    def close(self):
+        self.api.close()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Iterable, Tuple
+
+import ros_api
+from ros_api.api import CreateSocketError, LoginError
+
+from protocols import deadline
+from protocols.breaker import SOURCE_ROUTEROS, breakers
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+ROS_TIMEOUT = 10  # Таймаут сокета RouterOS API, секунд
+
+# Помилки, що означають недоступність самого пристрою
+HOST_ERRORS = (CreateSocketError, OSError)
+
+
+def _word_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+@dataclass(frozen=True)
+class Query:
+    """
+    Команда print з проекцією та фільтрами, що виконуються на роутері.
+
+    Через мережу передаються лише потрібні рядки (?-слова) та колонки
+    (.proplist). Речення будується кортежем слів, тож значення можуть
+    містити пробіли.
+
+        Query("/ip/dhcp-server/lease").select("address", "mac-address").where(
+            status="bound"
+        )
+    """
+
+    path: str
+    proplist: Tuple[str, ...] = ()
+    filters: Tuple[str, ...] = ()
+
+    def select(self, *fields: str) -> "Query":
+        """Повертати лише вказані поля (.proplist)"""
+        return Query(self.path, self.proplist + fields, self.filters)
+
+    def where(self, **equals: Any) -> "Query":
+        """Рівність полів; "_" в імені відповідає "-" (mac_address → mac-address)"""
+        words = tuple(
+            f"?{name.replace('_', '-')}={_word_value(value)}"
+            for name, value in equals.items()
+        )
+        return Query(self.path, self.proplist, self.filters + words)
+
+    def where_in(self, field: str, values: Iterable[Any]) -> "Query":
+        """Поле дорівнює одному зі значень (?field=a ?field=b ?#|)"""
+        values = list(values)
+        if not values:
+            raise ValueError("where_in потребує хоча б одного значення")
+        words = tuple(f"?{field}={_word_value(value)}" for value in values)
+        words += ("?#" + "|" * (len(values) - 1),) if len(values) > 1 else ()
+        return Query(self.path, self.proplist, self.filters + words)
+
+    def has(self, field: str) -> "Query":
+        """Поле присутнє у записі"""
+        return Query(self.path, self.proplist, self.filters + (f"?{field}",))
+
+    def missing(self, field: str) -> "Query":
+        """Поле відсутнє у записі"""
+        return Query(self.path, self.proplist, self.filters + (f"?-{field}",))
+
+    def less(self, field: str, value: Any) -> "Query":
+        return Query(
+            self.path,
+            self.proplist,
+            self.filters + (f"?<{field}={_word_value(value)}",),
+        )
+
+    def greater(self, field: str, value: Any) -> "Query":
+        return Query(
+            self.path,
+            self.proplist,
+            self.filters + (f"?>{field}={_word_value(value)}",),
+        )
+
+    def words(self) -> Tuple[str, ...]:
+        """Речення RouterOS API"""
+        command = self.path.rstrip("/")
+        if not command.endswith("/print"):
+            command += "/print"
+        words: Tuple[str, ...] = (command,)
+        if self.proplist:
+            words += ("=.proplist=" + ",".join(self.proplist),)
+        return words + self.filters
+
+
+def connect(
+    address: str,
+    user: str,
+    password: str,
+    timeout: float = ROS_TIMEOUT,
+    **kwargs,
+) -> ros_api.Api:
+    """
+    Підключається до RouterOS API через запобіжник пристрою.
+
+    Таймаут сокета обмежується залишком дедлайну запиту (якщо він є).
+
+    Raises:
+        DeadlineExceeded: бюджет запиту вичерпано.
+        CircuitOpenError: пристрій відомо недоступний — без спроби з'єднання.
+        CreateSocketError, OSError: пристрій не відповідає.
+        LoginError: пристрій відповідає, але облікові дані невірні.
+    """
+    call_timeout = deadline.timeout(timeout)
+    breaker = breakers.get(address, SOURCE_ROUTEROS)
+    breaker.acquire()
+    try:
+        api = ros_api.Api(
+            address,
+            user=user,
+            password=password,
+            timeout=call_timeout,
+            **kwargs,
+        )
+    except HOST_ERRORS:
+        if call_timeout < timeout:
+            # Таймаут обрізано дедлайном — це не свідчить про збій пристрою
+            deadline.mark_exhausted()
+            breaker.release()
+        else:
+            breaker.record_failure()
+        raise
+    except LoginError:
+        breaker.record_success()
+        raise
+    breaker.record_success()
+    return api
+
+
+async def connect_async(
+    address: str,
+    user: str,
+    password: str,
+    timeout: float = ROS_TIMEOUT,
+    **kwargs,
+) -> ros_api.Api:
+    """Те саме, що connect, без блокування циклу подій"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        deadline.bind(
+            partial(connect, address, user, password, timeout, **kwargs)
+        ),
+    )
+
+
+def talk(api: ros_api.Api, command, timeout: float = ROS_TIMEOUT):
+    """
+    Виконує команду RouterOS з таймаутом у межах дедлайну запиту.
+
+    command — рядок, список рядків або Query.
+
+    Raises:
+        DeadlineExceeded: бюджет вичерпано ще до початку команди.
+        TimeoutError: пристрій не відповів вчасно (з'єднання більше
+            не придатне, його слід закрити).
+    """
+    if isinstance(command, Query):
+        command = command.words()
+    call_timeout = deadline.timeout(timeout)
+    api.sock.settimeout(call_timeout)
+    try:
+        return api.talk(command)
+    except TimeoutError:
+        if call_timeout < timeout:
+            deadline.mark_exhausted()
+        raise
+
+
+async def talk_async(api: ros_api.Api, command, timeout: float = ROS_TIMEOUT):
+    """Те саме, що talk, без блокування циклу подій"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, deadline.bind(partial(talk, api, command, timeout))
+    )
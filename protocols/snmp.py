@@ -4,11 +4,15 @@ import re
 import platform
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional, Dict, Tuple
+from typing import Any, Callable, List, Optional, Dict, Sequence, Set, Tuple
 from functools import wraps
 
 import aiofiles
 
+from protocols import deadline, usm
+from protocols.profiles import Profile, profiles
+from protocols.breaker import SOURCE_SNMP, CircuitOpenError, breakers
+
 # Налаштування логування
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -49,14 +53,21 @@ class SNMPConfig:
     SNMP_TIMEOUT: int = 3
 
     # Обмеження
-    MAX_PHYSICAL_INTERFACES: int = 48
     MAX_RETRIES: int = 3
     USE_BULK: bool = True  # Використовувати bulk-операції
     BULK_SIZE: int = 20  # Кількість значень у bulk-запиті
     MAX_CONCURRENT_INTERFACES: int = 20  # Макс. паралельних запитів
+    # Сторінка GETBULK: max-repetitions у межах [MIN, MAX] так, щоб відповідь
+    # мала не більше PAGE_VARBINDS значень (SNMPv1 чи USE_BULK=False — GETNEXT
+    # по рядку); колонки таблиці обходяться групами по COLUMN_GROUP
+    # паралельно (в межах MAX_CONCURRENT_INTERFACES)
+    INTERFACE_PAGE_ROWS: int = 50
+    INTERFACE_MIN_PAGE_ROWS: int = 25
+    INTERFACE_PAGE_VARBINDS: int = 200
+    INTERFACE_COLUMN_GROUP: int = 4
 
     # Підтримувані версії SNMP
-    SUPPORTED_VERSIONS: tuple = ("1", "2c")
+    SUPPORTED_VERSIONS: tuple = ("1", "2c", "3")
 
     # Типи інтерфейсів для фільтрації (фізичні інтерфейси)
     PHYSICAL_INTERFACE_TYPES: tuple = (
@@ -67,6 +78,14 @@ class SNMPConfig:
         InterfaceType.WIRELESS.value,
     )
 
+    # Типи, для яких ifConnectorPresent відрізняє порт від віртуального
+    # інтерфейсу (VLAN, veth, bridge з ifType ethernetCsmacd)
+    CONNECTOR_TYPES: tuple = (
+        InterfaceType.ETHERNET.value,
+        InterfaceType.FAST_ETHERNET.value,
+        InterfaceType.GIGABIT_ETHERNET.value,
+    )
+
 
 @dataclass
 class InterfaceStats:
@@ -106,12 +125,26 @@ def async_retry(max_retries: int = 3, delay: float = 1.0):
             for attempt in range(max_retries):
                 try:
                     return await func(*args, **kwargs)
+                except (CircuitOpenError, deadline.DeadlineExceeded):
+                    raise  # пристрій недоступний або час вичерпано — не повторюємо
                 except Exception as e:
                     last_exception = e
+                    wait_time = delay * (2**attempt)  # Exponential backoff
+                    if attempt < max_retries - 1 and not deadline.allows(
+                        wait_time
+                    ):
+                        deadline.mark_exhausted()
+                        logger.warning(
+                            "Спроба %d/%d не вдалась: %s. Бюджет запиту вичерпано",
+                            attempt + 1,
+                            max_retries,
+                            e,
+                        )
+                        break
                     if attempt < max_retries - 1:
-                        wait_time = delay * (2**attempt)  # Exponential backoff
                         logger.warning(
-                            "Спроба %d/%d не вдалась: %s. Чекаємо %.1fs перед наступною спробою",
+                            "Спроба %d/%d не вдалась: %s. "
+                            "Чекаємо %.1fs перед наступною спробою",
                             attempt + 1,
                             max_retries,
                             e,
@@ -215,6 +248,7 @@ class AsyncSwitchSNMP:
     # Системні OID
     OID_SYS_DESCR = "1.3.6.1.2.1.1.1.0"  # sysDescr (Модель, прошивка)
     OID_SYS_NAME = "1.3.6.1.2.1.1.5.0"  # sysName (Системне ім'я)
+    OID_SYS_OBJECT_ID = "1.3.6.1.2.1.1.2.0"  # sysObjectID (Виробник/модель)
     OID_SYS_UPTIME = "1.3.6.1.2.1.1.3.0"  # sysUpTime (Uptime)
     OID_SYS_MAC = "1.3.6.1.2.1.2.2.1.6"  # ifPhysAddress (базова MAC-адреса)
 
@@ -230,20 +264,60 @@ class AsyncSwitchSNMP:
     OID_IF_STATUS = "1.3.6.1.2.1.2.2.1.8"  # ifOperStatus
     OID_IF_ADMIN_STATUS = "1.3.6.1.2.1.2.2.1.7"  # ifAdminStatus
     OID_IF_ALIAS = "1.3.6.1.2.1.31.1.1.1.18"  # ifAlias
+    OID_IF_CONNECTOR = "1.3.6.1.2.1.31.1.1.1.17"  # ifConnectorPresent
     OID_IF_IN_ERRORS = "1.3.6.1.2.1.2.2.1.14"  # ifInErrors
     OID_IF_OUT_ERRORS = "1.3.6.1.2.1.2.2.1.20"  # ifOutErrors
 
+    # Колонки, що збираються для кожного інтерфейсу (поле InterfaceStats, OID)
+    INTERFACE_COLUMNS = (
+        ("name", OID_IF_DESCR),
+        ("alias", OID_IF_ALIAS),
+        ("speed", OID_IF_SPEED),
+        ("in_octets", OID_IF_IN_OCTETS),
+        ("out_octets", OID_IF_OUT_OCTETS),
+        ("in_pkts", OID_IF_IN_PKTS),
+        ("out_pkts", OID_IF_OUT_PKTS),
+        ("in_errors", OID_IF_IN_ERRORS),
+        ("out_errors", OID_IF_OUT_ERRORS),
+        ("oper_status", OID_IF_STATUS),
+        ("admin_status", OID_IF_ADMIN_STATUS),
+    )
+
+    # Колонки, що змінюються при подіях лінку (без лічильників трафіку)
+    ROW_STATE_COLUMNS = (
+        ("name", OID_IF_DESCR),
+        ("alias", OID_IF_ALIAS),
+        ("speed", OID_IF_SPEED),
+        ("oper_status", OID_IF_STATUS),
+        ("admin_status", OID_IF_ADMIN_STATUS),
+    )
+
     def __init__(
-        self, host: str, community: str = "public", version: str = "2c"
+        self,
+        host: str,
+        community: str = "public",
+        version: str = "2c",
+        usm_user: Optional[usm.UsmUser] = None,
+        profile: Optional[str] = None,
     ):
+        if version not in SNMPConfig.SUPPORTED_VERSIONS:
+            raise ValueError(f"Непідтримувана версія SNMP {version}")
         self.host = host
         self.community = community
         self.version = version
+        self.usm_user = usm_user
+        self.profile_name = profile  # Профіль збору; None — автовибір
         self.config = SNMPConfig()
         self._semaphore = asyncio.Semaphore(
             self.config.MAX_CONCURRENT_INTERFACES
         )
         self._is_snmp_available = None  # Кешування результату
+        self.breaker = breakers.get(host, SOURCE_SNMP)
+
+    @property
+    def _use_bulk(self) -> bool:
+        """Чи обходити таблиці GETBULK (у SNMPv1 його немає)"""
+        return self.config.USE_BULK and self.version != "1"
 
     async def _check_snmp_availability(self) -> bool:
         """Кешовано перевіряє доступність SNMP інструментів"""
@@ -251,11 +325,85 @@ class AsyncSwitchSNMP:
             self._is_snmp_available = await SNMPToolsChecker.is_installed()
         return self._is_snmp_available
 
+    async def _ensure_reachable(self):
+        """
+        Перевіряє запобіжник пристрою перед серією запитів.
+
+        Якщо запобіжник напіввідкритий, виконує один легкий пробний get.
+
+        Raises:
+            CircuitOpenError: пристрій відомо недоступний.
+        """
+        if not self.breaker.acquire():
+            return
+        try:
+            value = await self._snmp_get(self.OID_SYS_UPTIME)
+        finally:
+            # Результат проби запобіжнику вже передав _snmp_get (відповідь чи
+            # таймаут); інакше — дедлайн чи помилка OID — пробу лише повертаємо
+            self.breaker.release()
+        if value is None:
+            raise CircuitOpenError(self.host, self.breaker.reset_timeout)
+
+    async def is_responding(self) -> bool:
+        """
+        Легка перевірка живості: один get sysUpTime.
+
+        Розімкнений запобіжник означає "не відповідає" без жодного запиту.
+        """
+        try:
+            probing = self.breaker.acquire()
+        except CircuitOpenError:
+            return False
+        try:
+            value = await self._snmp_get(self.OID_SYS_UPTIME)
+        finally:
+            if probing:
+                self.breaker.release()  # невдачу вже врахував _snmp_get
+        return value is not None
+
+    def _record_timeout(self, call_timeout: float):
+        """Таймаут, обрізаний дедлайном запиту, не свідчить про збій пристрою"""
+        if call_timeout < self.config.SNMP_TIMEOUT:
+            deadline.mark_exhausted()
+        else:
+            self.breaker.record_failure()
+
+    def _record_outcome(self, returncode: int, stderr: str):
+        """Передає результат запиту запобіжнику (помилки OID не рахуються)"""
+        if returncode == 0:
+            self.breaker.record_success()
+            return
+        if "Timeout" in stderr or "No Response" in stderr:
+            self.breaker.record_failure()
+        if self.version == "3" and usm.is_usm_error(stderr):
+            # Агент перезавантажився або змінив engineID — виявимо знову
+            usm.engines.invalidate(self.host)
+
+    async def _version_args(self) -> List[str]:
+        """
+        Аргументи версії та безпеки для утиліт net-snmp.
+
+        Для SNMPv3 engine агента виявляється один раз і кешується разом
+        з локалізованими ключами, тож кожен запит — один обмін, як у v2c.
+        """
+        if self.version != "3":
+            return ["-v", self.version, "-c", self.community]
+        if self.usm_user is None:
+            raise ValueError(
+                f"Для SNMPv3 {self.host} не задано обліковий запис USM"
+            )
+        engine = await usm.engines.get(
+            self.host, deadline.timeout(self.config.SNMP_TIMEOUT)
+        )
+        return usm.command_args(self.usm_user, engine)
+
     @async_retry(max_retries=SNMPConfig.MAX_RETRIES, delay=1.0)
     async def get_system_info(self) -> Dict[str, Optional[str]]:
         """
         Асинхронно отримує основну системну інформацію про пристрій.
         """
+        await self._ensure_reachable()
         if not await self._check_snmp_availability():
             logger.error(
                 "Спроба отримати інформацію про систему при відсутніх SNMP інструментах"
@@ -268,9 +416,12 @@ class AsyncSwitchSNMP:
                 self._snmp_get(self.OID_SYS_DESCR),
                 self._snmp_get(self.OID_SYS_NAME),
                 self._snmp_get(self.OID_SYS_UPTIME),
+                self._snmp_get(self.OID_SYS_OBJECT_ID),
             ]
 
-            model, system_name, uptime = await asyncio.gather(*system_tasks)
+            model, system_name, uptime, object_id = await asyncio.gather(
+                *system_tasks
+            )
 
             # Отримуємо базову MAC-адресу
             mac_address = await self._get_base_mac_address()
@@ -280,11 +431,18 @@ class AsyncSwitchSNMP:
                 "system_name": system_name,
                 "uptime": uptime,
                 "mac_address": mac_address,
+                "object_id": object_id,
             }
 
             logger.info("Системна інформація успішно отримана.")
             return info
 
+        except deadline.DeadlineExceeded as e:
+            # Бюджет запиту вичерпано (запит позначено неповним) — не збій
+            logger.warning(
+                "Системна інформація %s не отримана: %s", self.host, e
+            )
+            return {}
         except Exception as e:
             logger.error(
                 "Критична помилка при отриманні системної інформації: %s",
@@ -319,101 +477,262 @@ class AsyncSwitchSNMP:
             return mac_string.replace(" ", ":")
 
     @async_retry(max_retries=SNMPConfig.MAX_RETRIES, delay=1.0)
-    async def get_interfaces_stats(self) -> Dict[int, InterfaceStats]:
-        """Асинхронно отримує статистику з використанням bulk-операцій"""
+    async def get_interfaces_columns(
+        self,
+    ) -> Tuple[List[int], Dict[str, Dict[int, str]]]:
+        """
+        Асинхронно отримує сирі колонки ifTable/ifXTable посторінково.
+
+        Returns:
+            (індекси фізичних інтерфейсів, {назва колонки: {index: value}})
+        """
+        await self._ensure_reachable()
 
         if not await self._check_snmp_availability():
             logger.error(
                 "Спроба отримати інформацію про систему при відсутніх SNMP інструментах"
             )
-            return {}
+            return [], {}
 
         try:
             # Отримуємо індекси інтерфейсів
             if_indexes = await self._get_interface_indexes()
             if not if_indexes:
-                return {}
-
-            # Отримуємо всі дані за один паралельний запит
-            oid_tasks = [
-                self._snmp_walk(self.OID_IF_DESCR),
-                self._snmp_walk(self.OID_IF_ALIAS),
-                self._snmp_walk(self.OID_IF_SPEED),
-                self._snmp_walk(self.OID_IF_IN_OCTETS),
-                self._snmp_walk(self.OID_IF_OUT_OCTETS),
-                self._snmp_walk(self.OID_IF_IN_PKTS),
-                self._snmp_walk(self.OID_IF_OUT_PKTS),
-                self._snmp_walk(self.OID_IF_IN_ERRORS),
-                self._snmp_walk(self.OID_IF_OUT_ERRORS),
-                self._snmp_walk(self.OID_IF_STATUS),
-                self._snmp_walk(self.OID_IF_ADMIN_STATUS),
-            ]
+                return [], {}
 
-            # Виконуємо всі запити паралельно
-            results = await asyncio.gather(*oid_tasks)
-
-            # Розпаковуємо результати
-            (
-                descr_data,
-                alias_data,
-                speed_data,
-                in_octets_data,
-                out_octets_data,
-                in_pkts_data,
-                out_pkts_data,
-                in_errors_data,
-                out_errors_data,
-                status_data,
-                admin_status_data,
-            ) = results
-
-            # Створюємо обмежений семафор для паралельної обробки інтерфейсів
-            semaphore = asyncio.Semaphore(
-                self.config.MAX_CONCURRENT_INTERFACES
+            # Усі колонки — посторінково, лише рядки фізичних портів
+            columns = await self._walk_table(
+                self.INTERFACE_COLUMNS, set(if_indexes)
             )
+            if columns is None:
+                return [], {}
+            return if_indexes, columns
+
+        except deadline.DeadlineExceeded as e:
+            logger.warning("Інтерфейси %s не отримано: %s", self.host, e)
+            return [], {}
+
+    async def get_interface_rows(
+        self, if_indexes: List[int], columns: Tuple = ROW_STATE_COLUMNS
+    ) -> Dict[str, Dict[int, str]]:
+        """
+        Асинхронно опитує лише вказані рядки ifTable (snmpget без walk).
 
-            async def process_interface(index):
-                """Обробка даних для одного інтерфейсу"""
-                async with semaphore:
-                    return InterfaceStats(
-                        index=index,
-                        name=descr_data.get(index, ""),
-                        alias=alias_data.get(index, ""),
-                        speed=self._safe_int(speed_data.get(index)),
-                        in_octets=self._safe_int(in_octets_data.get(index)),
-                        out_octets=self._safe_int(out_octets_data.get(index)),
-                        in_pkts=self._safe_int(in_pkts_data.get(index)),
-                        out_pkts=self._safe_int(out_pkts_data.get(index)),
-                        in_errors=self._safe_int(in_errors_data.get(index)),
-                        out_errors=self._safe_int(out_errors_data.get(index)),
-                        admin_status=self._safe_int(
-                            admin_status_data.get(index)
-                        ),
-                        oper_status=self._safe_int(status_data.get(index)),
+        Returns:
+            {назва колонки: {index: value}} — той самий формат,
+            що й у get_interfaces_columns
+        """
+        if not if_indexes or not await self._check_snmp_availability():
+            return {}
+        await self._ensure_reachable()
+
+        oids = {
+            f"{oid}.{index}": (name, index)
+            for name, oid in columns
+            for index in if_indexes
+        }
+        names = list(oids)
+        chunks = [
+            names[i : i + self.config.BULK_SIZE]
+            for i in range(0, len(names), self.config.BULK_SIZE)
+        ]
+        results = await asyncio.gather(
+            *(self._snmp_get_many(chunk) for chunk in chunks)
+        )
+
+        rows: Dict[str, Dict[int, str]] = {}
+        for values in results:
+            for oid, value in values.items():
+                name, index = oids[oid]
+                rows.setdefault(name, {})[index] = value
+        return rows
+
+    async def get_interfaces_stats(self) -> Dict[int, InterfaceStats]:
+        """Асинхронно отримує статистику з використанням bulk-операцій"""
+        if_indexes, columns = await self.get_interfaces_columns()
+        if not if_indexes:
+            return {}
+
+        text_fields = ("name", "alias")
+        return {
+            index: InterfaceStats(
+                index=index,
+                **{
+                    name: (
+                        data.get(index, "")
+                        if name in text_fields
+                        else self._safe_int(data.get(index))
                     )
+                    for name, data in columns.items()
+                },
+            )
+            for index in if_indexes
+        }
 
-            # Паралельна обробка всіх інтерфейсів
-            tasks = [process_interface(i) for i in if_indexes]
-            interfaces_list = await asyncio.gather(*tasks)
+    def select_profile(self, system_info: Dict[str, Optional[str]]) -> Profile:
+        """Профіль з поля інвентаря "profile" або за sysObjectID/sysDescr"""
+        if self.profile_name:
+            return profiles.get(self.profile_name)
+        return profiles.select(
+            self.host, system_info.get("object_id"), system_info.get("model")
+        )
 
-            # Формуємо словник результатів
-            return {iface.index: iface for iface in interfaces_list}
+    async def collect_profile(
+        self, system_info: Dict[str, Optional[str]]
+    ) -> Dict[str, Any]:
+        """
+        Асинхронно збирає метрики профілю пристрою (PoE, температура, оптика).
 
-        except Exception as e:
-            logger.error("Помилка отримання статистики: %s", e)
+        Скаляри читаються одним get, кожна таблиця — одним walk; varbinds
+        розкладаються по метриках префіксним деревом профілю.
+
+        Returns:
+            {"profile", "scalars", "tables"} або {}, якщо профіль порожній
+        """
+        profile = self.select_profile(system_info)
+        if profile.empty or not await self._check_snmp_availability():
             return {}
+        await self._ensure_reachable()
+
+        scalars = list(profile.scalars)
+        chunks = [
+            scalars[i : i + self.config.BULK_SIZE]
+            for i in range(0, len(scalars), self.config.BULK_SIZE)
+        ]
+        results = await asyncio.gather(
+            *(self._snmp_walk_varbinds(oid) for oid in profile.walk_roots),
+            *(self._snmp_get_many(chunk) for chunk in chunks),
+        )
+        return profile.route(
+            (oid, value) for values in results for oid, value in values.items()
+        )
 
     async def _get_interface_indexes(self) -> List[int]:
-        """Асинхронно отримує список індексів фізичних інтерфейсів"""
-        indexes = await self._snmp_walk(self.OID_IF_TYPE)
-        return [
+        """
+        Асинхронно отримує індекси фізичних інтерфейсів за ifType та
+        ifConnectorPresent.
+
+        Значення ifIndex не обмежується: стекові комутатори та шасі мають
+        індекси на кшталт 1001, 2001 чи 10101. Агенти без ifXTable
+        (ifConnectorPresent відсутній) фільтруються лише за ifType.
+        """
+        table = await self._walk_table(
+            (("type", self.OID_IF_TYPE), ("connector", self.OID_IF_CONNECTOR))
+        )
+        if table is None:
+            return []
+        connectors = table["connector"]
+        return sorted(
             index
-            for index, value in indexes.items()
-            if (
-                value in self.config.PHYSICAL_INTERFACE_TYPES
-                and index <= self.config.MAX_PHYSICAL_INTERFACES
+            for index, if_type in table["type"].items()
+            if if_type in self.config.PHYSICAL_INTERFACE_TYPES
+            and not (
+                if_type in self.config.CONNECTOR_TYPES
+                and connectors.get(index) in ("2", "false")
             )
-        ]
+        )
+
+    async def _walk_table(
+        self,
+        columns: Sequence[Tuple[str, str]],
+        rows: Optional[Set[int]] = None,
+    ) -> Optional[Dict[str, Dict[int, str]]]:
+        """
+        Асинхронно обходить колонки таблиці сторінками за діапазонами ifIndex.
+
+        Колонки діляться на групи по INTERFACE_COLUMN_GROUP, і групи
+        обходяться паралельно; кількість одночасних запитів обмежує семафор
+        клієнта. Зберігаються лише рядки з rows (None — усі), тож вивід
+        шасі з тисячами інтерфейсів не накопичується цілком.
+
+        Returns:
+            {назва колонки: {index: value}} або None, якщо сторінку не отримано
+        """
+        size = max(self.config.INTERFACE_COLUMN_GROUP, 1)
+        groups = [columns[i : i + size] for i in range(0, len(columns), size)]
+        results = await asyncio.gather(
+            *(self._walk_columns(group, rows) for group in groups)
+        )
+        if any(result is None for result in results):
+            return None
+        return {
+            name: data for result in results for name, data in result.items()
+        }
+
+    def _page_rows(self, columns: int) -> int:
+        """
+        max-repetitions сторінки: відповідь у межах INTERFACE_PAGE_VARBINDS.
+
+        Без GETBULK (SNMPv1 або USE_BULK=False) сторінка — один рядок GETNEXT.
+        """
+        if not self._use_bulk:
+            return 1
+        rows = self.config.INTERFACE_PAGE_VARBINDS // max(columns, 1)
+        return max(
+            self.config.INTERFACE_MIN_PAGE_ROWS,
+            min(rows, self.config.INTERFACE_PAGE_ROWS),
+        )
+
+    async def _walk_columns(
+        self,
+        columns: Sequence[Tuple[str, str]],
+        rows: Optional[Set[int]] = None,
+    ) -> Optional[Dict[str, Dict[int, str]]]:
+        """
+        Обходить групу колонок послідовними сторінками.
+
+        Кожна сторінка — один GETBULK (без нього — GETNEXT) з усіма ще
+        не пройденими колонками групи, що починається після останнього
+        отриманого індексу.
+        """
+        result: Dict[str, Dict[int, str]] = {name: {} for name, _ in columns}
+        active = list(columns)
+        cursor = 0
+        while active:
+            varbinds = await self._snmp_page(
+                [f"{oid}.{cursor}" if cursor else oid for _, oid in active],
+                self._page_rows(len(active)),
+            )
+            if varbinds is None:
+                return None
+            if len(varbinds) < len(active):
+                logger.error("Неповна сторінка таблиці від %s", self.host)
+                return None
+
+            # У відповіді колонки чергуються: varbind i — колонка i mod n
+            finished, reached = set(), {}
+            for position, (oid, value) in enumerate(varbinds):
+                name, base_oid = active[position % len(active)]
+                if name in finished:
+                    continue
+                index = self._column_index(base_oid, oid, value)
+                if index is None or index <= cursor:
+                    finished.add(name)  # колонку пройдено до кінця
+                    continue
+                reached[name] = index
+                if rows is None or index in rows:
+                    result[name][index] = value
+
+            active = [
+                (name, oid)
+                for name, oid in active
+                if name in reached and name not in finished
+            ]
+            if active:
+                # Наступна сторінка — після рядка, до якого дійшли всі колонки
+                cursor = min(reached[name] for name, _ in active)
+        return result
+
+    @staticmethod
+    def _column_index(base_oid: str, oid: str, value: str) -> Optional[int]:
+        """ifIndex з OID колонки або None, якщо OID вже за межами колонки"""
+        prefix = base_oid + "."
+        if not oid.startswith(prefix) or value.startswith(
+            ("No Such", "No more")
+        ):
+            return None
+        suffix = oid[len(prefix) :]
+        return int(suffix) if suffix.isdigit() else None
 
     @staticmethod
     def _safe_int(value: Optional[str]) -> int:
@@ -433,14 +752,22 @@ class AsyncSwitchSNMP:
         Returns:
             Словник {index: value} для всіх знайдених інстансів
         """
+        output = await self._run_walk(base_oid)
+        return self._parse_snmp_walk_output(output) if output else {}
+
+    async def _snmp_walk_varbinds(self, base_oid: str) -> Dict[str, str]:
+        """Асинхронно виконує SNMP walk і повертає {повний OID: value}"""
+        output = await self._run_walk(base_oid)
+        return self._parse_varbinds(output) if output else {}
+
+    async def _run_walk(self, base_oid: str) -> Optional[str]:
+        """Вивід snmp(bulk)walk або None, якщо сталася помилка"""
         async with self._semaphore:
             try:
+                call_timeout = deadline.timeout(self.config.SNMP_TIMEOUT)
                 command_args = [
-                    "snmpbulkwalk" if self.config.USE_BULK else "snmpwalk",
-                    "-v",
-                    self.version,
-                    "-c",
-                    self.community,
+                    "snmpbulkwalk" if self._use_bulk else "snmpwalk",
+                    *await self._version_args(),
                     "-OQ",
                     "-On",
                     self.host,
@@ -448,7 +775,7 @@ class AsyncSwitchSNMP:
                 ]
 
                 # Додаємо параметри для bulk запитів
-                if self.config.USE_BULK:
+                if self._use_bulk:
                     command_args.extend([f"-Cr{str(self.config.BULK_SIZE)}"])
 
                 proc = await asyncio.create_subprocess_exec(
@@ -459,20 +786,22 @@ class AsyncSwitchSNMP:
 
                 # Чекаємо завершення з таймаутом
                 stdout, stderr = await asyncio.wait_for(
-                    proc.communicate(), timeout=self.config.SNMP_TIMEOUT
+                    proc.communicate(), timeout=call_timeout
                 )
 
+                self._record_outcome(proc.returncode, stderr.decode())
                 if proc.returncode == 0:
-                    return self._parse_snmp_walk_output(stdout.decode())
+                    return stdout.decode()
                 else:
                     logger.error(
                         "SNMP walk помилка для %s: %s}",
                         base_oid,
                         stderr.decode().strip(),
                     )
-                    return {}
+                    return None
 
             except asyncio.TimeoutError:
+                self._record_timeout(call_timeout)
                 logger.error(
                     "Таймаут виконання SNMP walk для OID %s", base_oid
                 )
@@ -480,10 +809,78 @@ class AsyncSwitchSNMP:
                     proc.kill()
                 except:
                     pass
-                return {}
+                return None
+            except deadline.DeadlineExceeded:
+                raise  # пропуск виклику, а не збій пристрою
             except Exception as e:
                 logger.error("Невідома помилка при виконанні SNMP walk: %s", e)
-                return {}
+                return None
+
+    async def _snmp_page(
+        self, oids: List[str], repetitions: int
+    ) -> Optional[List[Tuple[str, str]]]:
+        """
+        Асинхронно виконує один GETBULK (усі OID — повторювані) або, без
+        GETBULK, один GETNEXT (repetitions ігнорується).
+
+        Returns:
+            Список (OID, value) у порядку відповіді або None при помилці
+        """
+        if self._use_bulk:
+            command = ["snmpbulkget", "-Cn0", f"-Cr{repetitions}"]
+        else:
+            command = ["snmpgetnext"]
+        async with self._semaphore:
+            try:
+                call_timeout = deadline.timeout(self.config.SNMP_TIMEOUT)
+                proc = await asyncio.create_subprocess_exec(
+                    command[0],
+                    *await self._version_args(),
+                    *command[1:],
+                    "-OQ",
+                    "-On",
+                    self.host,
+                    *oids,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+
+                stdout, stderr = await asyncio.wait_for(
+                    proc.communicate(), timeout=call_timeout
+                )
+
+                self._record_outcome(proc.returncode, stderr.decode())
+                if proc.returncode != 0:
+                    logger.error(
+                        "SNMP %s помилка для %s: %s",
+                        command[0],
+                        self.host,
+                        stderr.decode().strip(),
+                    )
+                    return None
+
+            except asyncio.TimeoutError:
+                self._record_timeout(call_timeout)
+                logger.error(
+                    "Таймаут виконання SNMP %s для %s", command[0], self.host
+                )
+                try:
+                    proc.kill()
+                except:
+                    pass
+                return None
+            except deadline.DeadlineExceeded:
+                raise  # пропуск виклику, а не збій пристрою
+            except Exception as e:
+                logger.error(
+                    "Невідома помилка при SNMP %s для %s: %s",
+                    command[0],
+                    self.host,
+                    e,
+                )
+                return None
+
+        return self._parse_varbind_list(stdout.decode())
 
     async def _snmp_get(self, oid: str) -> Optional[str]:
         """
@@ -497,13 +894,11 @@ class AsyncSwitchSNMP:
         """
         async with self._semaphore:  # Обмежуємо кількість одночасних запитів
             try:
+                call_timeout = deadline.timeout(self.config.SNMP_TIMEOUT)
                 # Створюємо процес асинхронно
                 proc = await asyncio.create_subprocess_exec(
                     "snmpget",
-                    "-v",
-                    self.version,
-                    "-c",
-                    self.community,
+                    *await self._version_args(),
                     "-Oqv",  # Вивід лише значення
                     self.host,
                     oid,
@@ -513,9 +908,10 @@ class AsyncSwitchSNMP:
 
                 # Чекаємо завершення з таймаутом
                 stdout, stderr = await asyncio.wait_for(
-                    proc.communicate(), timeout=self.config.SNMP_TIMEOUT
+                    proc.communicate(), timeout=call_timeout
                 )
 
+                self._record_outcome(proc.returncode, stderr.decode())
                 if proc.returncode == 0:
                     value_raw = stdout.decode().strip()
                     # Видаляємо лапки зі значення якщо вони є
@@ -531,12 +927,15 @@ class AsyncSwitchSNMP:
                     return None
 
             except asyncio.TimeoutError:
+                self._record_timeout(call_timeout)
                 logger.warning("Таймаут виконання SNMP get для OID %s", oid)
                 try:
                     proc.kill()
                 except:
                     pass
                 return None
+            except deadline.DeadlineExceeded:
+                raise  # пропуск виклику, а не збій пристрою
             except Exception as e:
                 logger.warning(
                     "Невідома помилка при SNMP get для OID %s: %s",
@@ -545,6 +944,87 @@ class AsyncSwitchSNMP:
                 )
                 return None
 
+    async def _snmp_get_many(self, oids: List[str]) -> Dict[str, str]:
+        """
+        Асинхронно виконує один SNMP get для кількох OID.
+
+        Returns:
+            Словник {oid: value}; відсутні інстанси пропускаються.
+        """
+        async with self._semaphore:
+            try:
+                call_timeout = deadline.timeout(self.config.SNMP_TIMEOUT)
+                proc = await asyncio.create_subprocess_exec(
+                    "snmpget",
+                    *await self._version_args(),
+                    "-OQ",
+                    "-On",
+                    self.host,
+                    *oids,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+
+                stdout, stderr = await asyncio.wait_for(
+                    proc.communicate(), timeout=call_timeout
+                )
+
+                self._record_outcome(proc.returncode, stderr.decode())
+                if proc.returncode != 0:
+                    logger.warning(
+                        "Не вдалося отримати %d OID з %s: %s",
+                        len(oids),
+                        self.host,
+                        stderr.decode().strip(),
+                    )
+                    return {}
+
+            except asyncio.TimeoutError:
+                self._record_timeout(call_timeout)
+                logger.warning("Таймаут виконання SNMP get для %s", self.host)
+                try:
+                    proc.kill()
+                except:
+                    pass
+                return {}
+            except deadline.DeadlineExceeded:
+                raise  # пропуск виклику, а не збій пристрою
+            except Exception as e:
+                logger.warning(
+                    "Невідома помилка при SNMP get для %s: %s", self.host, e
+                )
+                return {}
+
+        return self._parse_varbinds(stdout.decode())
+
+    @staticmethod
+    def _parse_varbind_list(output: str) -> List[Tuple[str, str]]:
+        """
+        Парсить вивід -OQ -On у список (OID, value) у порядку відповіді.
+
+        Позначки "No Such ..."/"No more ..." лишаються: для GETBULK позиція
+        varbind визначає колонку.
+        """
+        results = []
+        for line in output.splitlines():
+            oid, sep, value = line.partition(" = ")
+            if not sep:
+                continue
+            value = value.strip()
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]
+            results.append((oid.strip().lstrip("."), value))
+        return results
+
+    @classmethod
+    def _parse_varbinds(cls, output: str) -> Dict[str, str]:
+        """Парсить вивід -OQ -On у словник {OID: value}"""
+        return {
+            oid: value
+            for oid, value in cls._parse_varbind_list(output)
+            if not value.startswith(("No Such", "No more"))
+        }
+
     @staticmethod
     def _parse_snmp_walk_output(output: str) -> Dict[int, str]:
         """Парсить вивід SNMP walk у словник {index: value}"""
@@ -575,12 +1055,14 @@ class AsyncSwitchSNMP:
     @staticmethod
     async def get_multiple_switches_stats(
         switches_config: List[Dict[str, str]],
+        client: Optional[Callable[[Dict], "AsyncSwitchSNMP"]] = None,
     ) -> Dict[str, Dict[int, InterfaceStats]]:
         """
         Асинхронно отримує статистику з кількох комутаторів паралельно
 
         Args:
             switches_config: Список кортежів (host, community, version)
+            client: Фабрика клієнта для запису інвентаря (для SNMPv3)
 
         Returns:
             Словник {host: {interface_index: InterfaceStats}}
@@ -590,8 +1072,12 @@ class AsyncSwitchSNMP:
         system_info = []
 
         for data in switches_config:
-            switch = AsyncSwitchSNMP(
-                data["ip"], data["community"], data["version"]
+            switch = (
+                client(data)
+                if client
+                else AsyncSwitchSNMP(
+                    data["ip"], data["community"], data["version"]
+                )
             )
             tasks.append(switch.get_interfaces_stats())
             system_info.append(switch.get_system_info())
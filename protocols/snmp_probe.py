@@ -0,0 +1,154 @@
+"""
+Легкий SNMPv1/v2c GET поверх одного UDP-сокета.
+
+Призначений для масових опитувань (пошук пристроїв у підмережах), де
+запуск процесу net-snmp на кожну адресу занадто дорогий: тисячі запитів
+одночасно розрізняються за request-id і не потребують окремих сокетів.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from protocols import ber
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+SNMP_PORT = 161
+VERSION_NUMBERS = {"1": 0, "2c": 1}
+
+
+def encode_get(
+    request_id: int, community: str, oids: Iterable[str], version: str = "2c"
+) -> bytes:
+    pdu = (
+        ber.encode_integer(request_id)
+        + ber.encode_integer(0)  # error-status
+        + ber.encode_integer(0)  # error-index
+        + ber.encode_null_varbinds(oids)
+    )
+    return ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_integer(VERSION_NUMBERS[version])
+        + ber.encode_tlv(ber.OCTET_STRING, community.encode())
+        + ber.encode_tlv(ber.GET_REQUEST, pdu),
+    )
+
+
+def decode_response(data: bytes) -> Tuple[int, int, Dict[str, Any]]:
+    """
+    Розбирає GetResponse.
+
+    Returns:
+        (request-id, error-status, varbinds)
+
+    Raises:
+        BERError: повідомлення пошкоджене або не є GetResponse.
+    """
+    tag, message, _ = ber.decode_tlv(data)
+    if tag != ber.SEQUENCE:
+        raise ber.BERError("Повідомлення SNMP має бути SEQUENCE")
+    items = ber.decode_sequence(message)
+    if len(items) != 3 or items[2][0] != ber.GET_RESPONSE:
+        raise ber.BERError("Очікувався GetResponse")
+    fields = ber.decode_sequence(items[2][1])
+    return (
+        ber.decode_integer(fields[0][1]),
+        ber.decode_integer(fields[1][1]),
+        ber.decode_varbinds(fields[3][1]),
+    )
+
+
+class _ProbeProtocol(asyncio.DatagramProtocol):
+    def __init__(self, prober: "SnmpProber"):
+        self.prober = prober
+
+    def datagram_received(self, data: bytes, addr):
+        self.prober._on_response(data, addr)
+
+    def error_received(self, exc):
+        # ICMP port unreachable тощо — запит завершиться за таймаутом
+        logger.debug("SNMP-проба: %s", exc)
+
+
+class SnmpProber:
+    """
+    Пул одночасних SNMP GET на одному сокеті.
+
+        async with SnmpProber() as prober:
+            values = await prober.get("10.0.0.1", ["1.3.6.1.2.1.1.1.0"])
+    """
+
+    def __init__(self, port: int = SNMP_PORT):
+        self.port = port
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._pending: Dict[int, Tuple[str, asyncio.Future]] = {}
+        self._ids = itertools.count(1)
+
+    async def __aenter__(self) -> "SnmpProber":
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ProbeProtocol(self), local_addr=("0.0.0.0", 0)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._transport is not None:
+            self._transport.close()
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    def _on_response(self, data: bytes, addr):
+        try:
+            request_id, error, varbinds = decode_response(data)
+        except (ber.BERError, IndexError, ValueError):
+            return
+        host, future = self._pending.get(request_id, (None, None))
+        # Відповідь має прийти саме з опитуваної адреси
+        if future is None or host != addr[0] or future.done():
+            return
+        future.set_result(varbinds if error == 0 else {})
+
+    async def get(
+        self,
+        host: str,
+        oids: Iterable[str],
+        community: str = "public",
+        version: str = "2c",
+        timeout: float = 1.0,
+        retries: int = 1,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Значення OID пристрою або None, якщо він не відповів.
+
+        Невідомі агенту OID повертаються як None; помилка у відповіді
+        (наприклад, noSuchName у SNMPv1) — порожнім словником.
+        """
+        oids = list(oids)
+        loop = asyncio.get_running_loop()
+        for _ in range(retries + 1):
+            request_id = next(self._ids) & 0x7FFFFFFF
+            future = loop.create_future()
+            self._pending[request_id] = (host, future)
+            try:
+                self._transport.sendto(
+                    encode_get(request_id, community, oids, version),
+                    (host, self.port),
+                )
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                continue
+            except OSError as e:
+                # Адреса недосяжна (наприклад, broadcast) — повтори не допоможуть
+                logger.debug("SNMP-проба %s: %s", host, e)
+                return None
+            finally:
+                self._pending.pop(request_id, None)
+        return None
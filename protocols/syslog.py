@@ -0,0 +1,81 @@
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# RFC 5424: <PRI>VERSION TIMESTAMP HOSTNAME APP-NAME PROCID MSGID SD MSG
+RFC5424 = re.compile(
+    r"^<(?P<pri>\d{1,3})>(?P<version>\d{1,2}) "
+    r"(?P<timestamp>\S+) (?P<hostname>\S+) (?P<app>\S+) \S+ \S+ "
+    r"(?P<sd>-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (?P<msg>.*))?$",
+    re.DOTALL,
+)
+# RFC 3164: <PRI>Mmm dd hh:mm:ss HOSTNAME TAG: MSG (HOSTNAME/TAG необов'язкові)
+RFC3164 = re.compile(
+    r"^<(?P<pri>\d{1,3})>"
+    r"(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) "
+    r"(?P<msg>.*)$",
+    re.DOTALL,
+)
+
+# Повідомлення RouterOS про стан лінку та перезавантаження
+LINK_STATE = re.compile(r"(?P<interface>[^\s,:]+) link (?P<state>up|down)\b")
+REBOOT = re.compile(r"\b(?:router|system) (?:was )?rebooted\b", re.IGNORECASE)
+
+LINK_UP = "up"
+LINK_DOWN = "down"
+
+
+@dataclass(frozen=True)
+class SyslogMessage:
+    """Розібране повідомлення syslog"""
+
+    facility: int
+    severity: int
+    timestamp: str
+    hostname: str
+    app: str
+    message: str
+
+
+def parse_syslog(data: bytes) -> Optional[SyslogMessage]:
+    """Розбирає датаграму syslog RFC 5424 або RFC 3164 (BSD)"""
+    text = data.decode("utf-8", "replace").strip().lstrip("\ufeff")
+
+    match = RFC5424.match(text)
+    if match:
+        msg = (match.group("msg") or "").lstrip("\ufeff")
+        hostname, app = match.group("hostname"), match.group("app")
+    else:
+        match = RFC3164.match(text)
+        if not match:
+            return None
+        hostname, app, msg = "", "", match.group("msg")
+        # Необов'язкові HOSTNAME і TAG перед текстом повідомлення
+        head, _, rest = msg.partition(" ")
+        if rest and not head.endswith(":"):
+            hostname, msg = head, rest
+        tag, sep, rest = msg.partition(": ")
+        if sep and " " not in tag:
+            app, msg = tag, rest
+
+    pri = int(match.group("pri"))
+    return SyslogMessage(
+        facility=pri >> 3,
+        severity=pri & 0x07,
+        timestamp=match.group("timestamp"),
+        hostname="" if hostname == "-" else hostname,
+        app="" if app == "-" else app,
+        message=msg.strip(),
+    )
+
+
+def link_event(message: str) -> Optional[Tuple[str, str]]:
+    """(інтерфейс, "up"/"down") з повідомлення на кшталт "ether3 link down" """
+    match = LINK_STATE.search(message)
+    if match is None:
+        return None
+    return match.group("interface"), match.group("state")
+
+
+def is_reboot(message: str) -> bool:
+    return REBOOT.search(message) is not None
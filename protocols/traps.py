@@ -0,0 +1,122 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from protocols import ber
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+# SNMPv2-MIB
+OID_SNMP_TRAP_OID = "1.3.6.1.6.3.1.1.4.1.0"  # snmpTrapOID.0
+OID_SYS_UPTIME = "1.3.6.1.2.1.1.3.0"  # sysUpTime.0
+OID_SNMP_TRAPS = "1.3.6.1.6.3.1.1.5"  # snmpTraps
+
+# Стандартні трапи (RFC 3418 / RFC 2863)
+TRAP_COLD_START = f"{OID_SNMP_TRAPS}.1"
+TRAP_WARM_START = f"{OID_SNMP_TRAPS}.2"
+TRAP_LINK_DOWN = f"{OID_SNMP_TRAPS}.3"
+TRAP_LINK_UP = f"{OID_SNMP_TRAPS}.4"
+
+# Колонка ifIndex у varbind трапів linkUp/linkDown
+OID_IF_INDEX = "1.3.6.1.2.1.2.2.1.1"
+
+# Номер версії в повідомленні -> версія SNMP
+VERSIONS = {0: "1", 1: "2c"}
+
+
+@dataclass(frozen=True)
+class Trap:
+    """Розібраний трап SNMPv1/v2c або inform"""
+
+    version: str
+    community: str
+    trap_oid: str
+    agent_addr: Optional[str] = None  # лише SNMPv1
+    varbinds: Dict[str, Any] = field(default_factory=dict)
+    response: Optional[bytes] = None  # підтвердження для inform
+
+    @property
+    def if_index(self) -> Optional[int]:
+        """ifIndex із varbind трапу linkUp/linkDown"""
+        prefix = OID_IF_INDEX + "."
+        for oid, value in self.varbinds.items():
+            if oid.startswith(prefix):
+                return (
+                    int(value)
+                    if value is not None
+                    else int(oid[len(prefix) :])
+                )
+        return None
+
+
+def decode_trap(data: bytes) -> Trap:
+    """
+    Розбирає датаграму з трапом.
+
+    Трап SNMPv1 перетворюється на еквівалентний snmpTrapOID SNMPv2
+    (RFC 3584), тож далі обидві версії обробляються однаково.
+
+    Raises:
+        BERError: повідомлення пошкоджене або не є трапом v1/v2c.
+    """
+    tag, message, _ = ber.decode_tlv(data)
+    if tag != ber.SEQUENCE:
+        raise ber.BERError("Повідомлення SNMP має бути SEQUENCE")
+
+    items = ber.decode_sequence(message)
+    if len(items) != 3:
+        raise ber.BERError("Очікувалось version, community, PDU")
+    (_, version_raw), (_, community_raw), (pdu_tag, pdu) = items
+
+    version = VERSIONS.get(ber.decode_integer(version_raw))
+    if version is None:
+        raise ber.BERError("Підтримуються лише SNMPv1/v2c")
+    community = community_raw.decode("utf-8", "replace")
+    fields = ber.decode_sequence(pdu)
+
+    if pdu_tag == ber.TRAP_V1 and version == "1":
+        enterprise = ber.decode_oid(fields[0][1])
+        agent_addr = ber.decode_value(fields[1][0], fields[1][1])
+        generic = ber.decode_integer(fields[2][1])
+        specific = ber.decode_integer(fields[3][1])
+        if generic == 6:  # enterpriseSpecific
+            trap_oid = f"{enterprise}.0.{specific}"
+        else:
+            trap_oid = f"{OID_SNMP_TRAPS}.{generic + 1}"
+        return Trap(
+            version=version,
+            community=community,
+            trap_oid=trap_oid,
+            agent_addr=agent_addr,
+            varbinds=ber.decode_varbinds(fields[5][1]),
+        )
+
+    if pdu_tag in (ber.TRAP_V2, ber.INFORM_REQUEST) and version == "2c":
+        varbinds = ber.decode_varbinds(fields[3][1])
+        trap_oid = varbinds.pop(OID_SNMP_TRAP_OID, None)
+        if not trap_oid:
+            raise ber.BERError("У трапі відсутній snmpTrapOID.0")
+
+        response = None
+        if pdu_tag == ber.INFORM_REQUEST:
+            # Response-PDU повторює request-id та varbind запиту
+            response = ber.encode_tlv(
+                ber.SEQUENCE,
+                ber.encode_tlv(ber.INTEGER, version_raw)
+                + ber.encode_tlv(ber.OCTET_STRING, community_raw)
+                + ber.encode_tlv(ber.GET_RESPONSE, pdu),
+            )
+        return Trap(
+            version=version,
+            community=community,
+            trap_oid=trap_oid,
+            varbinds=varbinds,
+            response=response,
+        )
+
+    raise ber.BERError(f"Непідтримуваний PDU 0x{pdu_tag:02x}")
@@ -0,0 +1,390 @@
+"""
+SNMPv3 USM (RFC 3414): локалізовані ключі та виявлення engine агентів.
+
+Утиліти net-snmp на кожен виклик заново перетворюють пароль на ключ
+(хешування 1 МБ) і виконують зайвий обмін для виявлення engineID та
+engineBoots/engineTime. Тут ключі обчислюються один раз на (пароль, engine),
+а параметри engine кешуються і передаються утилітам готовими (-3k/-3K, -e, -Z),
+тож усталене опитування v3 коштує стільки ж обмінів, як і v2c.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from protocols import ber
+
+# Налаштування логування
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+# Назви протоколів у форматі net-snmp (-a/-x) → hashlib
+AUTH_PROTOCOLS = {
+    "MD5": "md5",
+    "SHA": "sha1",
+    "SHA-224": "sha224",
+    "SHA-256": "sha256",
+    "SHA-384": "sha384",
+    "SHA-512": "sha512",
+}
+PRIV_PROTOCOLS = ("DES", "AES")
+
+NO_AUTH_NO_PRIV = "noAuthNoPriv"
+AUTH_NO_PRIV = "authNoPriv"
+AUTH_PRIV = "authPriv"
+
+ENGINE_TTL = 3600.0  # Повторне виявлення engine, секунд
+DISCOVERY_RETRY = 30.0  # Пауза після невдалого виявлення, секунд
+KEY_EXPANSION = 1024 * 1024  # RFC 3414 A.2: пароль розгортається до 1 МБ
+MIN_PASSWORD = 8  # RFC 3414 11.2: коротші паролі агенти відхиляють
+
+REPORT = 0xA8
+FLAG_REPORTABLE = b"\x04"
+USM_SECURITY_MODEL = 3
+MAX_MESSAGE_SIZE = 65507
+
+_msg_ids = itertools.count(1)
+
+# Помилки USM у stderr net-snmp, після яких параметри engine слід оновити
+USM_ERRORS = (
+    "notInTimeWindow",
+    "Time synchronization",
+    "Unknown Engine ID",
+    "unknownEngineID",
+    "Authentication failure",
+    "wrongDigest",
+    "Decryption error",
+)
+
+
+@dataclass(frozen=True)
+class UsmUser:
+    """Обліковий запис USM; рівень безпеки визначається заданими паролями"""
+
+    name: str
+    auth_protocol: Optional[str] = None
+    auth_password: Optional[str] = None
+    priv_protocol: Optional[str] = None
+    priv_password: Optional[str] = None
+
+    def __post_init__(self):
+        if (
+            self.auth_protocol is not None
+            and self.auth_protocol not in AUTH_PROTOCOLS
+        ):
+            raise ValueError(
+                f"Непідтримуваний протокол автентифікації {self.auth_protocol}"
+            )
+        if self.priv_protocol is not None:
+            if self.priv_protocol not in PRIV_PROTOCOLS:
+                raise ValueError(
+                    f"Непідтримуваний протокол шифрування {self.priv_protocol}"
+                )
+            if self.auth_protocol is None:
+                raise ValueError("Шифрування USM потребує автентифікації")
+        for protocol, password in (
+            (self.auth_protocol, self.auth_password),
+            (self.priv_protocol, self.priv_password),
+        ):
+            if protocol is not None and len(password or "") < MIN_PASSWORD:
+                raise ValueError(
+                    f"Пароль {protocol} для {self.name} коротший "
+                    f"за {MIN_PASSWORD} символів"
+                )
+
+    @classmethod
+    def parse(cls, values: Sequence[str]) -> "UsmUser":
+        """
+        Обліковий запис зі списку "user[,auth,auth_pass[,priv,priv_pass]]".
+
+        Raises:
+            ValueError: некоректна кількість полів, невідомий протокол
+                або пароль, коротший за MIN_PASSWORD.
+        """
+        values = [value.strip() for value in values]
+        if len(values) not in (1, 3, 5) or not values[0]:
+            raise ValueError(
+                "Очікується user[,auth,auth_pass[,priv,priv_pass]]"
+            )
+        fields = values + [None] * (5 - len(values))
+        return cls(
+            fields[0],
+            fields[1] and fields[1].upper(),
+            fields[2],
+            fields[3] and fields[3].upper(),
+            fields[4],
+        )
+
+    @property
+    def level(self) -> str:
+        if self.priv_protocol:
+            return AUTH_PRIV
+        if self.auth_protocol:
+            return AUTH_NO_PRIV
+        return NO_AUTH_NO_PRIV
+
+
+@lru_cache(maxsize=64)
+def password_to_key(password: str, auth_protocol: str) -> bytes:
+    """Головний ключ (Ku) з пароля: хеш пароля, розгорнутого до 1 МБ"""
+    if not password:
+        raise ValueError("Порожній пароль USM")
+    raw = password.encode()
+    expanded = (raw * (KEY_EXPANSION // len(raw) + 1))[:KEY_EXPANSION]
+    return hashlib.new(AUTH_PROTOCOLS[auth_protocol], expanded).digest()
+
+
+@lru_cache(maxsize=1024)
+def localized_key(
+    password: str, auth_protocol: str, engine_id: bytes
+) -> bytes:
+    """Ключ, локалізований для engine (Kul = H(Ku || engineID || Ku))"""
+    master = password_to_key(password, auth_protocol)
+    return hashlib.new(
+        AUTH_PROTOCOLS[auth_protocol], master + engine_id + master
+    ).digest()
+
+
+@dataclass
+class EngineInfo:
+    engine_id: bytes
+    boots: int
+    time: int
+    discovered_at: float  # time.monotonic() на момент виявлення
+
+    def current_time(self) -> int:
+        """Оцінка поточного engineTime агента"""
+        return self.time + int(time.monotonic() - self.discovered_at)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self.discovered_at > ENGINE_TTL
+
+
+def encode_discovery(msg_id: int) -> bytes:
+    """Запит виявлення: порожні engineID та користувач, reportable"""
+    global_data = ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_integer(msg_id)
+        + ber.encode_integer(MAX_MESSAGE_SIZE)
+        + ber.encode_tlv(ber.OCTET_STRING, FLAG_REPORTABLE)
+        + ber.encode_integer(USM_SECURITY_MODEL),
+    )
+    security = ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_tlv(ber.OCTET_STRING, b"")
+        + ber.encode_integer(0)
+        + ber.encode_integer(0)
+        + ber.encode_tlv(ber.OCTET_STRING, b"") * 3,
+    )
+    pdu = ber.encode_tlv(
+        ber.GET_REQUEST,
+        ber.encode_integer(msg_id)
+        + ber.encode_integer(0)
+        + ber.encode_integer(0)
+        + ber.encode_tlv(ber.SEQUENCE, b""),
+    )
+    scoped = ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_tlv(ber.OCTET_STRING, b"") * 2 + pdu,
+    )
+    return ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_integer(3)
+        + global_data
+        + ber.encode_tlv(ber.OCTET_STRING, security)
+        + scoped,
+    )
+
+
+def decode_discovery(data: bytes) -> EngineInfo:
+    """
+    Розбирає Report на запит виявлення.
+
+    Raises:
+        BERError: відповідь не є повідомленням SNMPv3 з engineID.
+    """
+    tag, message, _ = ber.decode_tlv(data)
+    items = ber.decode_sequence(message)
+    if (
+        tag != ber.SEQUENCE
+        or len(items) != 4
+        or ber.decode_integer(items[0][1]) != 3
+    ):
+        raise ber.BERError("Очікувалось повідомлення SNMPv3")
+    _, params, _ = ber.decode_tlv(items[2][1])
+    engine_id, boots, engine_time = ber.decode_sequence(params)[:3]
+    if not engine_id[1]:
+        raise ber.BERError("Агент не повідомив engineID")
+    return EngineInfo(
+        engine_id=engine_id[1],
+        boots=ber.decode_integer(boots[1]),
+        time=ber.decode_integer(engine_time[1]),
+        discovered_at=time.monotonic(),
+    )
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+
+    def datagram_received(self, data: bytes, addr):
+        if self.future.done():
+            return
+        try:
+            self.future.set_result(decode_discovery(data))
+        except (ber.BERError, ValueError):
+            logger.debug(
+                "USM: нерозпізнана відповідь виявлення від %s", addr[0]
+            )
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def discover_engine(
+    host: str, port: int = 161, timeout: float = 3.0
+) -> Optional[EngineInfo]:
+    """engineID, engineBoots та engineTime агента або None, якщо він не відповів"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _DiscoveryProtocol(future), remote_addr=(host, port)
+    )
+    try:
+        transport.sendto(encode_discovery(next(_msg_ids) & 0x7FFFFFFF))
+        return await asyncio.wait_for(future, timeout)
+    except (asyncio.TimeoutError, OSError) as e:
+        logger.warning(
+            "USM: engine %s не виявлено: %s", host, str(e) or "таймаут"
+        )
+        return None
+    finally:
+        transport.close()
+
+
+class EngineCache:
+    """Параметри engine агентів, спільні для всіх клієнтів процесу"""
+
+    def __init__(self):
+        self._engines: Dict[str, EngineInfo] = {}
+        self._failed: Dict[str, float] = {}
+        # Виявлення, що триває: решта запитів до агента чекає на нього.
+        # concurrent.futures, бо клієнти працюють у різних циклах asyncio
+        self._pending: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    async def get(
+        self, host: str, timeout: float = 3.0
+    ) -> Optional[EngineInfo]:
+        """
+        Параметри engine з кешу або виявлені заново.
+
+        Одночасні запити до одного агента чекають на одне виявлення.
+        Після невдалого виявлення DISCOVERY_RETRY секунд повертає None
+        без запитів, щоб недоступний агент не подвоював таймаути.
+        """
+        with self._lock:
+            engine = self._engines.get(host)
+            if engine is not None and not engine.expired:
+                return engine
+            failed_at = self._failed.get(host)
+            if (
+                failed_at is not None
+                and time.monotonic() - failed_at < DISCOVERY_RETRY
+            ):
+                return None
+            pending = self._pending.get(host)
+            if pending is None:
+                pending = self._pending[host] = concurrent.futures.Future()
+                discovering = True
+            else:
+                discovering = False
+
+        if not discovering:
+            # shield: скасування очікувача не скасовує спільне виявлення
+            return await asyncio.shield(asyncio.wrap_future(pending))
+
+        engine, answered = None, False
+        try:
+            engine = await discover_engine(host, timeout=timeout)
+            answered = True
+        finally:
+            # Перерване виявлення (дедлайн) не вважається відмовою агента;
+            # очікувачі тоді працюють без engine
+            with self._lock:
+                del self._pending[host]
+                if engine is not None:
+                    self._failed.pop(host, None)
+                    self._engines[host] = engine
+                elif answered:
+                    self._failed[host] = time.monotonic()
+            pending.set_result(engine)
+        if engine is not None:
+            logger.info(
+                "USM: engine %s = %s (boots=%d)",
+                host,
+                engine.engine_id.hex(),
+                engine.boots,
+            )
+        return engine
+
+    def invalidate(self, host: str):
+        with self._lock:
+            self._engines.pop(host, None)
+
+
+engines = EngineCache()
+
+
+def command_args(user: UsmUser, engine: Optional[EngineInfo]) -> List[str]:
+    """
+    Аргументи net-snmp для SNMPv3.
+
+    З відомим engine передаються локалізовані ключі та engineBoots/engineTime,
+    тож утиліта не хешує пароль і не виконує виявлення. Без engine (агент не
+    відповів на виявлення) — паролі, як при звичайному виклику.
+    """
+    args = ["-v", "3", "-l", user.level, "-u", user.name]
+    if engine is not None:
+        args += [
+            "-e",
+            "0x" + engine.engine_id.hex(),
+            "-Z",
+            f"{engine.boots},{engine.current_time()}",
+        ]
+    if user.auth_protocol:
+        args += ["-a", user.auth_protocol]
+        if engine is not None:
+            key = localized_key(
+                user.auth_password, user.auth_protocol, engine.engine_id
+            )
+            args += ["-3k", "0x" + key.hex()]
+        else:
+            args += ["-A", user.auth_password]
+    if user.priv_protocol:
+        args += ["-x", user.priv_protocol]
+        if engine is not None:
+            # Ключ шифрування локалізується хешем автентифікації
+            key = localized_key(
+                user.priv_password, user.auth_protocol, engine.engine_id
+            )
+            args += ["-3K", "0x" + key.hex()]
+        else:
+            args += ["-X", user.priv_password]
+    return args
+
+
+def is_usm_error(stderr: str) -> bool:
+    return any(marker in stderr for marker in USM_ERRORS)
@@ -1,20 +1,271 @@
+// Спільний шар рендерингу сторінок: опитування з урахуванням видимості
+// вкладки та точкові оновлення DOM за ключем замість перебудови innerHTML.
+// Панелі на стінах працюють днями, тож вузли й обробники створюються один
+// раз, а кожне оновлення змінює лише ті значення, що справді змінились.
+const NetWatch = (function () {
+    const VIRTUAL_THRESHOLD = 200; // Довші списки рендеряться віртуально
+    const OVERSCAN = 6; // Рядків поза видимою областю з кожного боку
+
+    /**
+     * Періодично викликає task (функцію, що повертає Promise).
+     *
+     * Наступний виклик планується після завершення попереднього, тож запити
+     * не накопичуються. У фоновій вкладці (document.hidden) опитування
+     * зупиняється, а при поверненні дані одразу оновлюються.
+     */
+    function poll(task, intervalMs, {immediate = true} = {}) {
+        let timer = null;
+        let running = false;
+
+        function schedule() {
+            clearTimeout(timer);
+            timer = document.hidden ? null : setTimeout(run, intervalMs);
+        }
+
+        function run() {
+            if (running) return;
+            running = true;
+            clearTimeout(timer);
+            Promise.resolve()
+                .then(task)
+                .catch(error => console.error('Помилка оновлення:', error))
+                .finally(() => {
+                    running = false;
+                    schedule();
+                });
+        }
+
+        document.addEventListener('visibilitychange', () => {
+            if (document.hidden) {
+                clearTimeout(timer);
+                timer = null;
+            } else if (!running) {
+                run();
+            }
+        });
+
+        if (immediate) {
+            run();
+        } else {
+            schedule();
+        }
+        return {refresh: run};
+    }
+
+    function setText(node, value) {
+        const text = value == null ? '' : String(value);
+        if (node.textContent !== text) node.textContent = text;
+    }
+
+    function setAttr(node, name, value) {
+        if (value == null || value === '') {
+            if (node.hasAttribute(name)) node.removeAttribute(name);
+        } else if (node.getAttribute(name) !== value) {
+            node.setAttribute(name, value);
+        }
+    }
+
+    function toggleClass(node, className, enabled) {
+        if (node.classList.contains(className) !== Boolean(enabled)) {
+            node.classList.toggle(className, Boolean(enabled));
+        }
+    }
+
+    function show(node, visible) {
+        if (node.hidden === Boolean(visible)) node.hidden = !visible;
+    }
+
+    /** Вузол з <template id="..."> сторінки (перший елемент вмісту) */
+    function fromTemplate(id) {
+        return document.getElementById(id).content.firstElementChild.cloneNode(true);
+    }
+
+    /**
+     * Список, синхронізований з масивом даних за ключем.
+     *
+     * Нові елементи створюються один раз (create), наявні лише оновлюються
+     * (update), зниклі видаляються, порядок виправляється переміщенням.
+     * Елементи, відрендерені сервером з data-key, підхоплюються як є.
+     */
+    function keyedList(container, {key, create, update}) {
+        const nodes = new Map();
+        for (const node of Array.from(container.children)) {
+            if (node.dataset.key !== undefined) {
+                nodes.set(node.dataset.key, node);
+            } else {
+                node.remove();
+            }
+        }
+
+        function patch(items) {
+            const ids = items.map(item => String(key(item)));
+            const wanted = new Set(ids);
+            for (const [id, node] of nodes) {
+                if (!wanted.has(id)) {
+                    node.remove();
+                    nodes.delete(id);
+                }
+            }
+            items.forEach((item, position) => {
+                const id = ids[position];
+                let node = nodes.get(id);
+                if (!node) {
+                    node = create(item);
+                    node.dataset.key = id;
+                    nodes.set(id, node);
+                }
+                update(node, item);
+                const current = container.children[position];
+                if (current !== node) container.insertBefore(node, current || null);
+            });
+        }
+
+        function destroy() {
+            nodes.forEach(node => node.remove());
+            nodes.clear();
+        }
+
+        return {patch, destroy};
+    }
+
+    /**
+     * Віртуальний список для тисяч рядків (порти шасі): у DOM лише видимі
+     * рядки з невеликим запасом, вузли перевикористовуються при прокрутці.
+     * Рядки мають однакову висоту, яка вимірюється з першого рядка.
+     */
+    function virtualList(container, {key, create, update}) {
+        const spacer = document.createElement('div');
+        spacer.className = 'virtual-spacer';
+        container.classList.add('virtual-viewport');
+        container.replaceChildren(spacer);
+
+        let items = [];
+        let rowHeight = 0;
+        let frame = null;
+        const rendered = new Map(); // ключ → вузол видимого рядка
+
+        function measure() {
+            const probe = create(items[0]);
+            update(probe, items[0]);
+            container.appendChild(probe);
+            const gap = parseFloat(getComputedStyle(container).rowGap) || 0;
+            rowHeight = probe.offsetHeight + gap;
+            probe.remove();
+        }
+
+        function render() {
+            frame = null;
+            if (items.length && !rowHeight) measure();
+            setAttr(spacer, 'style', `height: ${items.length * rowHeight}px`);
+
+            const top = container.scrollTop;
+            const first = Math.max(Math.floor(top / rowHeight) - OVERSCAN, 0);
+            const last = Math.min(
+                Math.ceil((top + container.clientHeight) / rowHeight) + OVERSCAN,
+                items.length
+            );
+
+            const visible = new Map();
+            for (let position = first; position < last; position++) {
+                visible.set(String(key(items[position])), position);
+            }
+            const spare = [];
+            for (const [id, node] of rendered) {
+                if (!visible.has(id)) {
+                    spare.push(node);
+                    rendered.delete(id);
+                }
+            }
+            for (const [id, position] of visible) {
+                let node = rendered.get(id);
+                if (!node) {
+                    node = spare.pop() || create(items[position]);
+                    node.dataset.key = id;
+                    rendered.set(id, node);
+                }
+                update(node, items[position]);
+                const transform = `translateY(${position * rowHeight}px)`;
+                if (node.style.transform !== transform) node.style.transform = transform;
+                if (node.parentNode !== container) container.appendChild(node);
+            }
+            spare.forEach(node => node.remove());
+        }
+
+        function requestRender() {
+            if (frame === null) frame = requestAnimationFrame(render);
+        }
+
+        function onResize() {
+            rowHeight = 0;
+            requestRender();
+        }
+
+        container.addEventListener('scroll', requestRender, {passive: true});
+        window.addEventListener('resize', onResize);
+
+        function patch(newItems) {
+            items = newItems;
+            requestRender();
+        }
+
+        function destroy() {
+            if (frame !== null) cancelAnimationFrame(frame);
+            container.removeEventListener('scroll', requestRender);
+            window.removeEventListener('resize', onResize);
+            container.classList.remove('virtual-viewport');
+            container.replaceChildren();
+            rendered.clear();
+        }
+
+        return {patch, destroy};
+    }
+
+    /**
+     * Список, що сам обирає режим: звичайний keyed-список або віртуальний,
+     * якщо елементів більше за VIRTUAL_THRESHOLD.
+     */
+    function list(container, options) {
+        let virtual = false;
+        let current = keyedList(container, options);
+
+        function patch(items) {
+            const needVirtual = items.length > VIRTUAL_THRESHOLD;
+            if (needVirtual !== virtual) {
+                current.destroy();
+                virtual = needVirtual;
+                current = virtual ? virtualList(container, options) : keyedList(container, options);
+            }
+            current.patch(items);
+        }
+
+        return {patch};
+    }
+
+    return {poll, setText, setAttr, toggleClass, show, fromTemplate, keyedList, list};
+})();
+
 const DeviceMonitor = (function () {
+    const REFRESH_INTERVAL = 10000;
     let currentFilter = 'all';
-    let refreshInterval;
+    let lastInterfaces = [];
+    let loaded = false;
+    let interfacesList;
 
     function init(deviceIp) {
-        startAutoRefresh(deviceIp);
+        interfacesList = NetWatch.list(document.getElementById('interfaces-list'), {
+            key: iface => iface.index,
+            create: () => NetWatch.fromTemplate('interface-row-template'),
+            update: updateInterfaceRow,
+        });
         setupEventListeners();
-    }
-
-    function startAutoRefresh(deviceIp) {
-        fetchData(deviceIp);
-        refreshInterval = setInterval(() => fetchData(deviceIp), 10000);
+        NetWatch.poll(() => fetchData(deviceIp), REFRESH_INTERVAL);
     }
 
     function fetchData(deviceIp) {
-        document.getElementById('loading').style.display = 'flex';
-        fetch(`/api/device/${deviceIp}`)
+        const loading = document.getElementById('loading');
+        // Повноекранний індикатор — лише до першої відповіді
+        if (!loaded) loading.style.display = 'flex';
+        return fetch(`/api/device/${deviceIp}`)
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Network response was not ok');
@@ -22,77 +273,85 @@ const DeviceMonitor = (function () {
                 return response.json();
             })
             .then(data => {
-                document.getElementById('device-details-content').innerHTML = generateDeviceContent(data);
+                render(data);
                 updateHeaderStatus(data.device_status);
-                setupPortFilters();
-                filterPorts(currentFilter);
             })
             .catch(error => {
                 console.error('Помилка завантаження даних пристрою:', error);
-                document.getElementById('device-details-content').innerHTML = `
-                <div class="info-card empty-state">
-                    <h2><i class="fas fa-triangle-exclamation"></i> Помилка завантаження</h2>
-                    <p>Не вдалося отримати дані. Пристрій може бути недоступний.</p>
-                </div>`;
+                showEmpty(
+                    'Помилка завантаження',
+                    'Не вдалося отримати дані. Пристрій може бути недоступний.'
+                );
                 updateHeaderStatus(false);
             })
             .finally(() => {
-                document.getElementById('loading').style.display = 'none';
+                loaded = true;
+                loading.style.display = 'none';
             });
     }
 
     function updateHeaderStatus(isOnline) {
-        const container = document.getElementById('device-status-container');
-        const text = document.getElementById('device-status-text');
-        const iconClass = isOnline ? 'fa-circle-check' : 'fa-circle-xmark';
-        const statusClass = isOnline ? 'online' : 'offline';
+        const icon = document.querySelector('#device-status-container .status-icon');
+        NetWatch.toggleClass(icon, 'online', isOnline);
+        NetWatch.toggleClass(icon, 'offline', !isOnline);
+        NetWatch.setAttr(
+            icon.firstElementChild,
+            'class',
+            `fas ${isOnline ? 'fa-circle-check' : 'fa-circle-xmark'}`
+        );
+        NetWatch.setText(document.getElementById('device-status-text'), isOnline ? 'ONLINE' : 'OFFLINE');
+    }
 
-        container.className = `status-item`;
-        text.textContent = isOnline ? 'ONLINE' : 'OFFLINE';
-        container.innerHTML = `
-        <span class="status-icon ${statusClass}">
-            <i class="fas ${iconClass}"></i>
-        </span>
-        <span id="device-status-text">${isOnline ? 'ONLINE' : 'OFFLINE'}</span>`;
+    function showEmpty(title, message) {
+        NetWatch.show(document.getElementById('system-card'), false);
+        NetWatch.show(document.getElementById('interfaces-card'), false);
+        NetWatch.setText(document.getElementById('empty-title'), title);
+        NetWatch.setText(document.getElementById('empty-message'), message);
+        NetWatch.show(document.getElementById('device-empty'), true);
     }
 
-    function filterPorts(filterType) {
-        currentFilter = filterType;
-        const allRows = document.querySelectorAll('.interface-row');
-
-        allRows.forEach(row => {
-            switch (filterType) {
-                case 'all':
-                    row.style.display = '';
-                    break;
-                case 'active':
-                    if (row.classList.contains('active-port')) {
-                        row.style.display = '';
-                    } else {
-                        row.style.display = 'none';
-                    }
-                    break;
-                case 'inactive':
-                    if (row.classList.contains('inactive-port')) {
-                        row.style.display = '';
-                    } else {
-                        row.style.display = 'none';
-                    }
-                    break;
-            }
-        });
+    function render(data) {
+        const hasInterfaces = data.interfaces && Object.keys(data.interfaces).length > 0;
+        if (!data.device_status || (!data.system_info && !hasInterfaces)) {
+            showEmpty('Дані недоступні', 'Пристрій офлайн або не вдалося отримати інформацію.');
+            return;
+        }
+        NetWatch.show(document.getElementById('device-empty'), false);
+
+        const sys = data.system_info;
+        NetWatch.show(document.getElementById('system-card'), Boolean(sys));
+        if (sys) {
+            NetWatch.setText(document.getElementById('system-model'), sys.model || 'N/A');
+            NetWatch.setText(document.getElementById('system-name'), sys.system_name || 'N/A');
+            NetWatch.setText(document.getElementById('mac-address'), sys.mac_address || 'N/A');
+            NetWatch.setText(document.getElementById('uptime'), sys.uptime || 'N/A');
+        }
+
+        NetWatch.show(document.getElementById('interfaces-card'), hasInterfaces);
+        if (!hasInterfaces) return;
+
+        const staleNote = document.getElementById('interfaces-stale');
+        NetWatch.show(staleNote, data.stale || data.partial);
+        NetWatch.setText(
+            staleNote.querySelector('.stale-text'),
+            data.stale ? 'Дані з останнього опитування монітора' : 'Дані неповні: пристрій не відповів вчасно'
+        );
+
+        lastInterfaces = Object.values(data.interfaces);
+        filterPorts(currentFilter);
     }
 
-    function setupPortFilters() {
-        document.querySelectorAll('.filter-btn').forEach(btn => {
-            btn.addEventListener('click', function () {
-                document.querySelectorAll('.filter-btn').forEach(b => {
-                    b.classList.remove('active');
-                });
-                this.classList.add('active');
-                filterPorts(this.dataset.filter);
-            });
-        });
+    function isActive(iface) {
+        return iface.admin_status === 1 && iface.oper_status === 1;
+    }
+
+    function filterPorts(filterType) {
+        currentFilter = filterType;
+        interfacesList.patch(
+            lastInterfaces.filter(iface =>
+                filterType === 'all' || (filterType === 'active') === isActive(iface)
+            )
+        );
     }
 
     function humanSpeed(speed) {
@@ -103,88 +362,48 @@ const DeviceMonitor = (function () {
         return `${speed} bps`;
     }
 
-    function generateDeviceContent(data) {
-        if (!data.device_status) {
-            return `
-        <div class="info-card empty-state">
-            <h2><i class="fas fa-triangle-exclamation"></i> Дані недоступні</h2>
-            <p>Пристрій офлайн або не вдалося отримати інформацію.</p>
-        </div>`;
-        }
-
-        let content = '';
-
-        if (data.system_info) {
-            const sys = data.system_info;
-            content += `
-        <div class="info-card">
-            <h2><i class="fas fa-chart-bar"></i> Системна інформація</h2>
-            <div class="info-grid">
-                <div class="info-item"><div class="info-label">Модель</div><div class="info-value">${sys.model || 'N/A'}</div></div>
-                <div class="info-item"><div class="info-label">Ім'я</div><div class="info-value">${sys.system_name || 'N/A'}</div></div>
-                <div class="info-item"><div class="info-label">MAC</div><div class="info-value">${sys.mac_address || 'N/A'}</div></div>
-                <div class="info-item"><div class="info-label">Час роботи</div><div class="info-value">${sys.uptime || 'N/A'}</div></div>
-            </div>
-        </div>`;
-        }
-
-        if (data.interfaces && Object.keys(data.interfaces).length > 0) {
-            let interfacesHtml = `
-        <div class="port-filter">
-            <button class="filter-btn ${currentFilter === 'all' ? 'active' : ''}" data-filter="all">Усі порти</button>
-            <button class="filter-btn ${currentFilter === 'active' ? 'active' : ''}" data-filter="active">Активні</button>
-            <button class="filter-btn ${currentFilter === 'inactive' ? 'active' : ''}" data-filter="inactive">Неактивні</button>
-        </div>
-        <div id="interfaces-list">`;
-
-            for (const [id, iface] of Object.entries(data.interfaces)) {
-                const isActive = iface.admin_status === 1 && iface.oper_status === 1;
-                const portClass = isActive ? 'active-port' : 'inactive-port';
-                const portIndex = isActive ?
-                    iface.index +
-                    '<i class="fas fa-bolt active-icon"></i>' :
-                    iface.index;
-
-                const speedMbps = humanSpeed(iface.speed);
-                const inMB = ((iface.in_octets || 0) / 1024 / 1024).toFixed(2);
-                const outMB = ((iface.out_octets || 0) / 1024 / 1024).toFixed(2);
-                const adminUp = iface.admin_status === 1;
-                const operUp = iface.oper_status === 1;
-
-                let errorsHtml = '';
-                if (iface.in_errors || iface.out_errors) {
-                    errorsHtml = `<div class="interface-errors"><i class="fas fa-triangle-exclamation"></i> ${iface.in_errors || 0}/${iface.out_errors || 0}</div>`;
-                }
+    function updateInterfaceRow(row, iface) {
+        const active = isActive(iface);
+        const adminUp = iface.admin_status === 1;
+        const operUp = iface.oper_status === 1;
+        const part = selector => row.querySelector(selector);
 
-                interfacesHtml += `
-            <div class="interface-row ${portClass}">
-                <div class="interface-name"><span class="port-index">${portIndex}</span> ${iface.name}</div>
-                <div class="interface-details"><span>${iface.alias || ''}</span> <span class="speed"><i class="fas fa-gauge-high"></i> ${speedMbps}</span></div>
-                <div class="interface-status">
-                    <span class="status-tag ${adminUp ? 'status-up' : 'status-down'}">Admin: ${adminUp ? 'UP' : 'DOWN'}</span>
-                    <span class="status-tag ${operUp ? 'status-up' : 'status-down'}">Port: ${operUp ? 'UP' : 'DOWN'}</span>
-                </div>
-                <div class="interface-traffic">
-                    <div><i class="fas fa-arrow-down red"></i> ${inMB} MB</div>
-                    <div><i class="fas fa-arrow-up green"></i> ${outMB} MB</div>
-                </div>
-                ${errorsHtml}
-            </div>`;
-            }
-            interfacesHtml += `</div>`;
-            content += `<div class="info-card"><h2><i class="fas fa-plug"></i> Інтерфейси</h2>${interfacesHtml}</div>`;
-        }
+        NetWatch.toggleClass(row, 'active-port', active);
+        NetWatch.toggleClass(row, 'inactive-port', !active);
+        NetWatch.setText(part('.port-number'), iface.index);
+        NetWatch.show(part('.active-icon'), active);
+        NetWatch.setText(part('.if-name'), iface.name);
+        NetWatch.setText(part('.if-alias'), iface.alias || '');
+        NetWatch.setText(part('.if-speed'), humanSpeed(iface.speed));
+
+        const admin = part('.if-admin');
+        NetWatch.toggleClass(admin, 'status-up', adminUp);
+        NetWatch.toggleClass(admin, 'status-down', !adminUp);
+        NetWatch.setText(admin, `Admin: ${adminUp ? 'UP' : 'DOWN'}`);
+        const oper = part('.if-oper');
+        NetWatch.toggleClass(oper, 'status-up', operUp);
+        NetWatch.toggleClass(oper, 'status-down', !operUp);
+        NetWatch.setText(oper, `Port: ${operUp ? 'UP' : 'DOWN'}`);
 
-        return content;
+        NetWatch.setText(part('.if-in'), ((iface.in_octets || 0) / 1024 / 1024).toFixed(2));
+        NetWatch.setText(part('.if-out'), ((iface.out_octets || 0) / 1024 / 1024).toFixed(2));
+        NetWatch.show(part('.interface-errors'), iface.in_errors || iface.out_errors);
+        NetWatch.setText(part('.if-errors'), `${iface.in_errors || 0}/${iface.out_errors || 0}`);
     }
 
     function setupEventListeners() {
-        if (document.querySelector('.port-filter')) {
-            setupPortFilters();
-        }
+        // Кнопки фільтра існують увесь час — один делегований обробник
+        document.querySelector('.port-filter').addEventListener('click', event => {
+            const button = event.target.closest('.filter-btn');
+            if (!button) return;
+            document.querySelectorAll('.filter-btn').forEach(b => {
+                NetWatch.toggleClass(b, 'active', b === button);
+            });
+            filterPorts(button.dataset.filter);
+        });
     }
 
     return {
         init
     };
-})();
\ No newline at end of file
+})();
@@ -0,0 +1,50 @@
+import math
+
+from monitor.analytics import COUNTER32_WRAP, FleetAnalytics
+from monitor.fleet_state import FleetState
+
+GBPS = 1_000_000_000
+
+
+def sample(in_octets: int, in_errors: int = 0, speed: int = GBPS):
+    columns = {
+        "name": {1: "ge-1"},
+        "alias": {1: ""},
+        "speed": {1: str(speed)},
+        "in_octets": {1: str(in_octets)},
+        "out_octets": {1: "0"},
+        "in_pkts": {1: "0"},
+        "out_pkts": {1: "0"},
+        "in_errors": {1: str(in_errors)},
+        "out_errors": {1: "0"},
+        "admin_status": {1: "1"},
+        "oper_status": {1: "1"},
+    }
+    return [1], columns
+
+
+def rates(first, second, elapsed=10):
+    state = FleetState()
+    analytics = FleetAnalytics()
+    state.update("10.0.0.1", *first, 1000)
+    analytics.update(state)
+    state.update("10.0.0.1", *second, 1000 + elapsed)
+    return analytics.update(state)
+
+
+def test_wrapped_counter_gives_real_rate():
+    # 500 Мбіт/с за 10 с: лічильник проходить через 2^32
+    step = 500_000_000 // 8 * 10
+    metrics = rates(sample(int(COUNTER32_WRAP) - 1000), sample(step - 1000))
+    assert metrics.in_bps[0] == step * 8 / 10
+
+
+def test_counter_reset_gives_no_rate():
+    # Перезавантаження: лічильники почались з нуля, а не переповнились
+    metrics = rates(
+        sample(3_000_000_000, in_errors=500, speed=100_000_000),
+        sample(20_000, in_errors=0, speed=100_000_000),
+    )
+    assert math.isnan(metrics.in_bps[0])
+    assert math.isnan(metrics.in_errors_ps[0])
+    assert not metrics.saturated[0]
@@ -0,0 +1,29 @@
+from monitor import warmstart
+from monitor.availability import AvailabilityTracker
+from monitor.fleet_state import FleetState
+
+DAY = 86400
+
+
+def test_sla_windows_survive_warm_start(tmp_path):
+    start = 1_700_000_000
+    tracker = AvailabilityTracker()
+    tracker.on_transition("10.0.0.1", True, start)
+    # Три дні роботи, день простою, ще день роботи
+    tracker.on_transition("10.0.0.1", False, start + 3 * DAY)
+    tracker.on_transition("10.0.0.1", True, start + 4 * DAY)
+    saved_at = start + 5 * DAY
+    before = tracker.device("10.0.0.1", saved_at)
+    assert before["7d"] == 80.0
+
+    path = str(tmp_path / "warm.bin")
+    fleet_state = FleetState()
+    warmstart.save(
+        path, {}, fleet_state, {}, saved_at=saved_at, availability=tracker
+    )
+    state = warmstart.load(path, fleet_state.strings, max_age=float("inf"))
+
+    # Перезапуск через годину: простій монітора не зараховується у вікна
+    restored = AvailabilityTracker()
+    restored.restore(state.availability, saved_at + 3600)
+    assert restored.device("10.0.0.1", saved_at + 3600) == before
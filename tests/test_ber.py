@@ -0,0 +1,59 @@
+import pytest
+
+from protocols import ber
+
+
+def test_oid_round_trip_with_multibyte_arcs():
+    oid = "1.3.6.1.4.1.14988.1.1.1.3.1.4.300"
+    tag, value, end = ber.decode_tlv(ber.encode_oid(oid))
+
+    assert tag == ber.OBJECT_IDENTIFIER
+    assert ber.decode_oid(value) == oid
+    assert end == len(ber.encode_oid(oid))
+
+
+def test_integer_uses_minimal_twos_complement():
+    assert ber.encode_integer(0) == b"\x02\x01\x00"
+    assert ber.encode_integer(127) == b"\x02\x01\x7f"
+    assert ber.encode_integer(128) == b"\x02\x02\x00\x80"
+    assert ber.encode_integer(-1) == b"\x02\x01\xff"
+    for value in (0, 255, -129, 2**31 - 1):
+        _, raw, _ = ber.decode_tlv(ber.encode_integer(value))
+        assert ber.decode_integer(raw) == value
+
+
+def test_long_form_length():
+    payload = b"x" * 300
+    encoded = ber.encode_tlv(ber.OCTET_STRING, payload)
+
+    assert encoded[1] == 0x82  # два байти довжини
+    assert ber.decode_tlv(encoded) == (ber.OCTET_STRING, payload, 304)
+
+
+def test_truncated_tlv_rejected():
+    encoded = ber.encode_tlv(ber.OCTET_STRING, b"public")
+    with pytest.raises(ber.BERError):
+        ber.decode_tlv(encoded[:-1])
+    with pytest.raises(ber.BERError):
+        ber.decode_tlv(encoded[:1])
+
+
+def test_varbinds_decode_smi_types():
+    def varbind(oid: str, tag: int, value: bytes) -> bytes:
+        return ber.encode_tlv(
+            ber.SEQUENCE, ber.encode_oid(oid) + ber.encode_tlv(tag, value)
+        )
+
+    data = (
+        varbind("1.3.6.1.2.1.1.3.0", ber.TIMETICKS, b"\x00\xff\xff\xff\xff")
+        + varbind("1.3.6.1.2.1.4.20.1.1", ber.IP_ADDRESS, bytes((10, 0, 1, 1)))
+        + varbind("1.3.6.1.2.1.1.5.0", ber.OCTET_STRING, b"sw-core")
+        + varbind("1.3.6.1.2.1.1.9.0", ber.NO_SUCH_INSTANCE, b"")
+    )
+
+    assert ber.decode_varbinds(data) == {
+        "1.3.6.1.2.1.1.3.0": 2**32 - 1,  # беззнаковий, попри старший біт
+        "1.3.6.1.2.1.4.20.1.1": "10.0.1.1",
+        "1.3.6.1.2.1.1.5.0": "sw-core",
+        "1.3.6.1.2.1.1.9.0": None,
+    }
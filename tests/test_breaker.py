@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from monitor import devices
+from monitor.latency import BurstStats, LatencyTracker
+from protocols.breaker import (
+    CLOSED,
+    OPEN,
+    SOURCE_ICMP,
+    SOURCE_ROUTEROS,
+    SOURCE_SNMP,
+    BreakerRegistry,
+    CircuitOpenError,
+)
+from protocols.snmp import AsyncSwitchSNMP
+
+HOST = "10.0.4.1"
+
+
+def test_icmp_verdict_trips_snmp_and_routeros():
+    # Ping засвідчив недоступність: SNMP/RouterOS не чекають своїх таймаутів
+    registry = BreakerRegistry(failure_threshold=2, reset_timeout=30)
+    registry.record(HOST, True, SOURCE_SNMP)
+    registry.record(HOST, True, SOURCE_ROUTEROS)
+    registry.record(HOST, False, SOURCE_ICMP)
+    assert registry.state(HOST, SOURCE_SNMP) == CLOSED
+
+    registry.record(HOST, False, SOURCE_ICMP)
+
+    assert registry.state(HOST, SOURCE_ICMP) == OPEN
+    for source in (SOURCE_SNMP, SOURCE_ROUTEROS):
+        with pytest.raises(CircuitOpenError):
+            registry.get(HOST, source).acquire()
+    assert registry.last_exchange(HOST, (SOURCE_SNMP,), 60) is None
+
+    # Через reset_timeout — одна проба; успіх SNMP замикає лише SNMP
+    snmp = registry.get(HOST, SOURCE_SNMP)
+    snmp.opened_at -= 30
+    assert snmp.acquire() is True
+    registry.record(HOST, True, SOURCE_SNMP)
+    assert registry.state(HOST, SOURCE_SNMP) == CLOSED
+    assert registry.state(HOST, SOURCE_ROUTEROS) == OPEN
+    assert registry.last_exchange(HOST, (SOURCE_SNMP,), 60) == SOURCE_SNMP
+
+
+def test_snmp_failures_do_not_block_routeros():
+    registry = BreakerRegistry(failure_threshold=2)
+    registry.record(HOST, False, SOURCE_SNMP)
+    registry.record(HOST, False, SOURCE_SNMP)
+
+    assert registry.state(HOST, SOURCE_SNMP) == OPEN
+    assert registry.get(HOST, SOURCE_ROUTEROS).acquire() is False  # closed
+
+
+def test_probe_timeout_recorded_once(monkeypatch):
+    switch = AsyncSwitchSNMP(HOST)
+    switch.breaker = BreakerRegistry(failure_threshold=2).get(
+        HOST, SOURCE_SNMP
+    )
+
+    async def timed_out(oid):
+        switch._record_timeout(switch.config.SNMP_TIMEOUT)
+        return None
+
+    monkeypatch.setattr(switch, "_snmp_get", timed_out)
+    assert not asyncio.run(switch.is_responding())
+    assert switch.breaker.failures == 1 and switch.breaker.state == CLOSED
+
+    # Напіввідкритий: невдала проба розмикає знову, але рахується один раз
+    switch.breaker.state, switch.breaker.opened_at = OPEN, 0.0
+    assert not asyncio.run(switch.is_responding())
+    assert switch.breaker.failures == 2 and switch.breaker.state == OPEN
+    assert not switch.breaker._probing
+
+
+def test_auto_liveness_keeps_latency_bursts(monkeypatch):
+    burst = BurstStats.from_rtts([0.01, 0.012, None, 0.011, 0.01])
+    probed = []
+
+    async def probe_bursts(ips, *args):
+        probed.extend(ips)
+        return {ip: burst for ip in ips}
+
+    registry = BreakerRegistry()
+    registry.record(HOST, True, SOURCE_SNMP)
+    monkeypatch.setattr(devices, "breakers", registry)
+    monkeypatch.setattr(devices, "latency", LatencyTracker())
+    monkeypatch.setattr(devices, "probe_bursts", probe_bursts)
+    monkeypatch.setattr(devices, "LATENCY_INTERVAL", 3600)
+    device = {"ip": HOST, "name": "sw-1", "liveness": "auto"}
+
+    verdicts = asyncio.run(devices.check_liveness([device]))
+    assert verdicts[HOST] == (True, SOURCE_SNMP, burst)
+
+    # Наступний залп — лише через LATENCY_INTERVAL
+    devices.latency.record(HOST, burst)
+    probed.clear()
+    verdicts = asyncio.run(devices.check_liveness([device]))
+    assert verdicts[HOST] == (True, SOURCE_SNMP, None) and not probed
+
+
+def test_latency_bursts_disabled_with_zero_interval(monkeypatch):
+    async def probe_bursts(ips, *args):
+        raise AssertionError("залп не очікувався")
+
+    registry = BreakerRegistry()
+    registry.record(HOST, True, SOURCE_SNMP)
+    monkeypatch.setattr(devices, "breakers", registry)
+    monkeypatch.setattr(devices, "latency", LatencyTracker())
+    monkeypatch.setattr(devices, "probe_bursts", probe_bursts)
+    monkeypatch.setattr(devices, "LATENCY_INTERVAL", 0)
+    device = {"ip": HOST, "name": "sw-1", "liveness": "auto"}
+
+    verdicts = asyncio.run(devices.check_liveness([device]))
+    assert verdicts[HOST] == (True, SOURCE_SNMP, None)
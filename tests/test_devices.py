@@ -0,0 +1,46 @@
+import time
+
+from monitor import devices
+from monitor.events import LINK_UP, DeviceEvent
+from monitor.snapshot import FleetSnapshot
+
+CHILD = "10.0.1.5"
+
+
+def test_event_clears_upstream_suppression(monkeypatch):
+    # Дочірній пристрій придушено через недоступний батьківський
+    monkeypatch.setattr(devices, "status", {})
+    monkeypatch.setattr(devices, "resume", devices.ResumeQueue(1))
+    devices.mark_upstream({"ip": CHILD, "name": "sw-5"}, "10.0.1.1", [])
+    devices.resume.start_cycle()
+    devices.resume.admit("10.0.9.9")  # квоту вичерпано
+    assert not devices.resume.admit(CHILD)
+
+    devices.handle_event(
+        DeviceEvent(ip=CHILD, kind=LINK_UP, source="trap", ts=time.time())
+    )
+    # Подію застосовує потік опитування, а не потік приймача
+    assert not devices.status[CHILD].get("alive")
+    devices.apply_pending()
+
+    entry = devices.status[CHILD]
+    assert entry["alive"] and "upstream" not in entry
+    assert len(devices.resume) == 0
+    snapshot = FleetSnapshot.build(1, {"devices": devices.status})
+    assert snapshot.online_count == 1
+    assert snapshot.unreachable_count == 0
+    assert snapshot.offline_count == 0
+
+
+def test_event_older_than_poll_does_not_revive(monkeypatch):
+    # Трап, отриманий до опитування, що визнало пристрій недоступним
+    monkeypatch.setattr(devices, "status", {})
+    devices.mark_upstream({"ip": CHILD, "name": "sw-5"}, "10.0.1.1", [])
+
+    devices.handle_event(
+        DeviceEvent(ip=CHILD, kind=LINK_UP, source="trap", ts=1000)
+    )
+    devices.apply_pending()
+
+    assert not devices.status[CHILD]["alive"]
+    assert devices.status[CHILD]["upstream"]
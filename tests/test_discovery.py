@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+from monitor import discovery
+from monitor.discovery import DiscoveredDevice
+
+MIKROTIK = "1.3.6.1.4.1.14988.1"
+
+
+class FakePinger:
+    """Відповідають лише адреси з rtts"""
+
+    def __init__(self, rtts):
+        self.rtts = rtts
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def ping(self, ip, timeout):
+        return self.rtts.get(ip)
+
+
+class FakeProber:
+    def __init__(self, agents):
+        self.agents = agents  # (ip, community) → значення OID
+        self.requests = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def get(self, ip, oids, community, timeout, retries):
+        self.requests.append((ip, community))
+        return self.agents.get((ip, community))
+
+
+def test_vendor_from_enterprise_number():
+    assert discovery.vendor_of(MIKROTIK) == "MikroTik"
+    assert discovery.vendor_of("1.3.6.1.4.1.9.1.1208") == "Cisco"
+    assert discovery.vendor_of("1.3.6.1.4.1.99999.1") is None
+    assert discovery.vendor_of("1.3.6.1.2.1.1") is None
+    assert discovery.vendor_of(None) is None
+
+
+def test_targets_limited_to_ipv4_and_max_prefix():
+    networks = discovery.expand_targets(["10.0.0.7/30", " 10.0.1.1/32"])
+    assert [str(network) for network in networks] == [
+        "10.0.0.4/30",
+        "10.0.1.1/32",
+    ]
+    with pytest.raises(ValueError):
+        discovery.expand_targets(["10.0.0.0/15"])
+    with pytest.raises(ValueError):
+        discovery.expand_targets(["fd00::/120"])
+
+
+def test_hosts_skip_network_and_broadcast_once():
+    networks = discovery.expand_targets(
+        ["10.0.0.0/30", "10.0.0.1/32", "10.0.0.9/32"]
+    )
+    assert list(discovery.iter_hosts(networks)) == [
+        "10.0.0.1",
+        "10.0.0.2",
+        "10.0.0.9",
+    ]
+
+
+def test_sweep_fingerprints_responders(monkeypatch):
+    agents = {
+        ("10.0.5.2", "private"): {
+            discovery.OID_SYS_DESCR: "RouterOS CRS326",
+            discovery.OID_SYS_OBJECT_ID: MIKROTIK,
+            discovery.OID_SYS_NAME: "sw-lab",
+        },
+        # ICMP фільтрується, але SNMP відповідає
+        ("10.0.5.5", "public"): {discovery.OID_SYS_NAME: "printer"},
+    }
+    prober = FakeProber(agents)
+    monkeypatch.setattr(
+        discovery,
+        "AsyncPinger",
+        lambda: FakePinger({"10.0.5.1": 0.002, "10.0.5.2": 0.001}),
+    )
+    monkeypatch.setattr(discovery, "SnmpProber", lambda: prober)
+    progress = []
+
+    found = asyncio.run(
+        discovery.sweep(
+            ["10.0.5.0/29"],
+            communities=("public", "private"),
+            rate=10_000,
+            in_flight=4,
+            check_ros=False,
+            progress=lambda *args: progress.append(args),
+        )
+    )
+
+    assert [device.ip for device in found] == ["10.0.5.1", "10.0.5.2"]
+    silent, switch = found
+    assert silent.community is None and silent.rtt == 0.002
+    assert switch.community == "private" and switch.vendor == "MikroTik"
+    assert switch.routeros
+    # Без snmp_all адреси без ICMP не опитуються SNMP
+    assert {ip for ip, _ in prober.requests} == {"10.0.5.1", "10.0.5.2"}
+    assert progress[-1] == (6, 6, 2)
+
+    found = asyncio.run(
+        discovery.sweep(
+            ["10.0.5.0/29"],
+            rate=10_000,
+            snmp_all=True,
+            check_ros=False,
+        )
+    )
+    assert [device.ip for device in found] == [
+        "10.0.5.1",
+        "10.0.5.2",
+        "10.0.5.5",
+    ]
+    assert found[-1].sys_name == "printer" and found[-1].rtt is None
+
+
+def test_merge_keeps_existing_entries():
+    existing = [{"name": "core", "ip": "10.0.5.1", "community": "secret"}]
+    discovered = [
+        DiscoveredDevice(ip="10.0.5.1", community="public"),
+        DiscoveredDevice(
+            ip="10.0.5.2",
+            community="private",
+            sys_name="sw-lab",
+            sys_descr="RouterOS CRS326\nsecond line",
+            vendor="MikroTik",
+            ros_api_port=8728,
+        ),
+    ]
+
+    merged, added = discovery.merge_inventory(existing, discovered)
+
+    assert merged[0] is existing[0]
+    assert added == [
+        {
+            "name": "sw-lab",
+            "ip": "10.0.5.2",
+            "community": "private",
+            "version": "2c",
+            "vendor": "MikroTik",
+            "model": "RouterOS CRS326",
+            "routeros": True,
+        }
+    ]
+    assert merged == existing + added
@@ -0,0 +1,60 @@
+import threading
+
+from monitor.events import LINK_DOWN, DeviceEvent, EventListener
+from monitor.fleet_state import FleetState
+
+DEVICE = {"ip": "10.0.3.7", "name": "sw-7"}
+
+
+def listener(node_id, relay_dir, state, on_event, repoll=None):
+    async def no_repoll(device, rows):
+        pass
+
+    return EventListener(
+        [DEVICE],
+        state,
+        on_event,
+        repoll or no_repoll,
+        host="127.0.0.1",
+        trap_port=0,  # порти подій у тесті не відкриваються
+        syslog_port=0,
+        repoll_delay=0,
+        owner=lambda ip: "b",
+        node_id=node_id,
+        relay_dir=relay_dir,
+    )
+
+
+def test_event_forwarded_to_owning_collector(tmp_path):
+    # Порт слухає колектор "a", а пристрій опитує "b": подію отримує лише "b"
+    received, repolled = [], []
+    delivered = threading.Event()
+
+    async def repoll(device, rows):
+        repolled.append((device["ip"], rows))
+        delivered.set()
+
+    owner_state = FleetState()
+    owner_state.update(DEVICE["ip"], [5], {"name": {5: "ether5"}}, 0)
+    front = listener("a", str(tmp_path), FleetState(), received.append)
+    owner = listener("b", str(tmp_path), owner_state, received.append, repoll)
+    front.start()
+    owner.start()
+    try:
+        front._loop.call_soon_threadsafe(
+            front._on_syslog,
+            b"<134>May  1 10:00:00 sw-7 interface: ether5 link down",
+            (DEVICE["ip"], 514),
+            None,
+        )
+        assert delivered.wait(5)
+    finally:
+        front.stop()
+        owner.stop()
+
+    (event,) = received
+    assert isinstance(event, DeviceEvent) and event.kind == LINK_DOWN
+    # ifIndex визначає власник зі свого стану інтерфейсів
+    assert event.if_name == "ether5" and event.if_index == 5
+    assert repolled == [(DEVICE["ip"], [5])]
+    assert not list(tmp_path.glob("*.events"))  # сокети прибрано
@@ -0,0 +1,51 @@
+import sqlite3
+
+from monitor.history import COUNTER32_WRAP, ROLLUP_PERIOD, HistoryStore
+
+HOUR = 1_000 * ROLLUP_PERIOD
+GBPS = 1_000_000_000
+
+
+def rollup(tmp_path, samples, speed):
+    """Записує зразки [(ts, in_octets, in_errors)] і будує годинні агрегати"""
+    store = HistoryStore(str(tmp_path / "history.db"), writer=True)
+    store.close()
+    conn = sqlite3.connect(store.path)
+    for ts, octets, errors in samples:
+        HistoryStore._write_batch(
+            conn, ts, [], [], [("10.0.0.1", 1, octets, 0, errors, 0, 1, speed)]
+        )
+    store._maintenance(conn, HOUR + ROLLUP_PERIOD)
+    row = conn.execute(
+        "SELECT samples, in_octets_delta, in_errors_delta"
+        " FROM interface_rollup_hourly WHERE period_ts = ?",
+        (HOUR,),
+    ).fetchone()
+    conn.close()
+    return row
+
+
+def test_rollup_sums_wrapping_counter(tmp_path):
+    # Порт завантажений на 1 Гбіт/с: Counter32 переповнюється кожні ~34 с
+    step = GBPS // 8 * 10
+    samples = [
+        (HOUR + i * 10, (i * step) % COUNTER32_WRAP, 0)
+        for i in range(ROLLUP_PERIOD // 10)
+    ]
+    count, in_octets, _ = rollup(tmp_path, samples, GBPS)
+    assert count == len(samples)
+    assert in_octets == step * (len(samples) - 1)
+
+
+def test_rollup_drops_counter_reset(tmp_path):
+    # Перезавантаження пристрою: лічильники починаються з нуля
+    speed = 100_000_000
+    samples = [
+        (HOUR, 3_000_000_000, 50),
+        (HOUR + 10, 3_000_100_000, 60),
+        (HOUR + 20, 1_000, 0),
+        (HOUR + 30, 101_000, 5),
+    ]
+    _, in_octets, in_errors = rollup(tmp_path, samples, speed)
+    assert in_octets == 100_000 + 100_000
+    assert in_errors == 10 + 5
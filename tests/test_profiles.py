@@ -0,0 +1,108 @@
+import json
+
+from protocols.profiles import (
+    DEFAULT_PROFILE,
+    OidTrie,
+    ProfileRegistry,
+    compile_profile,
+    profiles,
+)
+
+ENTERPRISE = "1.3.6.1.4.1.99999"
+PARENT = {
+    "name": "base",
+    "scalars": {"uptime": {"oid": "1.3.6.1.2.1.1.3.0", "type": "int"}},
+}
+CHILD = {
+    "name": "vendor",
+    "extends": "base",
+    "match": {
+        "sys_object_id": [ENTERPRISE],
+        "sys_descr": ["VendorOS"],
+    },
+    "scalars": {
+        "temperature": {
+            "oid": f"{ENTERPRISE}.1.1.0",
+            "type": "float",
+            "scale": 0.1,
+        }
+    },
+    "tables": {
+        "fans": {
+            "name": f"{ENTERPRISE}.2.1.2",
+            "rpm": {"oid": f"{ENTERPRISE}.2.1.3", "type": "int"},
+        }
+    },
+}
+
+
+def test_trie_matches_whole_arcs_only():
+    trie = OidTrie()
+    trie.insert("1.3.6.1.2.1.2", "interfaces")
+    trie.insert("1.3.6.1.2.1.2.2.1.10", "in_octets")
+
+    assert trie.longest_match("1.3.6.1.2.1.2.2.1.10.7") == ("in_octets", "7")
+    assert trie.longest_match(".1.3.6.1.2.1.2.1.0") == ("interfaces", "1.0")
+    # "20" не є продовженням дуги "2"
+    assert trie.longest_match("1.3.6.1.2.1.20.1") is None
+    assert trie.longest_match("1.3.6.1.2.1") is None
+    assert len(trie) == 2
+
+
+def test_trie_insert_replaces_value():
+    trie = OidTrie()
+    trie.insert("1.3.6", "old")
+    trie.insert(".1.3.6", "new")
+
+    assert len(trie) == 1
+    assert trie.longest_match("1.3.6.1") == ("new", "1")
+
+
+def test_route_places_varbinds_into_slots():
+    profile = compile_profile(CHILD, compile_profile(PARENT))
+
+    routed = profile.route(
+        [
+            ("1.3.6.1.2.1.1.3.0", "123456"),
+            (f"{ENTERPRISE}.1.1.0", "415"),
+            (f"{ENTERPRISE}.2.1.2.1", '"fan1"'),
+            (f"{ENTERPRISE}.2.1.3.1", "4200 rpm"),
+            (f"{ENTERPRISE}.2.1.4.1", "ignored"),  # колонки немає в профілі
+            ("1.3.6.1.2.1.1.5.0", "sw-1"),
+        ]
+    )
+
+    assert routed == {
+        "profile": "vendor",
+        "scalars": {"uptime": 123456, "temperature": 41.5},
+        "tables": {"fans": {"1": {"name": "fan1", "rpm": 4200}}},
+    }
+    # Колонки однієї таблиці обходяться одним walk від entry
+    assert f"{ENTERPRISE}.2.1" in profile.walk_roots
+
+
+def test_registry_selects_by_longest_object_id(tmp_path):
+    for spec in (PARENT, CHILD):
+        (tmp_path / f"{spec['name']}.json").write_text(json.dumps(spec))
+    (tmp_path / "broken.json").write_text("{")
+    registry = ProfileRegistry()
+    registry.load_dir(str(tmp_path))
+
+    assert "vendor" in registry and "broken" not in registry
+    # Успадковані скаляри батьківського профілю
+    assert "1.3.6.1.2.1.1.3.0" in registry.get("vendor").scalars
+    assert (
+        registry.select("10.0.7.1", f"{ENTERPRISE}.3.7", None).name == "vendor"
+    )
+    assert registry.select("10.0.7.2", None, "VendorOS 2.1").name == "vendor"
+    assert (
+        registry.select("10.0.7.3", "1.3.6.1.4.1.1", "other").name
+        == DEFAULT_PROFILE
+    )
+    # Вибір кешується для адреси
+    assert registry.select("10.0.7.1", None, None).name == "vendor"
+
+
+def test_shipped_profiles_load():
+    mikrotik = profiles.select("10.0.7.9", "1.3.6.1.4.1.14988.1", None)
+    assert mikrotik.name == "mikrotik" and not mikrotik.empty
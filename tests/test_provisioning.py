@@ -0,0 +1,47 @@
+import asyncio
+
+from protocols import provisioning
+from protocols.provisioning import ProvisioningEngine, ProvisioningStateCache
+
+MASTER = next(iter(provisioning.STUDENT_SLAVES))
+RULES = [
+    {
+        ".id": "*1",
+        "master-configuration": MASTER,
+        "slave-configurations": "",
+    }
+]
+
+
+def test_plan_updates_rules_but_not_reconcile_time(monkeypatch):
+    # План читає правила попутно: це не повна звірка з роутером
+    async def talk_async(api, command):
+        return RULES if command == "/interface/wifi/provisioning/print" else []
+
+    monkeypatch.setattr(provisioning.routeros, "talk_async", talk_async)
+    cache = ProvisioningStateCache(["10.0.0.1", "admin", "secret"])
+    cache.load([], [])
+    reconciled_at = cache.updated_at
+    engine = ProvisioningEngine(cache.credentials, cache=cache)
+
+    plan = asyncio.run(
+        engine.plan(None, {MASTER: provisioning.STUDENT_SLAVES[MASTER]})
+    )
+
+    assert [rule["id"] for rule in plan.rules] == ["*1"]
+    assert cache.updated_at == reconciled_at
+    assert cache.view()["config_details"] == RULES
+
+
+def test_plan_leaves_unloaded_cache_unloaded(monkeypatch):
+    async def talk_async(api, command):
+        return RULES if command == "/interface/wifi/provisioning/print" else []
+
+    monkeypatch.setattr(provisioning.routeros, "talk_async", talk_async)
+    cache = ProvisioningStateCache(["10.0.0.1", "admin", "secret"])
+
+    asyncio.run(
+        ProvisioningEngine(cache.credentials, cache=cache).plan(None, {})
+    )
+
+    assert not cache.loaded
@@ -0,0 +1,46 @@
+from monitor import devices, ros_live
+from protocols.provisioning import ProvisioningStateCache
+
+ROUTER = "10.0.3.1"
+
+
+def test_retain_stops_released_routers(monkeypatch):
+    # Сеанс без мережі: потік лише чекає зупинки
+    monkeypatch.setattr(
+        ros_live.RouterSubscriber, "_run", lambda self: self._stop.wait()
+    )
+    pool = ros_live.RouterSubscriptions()
+    pool.retain({ROUTER: ("admin", "secret")})
+    subscriber = pool.get(ROUTER, "admin", "secret")
+    assert subscriber.alive
+
+    pool.retain({})
+    subscriber._thread.join(1)
+    assert not subscriber.alive
+
+
+def test_provisioning_reconcile_runs_only_for_owner(monkeypatch):
+    async def refresh():
+        pass
+
+    state = ProvisioningStateCache([ROUTER, "admin", "secret"], 3600)
+    monkeypatch.setattr(state, "refresh", refresh)
+    monkeypatch.setattr(devices, "provisioning_state", state)
+    monkeypatch.setattr(devices, "ROS_SUBSCRIPTIONS", False)
+
+    devices.sync_routeros([], owns=lambda key: False)
+    assert not state.running
+
+    devices.sync_routeros([], owns=lambda key: key == ROUTER)
+    assert state.running
+
+    devices.sync_routeros([], owns=lambda key: False)
+    assert not state.running
+    state.stop()
+
+
+def test_merge_views_prefers_fresher_model():
+    older = {ROUTER: {"updated_at": 10.0, "connected": False}}
+    newer = {ROUTER: {"updated_at": 20.0, "connected": True}}
+    assert ros_live.merge_views([newer, older])[ROUTER]["connected"]
+    assert ros_live.merge_views([older, newer])[ROUTER]["connected"]
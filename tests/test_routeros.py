@@ -0,0 +1,95 @@
+import pytest
+
+from protocols import routeros
+from protocols.routeros import Query
+
+
+def test_select_and_where_build_one_sentence():
+    query = (
+        Query("/ip/dhcp-server/lease")
+        .select("address", "mac-address")
+        .where(status="bound", dynamic=True)
+    )
+
+    assert query.words() == (
+        "/ip/dhcp-server/lease/print",
+        "=.proplist=address,mac-address",
+        "?status=bound",
+        "?dynamic=true",
+    )
+
+
+def test_where_maps_underscores_and_keeps_spaces():
+    query = Query("/interface/wifi/registration-table/").where(
+        mac_address="AA:BB:CC:00:11:22", comment="room 101"
+    )
+
+    # Кожне значення — окреме слово, тож пробіл не розриває речення
+    assert query.words() == (
+        "/interface/wifi/registration-table/print",
+        "?mac-address=AA:BB:CC:00:11:22",
+        "?comment=room 101",
+    )
+
+
+def test_where_in_joins_alternatives_with_or():
+    query = Query("/interface/wifi/configuration").where_in(
+        "name", ["cfg-a", "cfg-b", "cfg-c"]
+    )
+
+    assert query.words()[1:] == (
+        "?name=cfg-a",
+        "?name=cfg-b",
+        "?name=cfg-c",
+        "?#||",
+    )
+    # Одне значення — звичайна рівність без операції над стеком
+    single = Query("/ip/route").where_in("dst-address", ["0.0.0.0/0"])
+    assert single.words()[1:] == ("?dst-address=0.0.0.0/0",)
+    with pytest.raises(ValueError):
+        Query("/ip/route").where_in("dst-address", [])
+
+
+def test_presence_and_comparison_filters():
+    query = (
+        Query("/interface/print")
+        .has("comment")
+        .missing("disabled")
+        .less("mtu", 1500)
+        .greater("rx-byte", 0)
+    )
+
+    assert query.words() == (
+        "/interface/print",
+        "?comment",
+        "?-disabled",
+        "?<mtu=1500",
+        "?>rx-byte=0",
+    )
+
+
+def test_builder_does_not_mutate_base_query():
+    base = Query("/ip/address").select("address")
+    base.where(interface="bridge")
+
+    assert base.words() == ("/ip/address/print", "=.proplist=address")
+
+
+def test_talk_sends_query_words():
+    sent = []
+
+    class Socket:
+        def settimeout(self, timeout):
+            pass
+
+    class Api:
+        sock = Socket()
+
+        def talk(self, command):
+            sent.append(command)
+            return [{"address": "10.0.0.1/24"}]
+
+    rows = routeros.talk(Api(), Query("/ip/address").select("address"))
+
+    assert rows == [{"address": "10.0.0.1/24"}]
+    assert sent == [("/ip/address/print", "=.proplist=address")]
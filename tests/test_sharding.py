@@ -0,0 +1,87 @@
+import os
+import threading
+
+from monitor.sharding import HashRing, ShardDirectory, snapshot_path
+from monitor.snapshot import MmapSnapshotStore
+
+
+def device(ip: str) -> dict:
+    return {"ip": ip, "name": ip, "alive": True, "checked_at": 0}
+
+
+def test_reader_follows_restarted_collector(tmp_path):
+    path = snapshot_path(str(tmp_path), "a")
+    shards = ShardDirectory(str(tmp_path), ttl=60)
+
+    writer = MmapSnapshotStore(path, writer=True)
+    shards.rescan()
+    writer.publish(
+        {"devices": {"10.0.0.1": device("10.0.0.1")}, "published_at": 1e12}
+    )
+    assert set(shards.read_all()["a"].by_ip) == {"10.0.0.1"}
+
+    # Зупинка колектора видаляє знімок, новий процес створює файл заново
+    writer.close()
+    os.unlink(path)
+    writer = MmapSnapshotStore(path, writer=True)
+    writer.publish(
+        {"devices": {"10.0.0.2": device("10.0.0.2")}, "published_at": 1e12}
+    )
+    shards.rescan()
+
+    assert set(shards.read_all()["a"].by_ip) == {"10.0.0.2"}
+    writer.close()
+    shards.close()
+
+
+def test_concurrent_readers_see_consistent_snapshots(tmp_path):
+    path = snapshot_path(str(tmp_path), "a")
+    writer = MmapSnapshotStore(path, writer=True)
+    reader = MmapSnapshotStore(path)
+    errors = []
+
+    def read():
+        for _ in range(2000):
+            snapshot = reader.read()
+            # Кожен знімок містить рівно version пристроїв
+            if snapshot.version and len(snapshot.by_ip) != snapshot.version:
+                errors.append(snapshot.version)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for version in range(1, 300):
+        # Заповнення змушує файл рости, а читачів — перевідображати його
+        devices = {
+            f"10.0.{i // 256}.{i % 256}": device("x") for i in range(version)
+        }
+        writer.publish({"devices": devices, "padding": "x" * 300 * version})
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(reader.read().by_ip) == 299
+    writer.close()
+    reader.close()
+
+
+def test_hash_ring_moves_only_a_share_of_keys():
+    keys = [f"10.0.{i // 250}.{i % 250}" for i in range(2000)]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    moved = [key for key in keys if before.owner(key) != after.owner(key)]
+    # Переносяться лише ключі, що дістались новому вузлу
+    assert all(after.owner(key) == "d" for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+    assert HashRing([]).owner("10.0.0.1") is None
+
+
+def test_hash_ring_assigns_branches_to_one_node():
+    devices = [{"ip": f"10.1.0.{i}"} for i in range(1, 41)]
+    ring = HashRing(["a", "b"])
+    root = lambda ip: "10.1.0.1"  # вся гілка — за коренем
+
+    owned = {node: ring.assign(devices, node, key=root) for node in ring.nodes}
+    assert sorted(len(value) for value in owned.values()) == [0, 40]
+    assert HashRing(["b", "a"]).owner("x") == ring.owner("x")
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from protocols.breaker import CLOSED
+from protocols.deadline import DeadlineExceeded, deadline
+from protocols.snmp import AsyncSwitchSNMP
+
+HOST = "10.0.2.1"
+
+
+def client() -> AsyncSwitchSNMP:
+    switch = AsyncSwitchSNMP(HOST)
+    switch._is_snmp_available = True  # без запуску утиліт net-snmp
+    return switch
+
+
+def test_exhausted_budget_skips_call_without_failure():
+    # Залишку менше MIN_BUDGET: виклик пропускається ще до snmpget
+    switch = client()
+
+    async def run():
+        with deadline(0.05) as budget:
+            with pytest.raises(DeadlineExceeded):
+                await switch._snmp_get(switch.OID_SYS_NAME)
+            return budget.exhausted
+
+    assert asyncio.run(run())
+    assert switch.breaker.state == CLOSED
+
+
+def test_system_info_reports_exhausted_budget():
+    switch = client()
+
+    async def run():
+        with deadline(0.05) as budget:
+            return await switch.get_system_info(), budget.exhausted
+
+    info, exhausted = asyncio.run(run())
+    assert info == {} and exhausted
+    assert switch.breaker.state == CLOSED
+
+
+def fake_agent(switch, ports, requests, in_flight):
+    """Агент з портами ports: сторінка — repetitions рядків усіх колонок"""
+    columns = {column for _, column in switch.INTERFACE_COLUMNS}
+
+    def next_varbind(oid):
+        base, _, index = oid.rpartition(".")
+        if base in columns:
+            following = [p for p in ports if p > int(index)]
+        else:
+            base, following = oid, list(ports)
+        if not following:
+            return "1.3.6.1.9", "No more variables"
+        return f"{base}.{following[0]}", str(following[0])
+
+    async def page(oids, repetitions):
+        requests.append(repetitions)
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0)
+        varbinds, cursors = [], list(oids)
+        for _ in range(repetitions):
+            for i, oid in enumerate(cursors):
+                cursors[i], value = next_varbind(oid)
+                varbinds.append((cursors[i], value))
+        in_flight["now"] -= 1
+        return varbinds
+
+    return page
+
+
+def test_walk_table_pages_column_groups_concurrently(monkeypatch):
+    # Агент з 120 портами: GETBULK повертає колонки, що чергуються
+    switch = client()
+    columns = switch.INTERFACE_COLUMNS
+    requests, in_flight = [], {"now": 0, "max": 0}
+    monkeypatch.setattr(
+        switch,
+        "_snmp_page",
+        fake_agent(switch, range(1, 121), requests, in_flight),
+    )
+    table = asyncio.run(switch._walk_table(columns, {1, 60, 120}))
+
+    assert set(table) == {name for name, _ in columns}
+    assert all(
+        data == {1: "1", 60: "60", 120: "120"} for data in table.values()
+    )
+    assert in_flight["max"] > 1
+    assert all(25 <= rows <= 50 for rows in requests)
+
+
+def test_snmpv1_walks_table_with_getnext_rows(monkeypatch):
+    # У SNMPv1 немає GETBULK: сторінка — один рядок усіх колонок групи
+    for switch in (
+        AsyncSwitchSNMP(HOST, version="1"),
+        AsyncSwitchSNMP(HOST, version="2c"),
+    ):
+        switch._is_snmp_available = True
+        if switch.version == "2c":
+            switch.config.USE_BULK = False
+        requests = []
+        monkeypatch.setattr(
+            switch,
+            "_snmp_page",
+            fake_agent(switch, [1, 2, 1001], requests, {"now": 0, "max": 0}),
+        )
+        columns = switch.INTERFACE_COLUMNS[:3]
+        table = asyncio.run(switch._walk_table(columns))
+
+        assert all(
+            data == {1: "1", 2: "2", 1001: "1001"} for data in table.values()
+        )
+        assert set(requests) == {1}
+
+
+def test_interface_errors_propagate_for_retry(monkeypatch):
+    # Збій розбору — не порожній результат: async_retry повторює запит
+    switch = client()
+    calls = []
+
+    async def broken_indexes():
+        calls.append(1)
+        raise ValueError("некоректна відповідь")
+
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(switch, "_get_interface_indexes", broken_indexes)
+    monkeypatch.setattr(asyncio, "sleep", no_sleep)
+
+    with pytest.raises(ValueError):
+        asyncio.run(switch.get_interfaces_columns())
+    assert len(calls) == switch.config.MAX_RETRIES
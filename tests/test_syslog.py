@@ -0,0 +1,50 @@
+from protocols import syslog
+
+
+def test_rfc5424_with_structured_data():
+    data = (
+        b"<30>1 2024-05-01T10:00:00.000Z sw-core.lan interface - - "
+        b'[meta sequenceId="1" note="a\\]b"] \xef\xbb\xbfether3 link down'
+    )
+    message = syslog.parse_syslog(data)
+
+    assert message.facility == 3 and message.severity == 6
+    assert message.timestamp == "2024-05-01T10:00:00.000Z"
+    assert message.hostname == "sw-core.lan"
+    assert message.app == "interface"
+    assert message.message == "ether3 link down"
+    assert syslog.link_event(message.message) == ("ether3", syslog.LINK_DOWN)
+
+
+def test_rfc5424_nil_fields():
+    message = syslog.parse_syslog(b"<14>1 - - - - - -")
+
+    assert message.hostname == "" and message.app == ""
+    assert message.message == ""
+
+
+def test_rfc3164_with_hostname_and_tag():
+    message = syslog.parse_syslog(
+        b"<134>May  1 10:00:00 sw-5 interface: sfp1 link up (speed 1G)"
+    )
+
+    assert message.facility == 16 and message.severity == 6
+    assert message.timestamp == "May  1 10:00:00"
+    assert message.hostname == "sw-5"
+    assert message.app == "interface"
+    assert syslog.link_event(message.message) == ("sfp1", syslog.LINK_UP)
+
+
+def test_rfc3164_without_hostname():
+    # RouterOS без "remote-log-format" надсилає лише TAG і текст
+    message = syslog.parse_syslog(
+        b"<13>May 11 08:15:02 system: router rebooted"
+    )
+
+    assert message.hostname == "" and message.app == "system"
+    assert syslog.is_reboot(message.message)
+
+
+def test_unparseable_datagram_ignored():
+    assert syslog.parse_syslog(b"ether1 link down") is None
+    assert syslog.link_event("user admin logged in") is None
@@ -0,0 +1,28 @@
+import numpy as np
+
+from benchmarks.bench_topn import make_cycle
+from monitor.topn import TopTalkers, top_rows
+
+
+def test_top_rows_skips_zero_and_unknown():
+    values = np.array([0.0, 5.0, np.nan, 7.0, 1.0, 0.0])
+    assert top_rows(values, 2).tolist() == [3, 1]
+    assert top_rows(values, 10).tolist() == [3, 1, 4]
+
+
+def test_leaders_match_full_sort():
+    cycle = make_cycle(200, 48, np.random.default_rng(7))
+    top = TopTalkers(size=25)
+    top.update(cycle)
+
+    order = np.argsort(-cycle.in_bps, kind="stable")[:25]
+    expected = [
+        (
+            (cycle.ips[cycle.device_ids[row]], int(cycle.if_indexes[row])),
+            cycle.in_bps[row],
+        )
+        for row in order
+    ]
+    assert top.top("in_bps", 25) == expected
+    errors = cycle.in_errors_ps + cycle.out_errors_ps
+    assert len(top.top("errors_ps", 100)) == min(25, np.count_nonzero(errors))
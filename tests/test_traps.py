@@ -0,0 +1,119 @@
+import pytest
+
+from protocols import ber, traps
+
+COMMUNITY = b"public"
+
+
+def varbind(oid: str, tag: int, value: bytes) -> bytes:
+    return ber.encode_tlv(
+        ber.SEQUENCE, ber.encode_oid(oid) + ber.encode_tlv(tag, value)
+    )
+
+
+def message(version: int, pdu_tag: int, pdu: bytes) -> bytes:
+    return ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_integer(version)
+        + ber.encode_tlv(ber.OCTET_STRING, COMMUNITY)
+        + ber.encode_tlv(pdu_tag, pdu),
+    )
+
+
+def trap_v1(generic: int, specific: int = 0) -> bytes:
+    pdu = (
+        ber.encode_oid("1.3.6.1.4.1.14988")
+        + ber.encode_tlv(ber.IP_ADDRESS, bytes((10, 0, 1, 5)))
+        + ber.encode_integer(generic)
+        + ber.encode_integer(specific)
+        + ber.encode_tlv(ber.TIMETICKS, b"\x01\x00")
+        + ber.encode_tlv(
+            ber.SEQUENCE,
+            varbind(f"{traps.OID_IF_INDEX}.3", ber.INTEGER, b"\x03"),
+        )
+    )
+    return message(0, ber.TRAP_V1, pdu)
+
+
+def trap_v2(pdu_tag: int, trap_oid: str) -> bytes:
+    pdu = (
+        ber.encode_integer(4242)  # request-id
+        + ber.encode_integer(0)
+        + ber.encode_integer(0)
+        + ber.encode_tlv(
+            ber.SEQUENCE,
+            varbind(traps.OID_SYS_UPTIME, ber.TIMETICKS, b"\x10")
+            + ber.encode_tlv(
+                ber.SEQUENCE,
+                ber.encode_oid(traps.OID_SNMP_TRAP_OID)
+                + ber.encode_oid(trap_oid),
+            )
+            + varbind(f"{traps.OID_IF_INDEX}.7", ber.INTEGER, b"\x07"),
+        )
+    )
+    return message(1, pdu_tag, pdu)
+
+
+def test_v1_generic_trap_maps_to_v2_oid():
+    # RFC 3584: generic-trap linkDown (2) -> snmpTraps.3
+    trap = traps.decode_trap(trap_v1(2))
+
+    assert trap.version == "1" and trap.community == "public"
+    assert trap.trap_oid == traps.TRAP_LINK_DOWN
+    assert trap.agent_addr == "10.0.1.5"
+    assert trap.if_index == 3
+    assert trap.response is None
+
+
+def test_v1_enterprise_specific_trap():
+    trap = traps.decode_trap(trap_v1(6, specific=17))
+    assert trap.trap_oid == "1.3.6.1.4.1.14988.0.17"
+
+
+def test_v2_trap_without_response():
+    trap = traps.decode_trap(trap_v2(ber.TRAP_V2, traps.TRAP_LINK_UP))
+
+    assert trap.version == "2c"
+    assert trap.trap_oid == traps.TRAP_LINK_UP
+    assert traps.OID_SNMP_TRAP_OID not in trap.varbinds
+    assert trap.if_index == 7
+    assert trap.response is None
+
+
+def test_inform_acknowledged_with_same_request_id():
+    data = trap_v2(ber.INFORM_REQUEST, traps.TRAP_COLD_START)
+    trap = traps.decode_trap(data)
+
+    assert trap.trap_oid == traps.TRAP_COLD_START
+    _, response, _ = ber.decode_tlv(trap.response)
+    version, community, (pdu_tag, pdu) = ber.decode_sequence(response)
+    assert ber.decode_integer(version[1]) == 1
+    assert community[1] == COMMUNITY
+    assert pdu_tag == ber.GET_RESPONSE
+    request_id, status, index, varbinds = ber.decode_sequence(pdu)
+    assert ber.decode_integer(request_id[1]) == 4242
+    assert ber.decode_integer(status[1]) == 0
+    # Response повторює varbind запиту, зокрема snmpTrapOID.0
+    assert (
+        ber.decode_varbinds(varbinds[1])[traps.OID_SNMP_TRAP_OID]
+        == traps.TRAP_COLD_START
+    )
+
+
+def test_v2_trap_without_trap_oid_rejected():
+    pdu = (
+        ber.encode_integer(1)
+        + ber.encode_integer(0)
+        + ber.encode_integer(0)
+        + ber.encode_tlv(
+            ber.SEQUENCE,
+            varbind(traps.OID_SYS_UPTIME, ber.TIMETICKS, b"\x10"),
+        )
+    )
+    with pytest.raises(ber.BERError):
+        traps.decode_trap(message(1, ber.TRAP_V2, pdu))
+
+
+def test_snmpv3_message_rejected():
+    with pytest.raises(ber.BERError):
+        traps.decode_trap(message(3, ber.TRAP_V2, b""))
@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import pytest
+
+from protocols import usm
+from protocols.usm import EngineCache, EngineInfo, UsmUser
+
+# RFC 3414 A.3: пароль "maplesyrup", engineID 00…02
+PASSWORD = "maplesyrup"
+ENGINE_ID = bytes.fromhex("000000000000000000000002")
+
+
+def test_key_localization_rfc3414_md5():
+    assert (
+        usm.password_to_key(PASSWORD, "MD5").hex()
+        == "9faf3283884e92834ebc9847d8edd963"
+    )
+    assert (
+        usm.localized_key(PASSWORD, "MD5", ENGINE_ID).hex()
+        == "526f5eed9fcce26f8964c2930787d82b"
+    )
+
+
+def test_key_localization_rfc3414_sha():
+    assert (
+        usm.password_to_key(PASSWORD, "SHA").hex()
+        == "9fb5cc0381497b3793528939ff788d5d79145211"
+    )
+    assert (
+        usm.localized_key(PASSWORD, "SHA", ENGINE_ID).hex()
+        == "6695febc9288e36282235fc7151f128497b38f3f"
+    )
+
+
+def test_parse_levels():
+    assert UsmUser.parse(["monitor"]).level == usm.NO_AUTH_NO_PRIV
+    user = UsmUser.parse(["monitor", "sha", PASSWORD, "aes", "secret-key"])
+    assert user.level == usm.AUTH_PRIV
+    assert (user.auth_protocol, user.priv_protocol) == ("SHA", "AES")
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["monitor", "SHA", ""],
+        ["monitor", "SHA", "short"],
+        ["monitor", "SHA", PASSWORD, "AES", "1234567"],
+        ["monitor", "SHA"],
+        ["monitor", "SHA1", PASSWORD],
+    ],
+)
+def test_parse_rejects_invalid_accounts(values):
+    with pytest.raises(ValueError):
+        UsmUser.parse(values)
+
+
+def test_command_args_use_localized_keys():
+    user = UsmUser.parse(["monitor", "MD5", PASSWORD, "DES", PASSWORD])
+    engine = EngineInfo(ENGINE_ID, 3, 100, time.monotonic())
+
+    args = usm.command_args(user, engine)
+
+    key = "0x526f5eed9fcce26f8964c2930787d82b"
+    assert args[args.index("-3k") + 1] == key
+    assert args[args.index("-3K") + 1] == key
+    assert args[args.index("-e") + 1] == "0x" + ENGINE_ID.hex()
+    assert args[args.index("-Z") + 1] == "3,100"
+    assert "-A" not in args and "-X" not in args
+
+
+def report(engine_id: bytes, boots: int, engine_time: int) -> bytes:
+    """Report агента на запит виявлення (лише поля, що розбираються)"""
+    ber = usm.ber
+    security = ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_tlv(ber.OCTET_STRING, engine_id)
+        + ber.encode_integer(boots)
+        + ber.encode_integer(engine_time)
+        + ber.encode_tlv(ber.OCTET_STRING, b"") * 3,
+    )
+    return ber.encode_tlv(
+        ber.SEQUENCE,
+        ber.encode_integer(3)
+        + ber.encode_tlv(ber.SEQUENCE, ber.encode_integer(7))
+        + ber.encode_tlv(ber.OCTET_STRING, security)
+        + ber.encode_tlv(ber.SEQUENCE, b""),
+    )
+
+
+def test_discovery_report_decoded():
+    engine = usm.decode_discovery(report(ENGINE_ID, 5, 1234))
+    assert (engine.engine_id, engine.boots, engine.time) == (
+        ENGINE_ID,
+        5,
+        1234,
+    )
+    # Власний запит виявлення має порожній engineID
+    with pytest.raises(usm.ber.BERError):
+        usm.decode_discovery(usm.encode_discovery(7))
+
+
+def test_concurrent_requests_share_one_discovery(monkeypatch):
+    calls = []
+
+    async def discover_engine(host, timeout):
+        calls.append(host)
+        await asyncio.sleep(0.05)
+        return EngineInfo(ENGINE_ID, 1, 10, time.monotonic())
+
+    monkeypatch.setattr(usm, "discover_engine", discover_engine)
+    cache = EngineCache()
+
+    async def run():
+        return await asyncio.gather(*(cache.get("10.0.6.1") for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert calls == ["10.0.6.1"]
+    assert all(engine is results[0] for engine in results)
+    # Наступний запит — з кешу, без виявлення
+    asyncio.run(cache.get("10.0.6.1"))
+    assert calls == ["10.0.6.1"]
+
+
+def test_failed_discovery_backs_off(monkeypatch):
+    calls = []
+
+    async def discover_engine(host, timeout):
+        calls.append(host)
+        return None
+
+    monkeypatch.setattr(usm, "discover_engine", discover_engine)
+    cache = EngineCache()
+
+    assert asyncio.run(cache.get("10.0.6.2")) is None
+    assert asyncio.run(cache.get("10.0.6.2")) is None
+    assert calls == ["10.0.6.2"]
+
+
+def test_interrupted_discovery_is_not_a_failure(monkeypatch):
+    calls = []
+
+    async def discover_engine(host, timeout):
+        calls.append(host)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(usm, "discover_engine", discover_engine)
+    cache = EngineCache()
+
+    async def run():
+        owner = asyncio.ensure_future(cache.get("10.0.6.3"))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get("10.0.6.3"))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await waiter
+
+    # Очікувач отримує None замість скасування, агент не позначено відмовою
+    assert asyncio.run(run()) is None
+    assert "10.0.6.3" not in cache._failed and not cache._pending
@@ -0,0 +1,75 @@
+import time
+
+from monitor import warmstart
+from monitor.fleet_state import FleetState
+
+IP = "10.0.8.1"
+STATUS = {IP: {"name": "sw-8", "alive": True, "checked_at": 1000}}
+INFO = {IP: {"sys_name": "sw-8", "uptime": "1 day"}}
+
+
+def saved_fleet(tmp_path):
+    fleet_state = FleetState()
+    fleet_state.strings.intern("unrelated")  # зсуває id рядків процесу
+    fleet_state.update(
+        IP,
+        [1, 2],
+        {
+            "name": {1: "ether1", 2: "sfp-plus1"},
+            "alias": {2: "uplink"},
+            "in_octets": {1: "12345678901", 2: "5"},
+            "oper_status": {1: "1", 2: "2"},
+        },
+        1000,
+    )
+    path = str(tmp_path / "warm.bin")
+    warmstart.save(path, STATUS, fleet_state, INFO)
+    return path, fleet_state
+
+
+def test_round_trip_into_fresh_string_table(tmp_path):
+    path, fleet_state = saved_fleet(tmp_path)
+
+    restored = FleetState()
+    state = warmstart.load(path, restored.strings)
+
+    assert state.status == STATUS and state.device_info == INFO
+    assert time.time() - state.saved_at < 60
+    device = state.interfaces[IP]
+    assert device.to_dict() == fleet_state.get(IP).to_dict()
+    assert device.polled_at == 1000
+    # Назви інтерновано в таблицю нового процесу
+    assert device.port_index("sfp-plus1") == 2
+
+
+def test_truncated_file_ignored(tmp_path):
+    path, _ = saved_fleet(tmp_path)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    for size in (len(data) - 1, warmstart.HEADER.size + 4, 3):
+        with open(path, "wb") as f:
+            f.write(data[:size])
+        assert warmstart.load(path, FleetState().strings) is None
+
+
+def test_other_platform_ignored(tmp_path, monkeypatch):
+    path, _ = saved_fleet(tmp_path)
+    # Файл записано з іншими розмірами елементів масивів
+    layout = {**warmstart._layout(), "Q": 4}
+    monkeypatch.setattr(warmstart, "_layout", lambda: layout)
+
+    assert warmstart.load(path, FleetState().strings) is None
+
+
+def test_stale_or_foreign_file_ignored(tmp_path):
+    path, fleet_state = saved_fleet(tmp_path)
+    warmstart.save(
+        path, STATUS, fleet_state, INFO, saved_at=time.time() - 7200
+    )
+    assert warmstart.load(path, FleetState().strings, max_age=3600) is None
+
+    with open(path, "r+b") as f:
+        f.write(b"XXXX")
+    assert warmstart.load(path, FleetState().strings) is None
+    assert warmstart.load(str(tmp_path / "missing.bin"), None) is None